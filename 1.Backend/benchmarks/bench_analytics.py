@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: group analytics engine
+
+Generates a synthetic group (same document shape as the analytics
+aggregation returns) and times frame construction and metric computation
+against a plain-Python reference implementation.
+
+Usage:
+    python benchmarks/bench_analytics.py [--expenses 100000] [--members 50] [--repeat 5]
+"""
+
+import sys
+import pathlib
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from server.utils.analytics import build_group_frame, compute_group_analytics
+
+CATEGORIES = ["food", "rent", "travel", "utilities", "groceries", "fuel",
+              "entertainment", "health", "shopping", "education", "gifts", "misc"]
+
+def make_docs(n_expenses: int, n_members: int, seed: int = 42):
+    """Synthetic projected expense documents with equal splits"""
+    rng = random.Random(seed)
+    members = [f"{i:024x}" for i in range(n_members)]
+    start = date(2024, 1, 1)
+
+    docs = []
+    for _ in range(n_expenses):
+        amount = round(rng.uniform(1, 500), 2)
+        k = rng.randint(1, min(6, n_members))
+        participants = rng.sample(members, k)
+        share = round(amount / k, 2)
+        docs.append({
+            "d": (start + timedelta(days=rng.randrange(730))).isoformat(),
+            "a": amount,
+            "c": rng.choice(CATEGORIES),
+            "p": participants[0],
+            "su": participants,
+            "ss": [share] * k,
+        })
+    return docs
+
+def reference_analytics(docs):
+    """Hand-rolled loop equivalent, for comparison"""
+    paid, owed, daily, mix = {}, {}, {}, {}
+    for doc in docs:
+        payer, amount = doc["p"], doc["a"]
+        paid[payer] = paid.get(payer, 0.0) + amount
+        if doc["su"]:
+            for uid, share in zip(doc["su"], doc["ss"]):
+                owed[uid] = owed.get(uid, 0.0) + share
+        else:
+            owed[payer] = owed.get(payer, 0.0) + amount
+        day = daily.setdefault(doc["d"], [0.0, 0])
+        day[0] += amount
+        day[1] += 1
+        key = (doc["d"][:7], doc["c"])
+        mix[key] = mix.get(key, 0.0) + amount
+    return paid, owed, daily, mix
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Group analytics benchmark")
+    parser.add_argument("--expenses", type=int, default=100_000)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = make_docs(args.expenses, args.members)
+    frame = build_group_frame(docs)
+
+    t_frame = best_of(lambda: build_group_frame(docs), args.repeat)
+    t_metrics = best_of(lambda: compute_group_analytics(frame), args.repeat)
+    t_reference = best_of(lambda: reference_analytics(docs), args.repeat)
+
+    print(f"expenses={args.expenses} members={args.members} shares={len(frame.share_cents)}")
+    print(f"  build_group_frame       {t_frame * 1000:9.2f} ms")
+    print(f"  compute_group_analytics {t_metrics * 1000:9.2f} ms")
+    print(f"  numpy total             {(t_frame + t_metrics) * 1000:9.2f} ms")
+    print(f"  python reference loop   {t_reference * 1000:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_calculator.py
+"""
+Benchmark: split calculator per-call latency
+
+pytest-benchmark suite comparing the original Decimal engine ("decimal",
+before) with the integer-cents fast path ("cents", after) for each split
+type at 2 to 1000 participants. Results are grouped by split type and
+participant count so the two engines appear side by side.
+
+Usage:
+    pip install pytest-benchmark
+    python -m pytest benchmarks/bench_calculator.py --benchmark-only
+    python -m pytest benchmarks/bench_calculator.py --benchmark-only --benchmark-json=bench_calculator.json
+"""
+
+import sys
+import pathlib
+import random
+import pytest
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+pytest.importorskip("pytest_benchmark")
+
+from server.utils.splits.calculator import (
+    calculate_equal_split,
+    calculate_exact_split,
+    calculate_percentage_split,
+    _decimal_equal_split,
+    _decimal_exact_split,
+    _decimal_percentage_split
+)
+
+PARTICIPANT_COUNTS = [2, 3, 10, 100, 1000]
+
+ENGINES = {
+    "decimal": {
+        "equal": _decimal_equal_split,
+        "exact": _decimal_exact_split,
+        "percentage": _decimal_percentage_split,
+    },
+    "cents": {
+        "equal": calculate_equal_split,
+        "exact": calculate_exact_split,
+        "percentage": calculate_percentage_split,
+    },
+}
+
+def make_args(split_type: str, n: int, seed: int = 42):
+    """Representative inputs: cent amounts, cuts spread across participants"""
+    rng = random.Random(seed + n)
+    users = [f"{rng.getrandbits(96):024x}" for _ in range(n)]
+    total_cents = rng.randint(n * 100, n * 10_000)
+
+    if split_type == "equal":
+        return total_cents / 100, users
+
+    if split_type == "exact":
+        cuts = sorted(rng.randint(0, total_cents) for _ in range(n - 1))
+        parts = [b - a for a, b in zip([0] + cuts, cuts + [total_cents])]
+        return total_cents / 100, {u: c / 100 for u, c in zip(users, parts)}
+
+    cuts = sorted(rng.randint(0, 10_000) for _ in range(n - 1))
+    parts = [b - a for a, b in zip([0] + cuts, cuts + [10_000])]
+    return total_cents / 100, {u: p / 100 for u, p in zip(users, parts)}
+
+@pytest.mark.parametrize("n", PARTICIPANT_COUNTS)
+@pytest.mark.parametrize("split_type", ["equal", "exact", "percentage"])
+@pytest.mark.parametrize("engine", ["decimal", "cents"])
+def test_split_latency(benchmark, engine, split_type, n):
+    """Per-call latency of one split calculation"""
+    benchmark.group = f"{split_type}-{n}"
+    fn = ENGINES[engine][split_type]
+    args = make_args(split_type, n)
+
+    result = benchmark(fn, *args)
+
+    assert len(result) == n
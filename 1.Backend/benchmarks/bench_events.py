@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /events fan-out
+
+Registers many in-process subscribers spread across groups and times
+routing change events to them (no MongoDB needed; this is the per-event
+cost paid on the change stream task).
+
+Usage:
+    python benchmarks/bench_events.py [--clients 5000] [--groups 500] [--events 10000]
+"""
+
+import sys
+import pathlib
+import argparse
+import asyncio
+import random
+import time
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from gateway.events import EventBroker, Subscription, build_event
+
+def make_change(rng, n_users, n_groups):
+    doc = {"user_id": f"u{rng.randrange(n_users)}"}
+    if rng.random() < 0.7:
+        doc["group_id"] = f"g{rng.randrange(n_groups)}"
+    return {"operationType": "insert", "ns": {"coll": "expenses"}, "documentKey": {"_id": "x"}, "fullDocument": doc}
+
+async def run(args):
+    rng = random.Random(42)
+    broker = EventBroker(db=None, queue_size=args.events + 1)
+    for i in range(args.clients):
+        groups = {f"g{rng.randrange(args.groups)}" for _ in range(args.groups_per_user)}
+        broker.register(Subscription(f"u{i}", groups, queue_size=args.events + 1))
+
+    changes = [make_change(rng, args.clients, args.groups) for _ in range(args.events)]
+
+    start = time.perf_counter()
+    delivered = 0
+    for change in changes:
+        delivered += broker.dispatch(build_event(change))
+    elapsed = time.perf_counter() - start
+
+    print(f"clients={args.clients} groups={args.groups} events={args.events}")
+    print(f"  deliveries           {delivered:9d}")
+    print(f"  per event            {elapsed / args.events * 1e6:9.2f} us")
+    print(f"  per delivery         {elapsed / max(delivered, 1) * 1e6:9.2f} us")
+    print(f"  events/s             {args.events / elapsed:9.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="/events fan-out benchmark")
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--groups-per-user", type=int, default=3)
+    parser.add_argument("--events", type=int, default=10_000)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: LangGraph overhead per tool call
+
+Runs the gateway's graph (build_chatbot + build_prompt from
+langgraph_service) with in-process tools in place of the MCP server, so
+the numbers are the graph, message handling and model wrapper alone.
+
+Compared:
+- direct    the tool function called without the graph (baseline)
+- stub      LLM_PROVIDER=stub
+- replay    LLM_PROVIDER=replay, from a cassette recorded in this run
+
+--latency-ms adds the same synthetic model latency to stub and replay.
+
+Usage:
+    python benchmarks/bench_graph.py [--calls 2000] [--latency-ms 0]
+"""
+
+import os
+import sys
+import pathlib
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+for path in (PROJECT_ROOT, PROJECT_ROOT / "client"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+
+from langgraph_service import build_chatbot, build_prompt
+from llm_provider import RecordingChatModel, ReplayChatModel, load_cassette
+from stub_llm import StubChatModel
+
+@tool
+def list_expenses(user_id: str, start_date: str, end_date: str) -> str:
+    """List expenses between two dates"""
+    return json.dumps({"status": "success", "count": 0, "expenses": [], "user_id": user_id})
+
+@tool
+def add_expense(user_id: str, date: str, amount: float, category: str, note: str = "") -> str:
+    """Add an expense"""
+    return json.dumps({"status": "success", "id": "0" * 24, "amount": amount})
+
+TOOLS = [list_expenses, add_expense]
+
+def make_calls(n):
+    calls = []
+    for i in range(n):
+        user_id = f"{i:024x}"
+        if i % 2:
+            calls.append(("add_expense", {"date": "2025-01-15", "amount": 10.5 + i, "category": "Food", "note": "x"}, user_id))
+        else:
+            calls.append(("list_expenses", {"start_date": "2025-01-01", "end_date": "2025-01-31"}, user_id))
+    return calls
+
+async def time_graph(chatbot, calls):
+    latencies = []
+    for tool_name, args, user_id in calls:
+        start = time.perf_counter()
+        result = await chatbot.ainvoke({"messages": [HumanMessage(content=build_prompt(tool_name, args, user_id))]})
+        latencies.append(time.perf_counter() - start)
+        assert any(m.type == "tool" for m in result["messages"]), "graph did not call the tool"
+    return latencies
+
+async def time_direct(calls):
+    tools = {t.name: t for t in TOOLS}
+    latencies = []
+    for tool_name, args, user_id in calls:
+        start = time.perf_counter()
+        await tools[tool_name].ainvoke({"user_id": user_id, **args})
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def report(label, latencies):
+    latencies = sorted(latencies)
+    n = len(latencies)
+    mean = sum(latencies) / n
+    print(f"  {label:<8} mean {mean * 1e3:8.3f}ms  p50 {latencies[n // 2] * 1e3:8.3f}ms  "
+          f"p99 {latencies[min(n - 1, int(n * 0.99))] * 1e3:8.3f}ms")
+    return mean
+
+async def run(args):
+    # Replay keys mask ids, dates and amounts: record a handful of calls
+    # and replay them for every user/amount in the timed run
+    record_calls = make_calls(4)
+    calls = make_calls(args.calls)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = os.path.join(tmp, "cassette.jsonl")
+        recorder = build_chatbot(RecordingChatModel(inner=StubChatModel(), path=cassette), TOOLS)
+        await time_graph(recorder, record_calls)
+        entries = load_cassette(cassette)
+
+    stub = build_chatbot(StubChatModel(latency_ms=args.latency_ms), TOOLS)
+    replay = build_chatbot(ReplayChatModel(entries=entries, latency_ms=args.latency_ms), TOOLS)
+
+    # Warm up
+    await time_graph(stub, calls[:20])
+    await time_graph(replay, calls[:20])
+
+    print(f"{args.calls} tool calls, model latency {args.latency_ms:g}ms, cassette entries {len(entries)}")
+    direct = report("direct", await time_direct(calls))
+    stub_mean = report("stub", await time_graph(stub, calls))
+    replay_mean = report("replay", await time_graph(replay, calls))
+    print(f"\nGraph overhead per call: stub {(stub_mean - direct) * 1e3:.3f}ms, "
+          f"replay {(replay_mean - direct) * 1e3:.3f}ms (includes {2 * args.latency_ms:g}ms model latency)")
+
+def main():
+    parser = argparse.ArgumentParser(description="LangGraph overhead per tool call")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Synthetic latency per model call")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark: gateway import time and time to first /health
+
+Runs `python -X importtime -c "import main"` in fresh interpreters and
+summarizes the output: total import time (median of runs) and the
+modules with the largest cumulative and self times. --serve also starts
+uvicorn and measures process start -> first 200 from /health.
+
+Placeholder MONGODB_URI / JWT_SECRET_KEY values are used when unset;
+nothing connects during import or for /health.
+
+--budget-ms makes the run fail (exit 1) when the median import time is
+over budget, so startup regressions show up in CI.
+
+Usage:
+    python benchmarks/bench_importtime.py [--module main] [--runs 5] [--top 15]
+        [--serve] [--budget-ms 1000] [--json importtime.json]
+"""
+
+import os
+import sys
+import pathlib
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import time
+import urllib.request
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+PLACEHOLDER_ENV = {
+    "MONGODB_URI": "mongodb://localhost:27017",
+    "JWT_SECRET_KEY": "bench-secret",
+    "GEMINI_API_KEY": "bench-key",
+}
+
+def bench_env():
+    env = dict(os.environ)
+    for key, value in PLACEHOLDER_ENV.items():
+        env.setdefault(key, value)
+    return env
+
+# ============================================================================
+# -X importtime
+# ============================================================================
+
+def parse_importtime(stderr: str):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def import_once(module: str):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=bench_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    index = next((i for i, r in enumerate(rows) if r[0] == module and r[3] == 0), None)
+    if index is None:
+        return sum(r[1] for r in rows), rows, rows
+    # Output is post-order: the target's children are listed just before it
+    children = []
+    for row in reversed(rows[:index]):
+        if row[3] == 0:
+            break
+        if row[3] == 1:
+            children.append(row)
+    return rows[index][2], rows, children
+
+# ============================================================================
+# Time to first /health
+# ============================================================================
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def serve_once(module: str, timeout: float = 30.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env=bench_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise SystemExit(f"/health not ready within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of the gateway")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--serve", action="store_true", help="Also time uvicorn start -> first /health")
+    parser.add_argument("--budget-ms", type=float, help="Fail if median import time exceeds this")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    runs = [import_once(args.module) for _ in range(args.runs)]
+    totals_ms = [total / 1000 for total, _, _ in runs]
+    median_ms = statistics.median(totals_ms)
+    # Module table from the run closest to the median
+    _, rows, direct = min(runs, key=lambda r: abs(r[0] / 1000 - median_ms))
+
+    print(f"import {args.module}: median {median_ms:.1f}ms  "
+          f"(min {min(totals_ms):.1f}ms, max {max(totals_ms):.1f}ms, {args.runs} runs, {len(rows)} modules)")
+
+    print(f"\nTop {args.top} by cumulative time (direct imports of {args.module}):")
+    for name, self_us, cumulative_us, _ in sorted(direct, key=lambda r: -r[2])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f}ms  {name}")
+
+    print(f"\nTop {args.top} by self time:")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: -r[1])[:args.top]:
+        print(f"  {self_us / 1000:8.1f}ms  {name}")
+
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "import_ms": {"median": round(median_ms, 1), "min": round(min(totals_ms), 1), "max": round(max(totals_ms), 1)},
+        "modules": len(rows),
+        "top_cumulative": [{"module": n, "ms": round(c / 1000, 1)} for n, _, c, _ in sorted(direct, key=lambda r: -r[2])[:args.top]],
+        "top_self": [{"module": n, "ms": round(s / 1000, 1)} for n, s, _, _ in sorted(rows, key=lambda r: -r[1])[:args.top]],
+    }
+
+    if args.serve:
+        ready = [serve_once(args.module) * 1000 for _ in range(args.runs)]
+        report["health_ready_ms"] = {"median": round(statistics.median(ready), 1), "max": round(max(ready), 1)}
+        print(f"\nuvicorn start -> first /health 200: median {statistics.median(ready):.0f}ms, max {max(ready):.0f}ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"\nFAIL: median import time {median_ms:.1f}ms exceeds budget {args.budget_ms:.0f}ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark: instrumentation overhead
+
+Per-event cost of the hot-path recording calls, to compare against the
+latency they measure (a Mongo round trip is ~0.2-1ms, a tool call 1ms+).
+
+Usage:
+    python benchmarks/bench_metrics.py [--calls 200000]
+"""
+
+import sys
+import pathlib
+import argparse
+import time
+from types import SimpleNamespace
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from telemetry import record_tool_call
+from telemetry.mongo import MongoCommandListener
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls
+
+def main():
+    parser = argparse.ArgumentParser(description="Instrumentation overhead benchmark")
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    listener = MongoCommandListener()
+    command = {"find": "expenses"}
+
+    def mongo_event(i):
+        listener.started(SimpleNamespace(command_name="find", request_id=i, command=command))
+        listener.succeeded(SimpleNamespace(command_name="find", request_id=i, duration_micros=500))
+
+    baseline = per_call(lambda i: SimpleNamespace(command_name="find", request_id=i, command=command), args.calls) * 2
+    t_tool = per_call(lambda i: record_tool_call("server", "list_expenses", 0.001, False), args.calls)
+    t_mongo = per_call(mongo_event, args.calls) - baseline
+
+    print(f"calls={args.calls}")
+    print(f"  record_tool_call        {t_tool * 1e6:7.2f} us")
+    print(f"  mongo listener (pair)   {t_mongo * 1e6:7.2f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: response encoding and compression
+
+Times the pieces of a large listing response on synthetic expense
+documents (the shape list_expenses / list_group_expenses return):
+- serialize(): copying each document vs converting it in place
+- JSON encoding: FastAPI default (jsonable_encoder + json.dumps) vs orjson
+- Compression: size and time for gzip and brotli at the configured levels
+
+Usage:
+    python benchmarks/bench_responses.py [--docs 10000] [--repeat 5]
+"""
+
+import sys
+import pathlib
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from gateway import compression
+from gateway.responses import dumps
+
+CATEGORIES = ["food", "rent", "travel", "utilities", "groceries", "fuel"]
+
+def make_docs(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": f"{rng.randrange(50):024x}",
+            "date": (start + timedelta(days=rng.randrange(730))).strftime("%Y-%m-%d"),
+            "amount": round(rng.uniform(1, 500), 2),
+            "category": rng.choice(CATEGORIES),
+            "subcategory": "",
+            "note": "synthetic expense note",
+            "created_at": start + timedelta(seconds=rng.randrange(10 ** 8)),
+        }
+        for _ in range(n)
+    ]
+
+def serialize_copy(doc):
+    """Previous serialize(): copy, then swap _id for id"""
+    doc = dict(doc)
+    doc["id"] = str(doc["_id"])
+    del doc["_id"]
+    return doc
+
+def serialize_in_place(doc):
+    """Current serialize()"""
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+def best_of(fn, repeat, setup=None):
+    timings = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Response encoding benchmark")
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = make_docs(args.docs)
+    fresh = lambda: [dict(d) for d in docs]
+
+    t_copy = best_of(lambda ds: [serialize_copy(d) for d in ds], args.repeat, fresh)
+    t_inplace = best_of(lambda ds: [serialize_in_place(d) for d in ds], args.repeat, fresh)
+
+    rows = [serialize_in_place(d) for d in fresh()]
+    t_default = best_of(lambda _: json.dumps(jsonable_encoder(rows), separators=(",", ":")).encode(), args.repeat)
+    t_orjson = best_of(lambda _: dumps(rows), args.repeat)
+
+    body = dumps(rows)
+    print(f"docs={args.docs} body={len(body) / 1024:.0f} KiB")
+    print(f"  serialize copy          {t_copy * 1000:9.2f} ms")
+    print(f"  serialize in place      {t_inplace * 1000:9.2f} ms")
+    print(f"  jsonable_encoder+json   {t_default * 1000:9.2f} ms")
+    print(f"  orjson                  {t_orjson * 1000:9.2f} ms")
+
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    for encoding in encodings:
+        t = best_of(lambda _: compression.compress(body, encoding), args.repeat)
+        size = len(compression.compress(body, encoding))
+        print(f"  {encoding:<4} {size / 1024:7.0f} KiB ({size / len(body):5.1%})  {t * 1000:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batch split calculation throughput
+
+Compares calculate_splits() called in a loop against
+calculate_splits_batch() on the same mixed workload, and checks the
+results are identical.
+
+Usage:
+    python benchmarks/bench_splits_batch.py [--expenses 10000] [--max-participants 8] [--repeat 5]
+"""
+
+import sys
+import pathlib
+import argparse
+import random
+import time
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from server.utils.splits import calculate_splits, calculate_splits_batch
+
+def make_workload(n_expenses: int, max_participants: int, seed: int = 42):
+    """Mixed equal/exact/percentage expenses with cent amounts"""
+    rng = random.Random(seed)
+    totals, types, participants, payers, data = [], [], [], [], []
+
+    for _ in range(n_expenses):
+        k = rng.randint(2, max_participants)
+        users = [f"{rng.getrandbits(96):024x}" for _ in range(k)]
+        cents = rng.randint(100, 100_000)
+        split_type = rng.choice(["equal", "equal", "exact", "percentage"])
+        split_data = None
+
+        if split_type == "exact":
+            cuts = sorted(rng.randint(0, cents) for _ in range(k - 1))
+            parts = [b - a for a, b in zip([0] + cuts, cuts + [cents])]
+            split_data = {"user_amounts": {u: c / 100 for u, c in zip(users, parts)}}
+        elif split_type == "percentage":
+            cuts = sorted(rng.randint(0, 10000) for _ in range(k - 1))
+            parts = [b - a for a, b in zip([0] + cuts, cuts + [10000])]
+            split_data = {"user_percentages": {u: p / 100 for u, p in zip(users, parts)}}
+
+        totals.append(cents / 100)
+        types.append(split_type)
+        participants.append(users)
+        payers.append(users[0])
+        data.append(split_data)
+
+    return totals, types, participants, payers, data
+
+def run_scalar(workload):
+    return [calculate_splits(*row) for row in zip(*workload)]
+
+def run_batch(workload):
+    return calculate_splits_batch(*workload)
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch split throughput benchmark")
+    parser.add_argument("--expenses", type=int, default=10_000)
+    parser.add_argument("--max-participants", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workload = make_workload(args.expenses, args.max_participants)
+
+    scalar = run_scalar(workload)
+    batch = run_batch(workload)
+    identical = all(
+        list(a.items()) == list(b.items())
+        and [v.as_tuple() for v in a.values()] == [v.as_tuple() for v in b.values()]
+        for a, b in zip(scalar, batch)
+    )
+
+    t_scalar = best_of(lambda: run_scalar(workload), args.repeat)
+    t_batch = best_of(lambda: run_batch(workload), args.repeat)
+
+    print(f"expenses={args.expenses} max_participants={args.max_participants} identical={identical}")
+    print(f"  calculate_splits loop  {t_scalar * 1000:9.2f} ms  {args.expenses / t_scalar:12,.0f} expenses/s")
+    print(f"  calculate_splits_batch {t_batch * 1000:9.2f} ms  {args.expenses / t_batch:12,.0f} expenses/s")
+    print(f"  speedup                {t_scalar / t_batch:9.2f}x")
+
+    if not identical:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: summarize with a covered index vs fetching documents
+
+Seeds one user's expense history at several sizes and times the
+summarize aggregation two ways:
+- fetch    the previous layout: $match on {user_id, date} then $group,
+           which FETCHes every matching document for category/amount
+- covered  build_summary_pipeline on idx_user_date_category_amount,
+           which reads only index keys
+
+Both are hinted so each run uses the intended plan; docs examined come
+from explain. The database defaults to expense_tracker_bench without TLS
+on localhost and refuses to touch expense_tracker.
+
+Usage:
+    python benchmarks/bench_summary.py [--sizes 10k,100k,1m] [--iterations 20] [--days 365]
+"""
+
+import os
+import sys
+import pathlib
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB", "expense_tracker_bench")
+os.environ.setdefault("MONGODB_TLS", "0")
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+CATEGORIES = ["Food", "Travel", "Rent", "Utilities", "Shopping", "Entertainment"]
+START_DATE = date(2023, 1, 1)
+HISTORY_DAYS = 730
+SEED_BATCH = 10_000
+USER_ID = "bench_summary_user"
+FETCH_INDEX = "bench_user_date"
+
+def fetch_pipeline(user_id, start_date, end_date):
+    """summarize before the covered layout"""
+    return [
+        {"$match": {"user_id": user_id, "date": {"$gte": start_date, "$lte": end_date}}},
+        {"$group": {"_id": "$category", "total_amount": {"$sum": "$amount"}, "count": {"$sum": 1}}},
+        {"$sort": {"total_amount": -1}}
+    ]
+
+async def seed(collection, n, rng):
+    await collection.delete_many({"user_id": USER_ID})
+    now = datetime.utcnow()
+    for start in range(0, n, SEED_BATCH):
+        await collection.insert_many([
+            {
+                "user_id": USER_ID,
+                "date": (START_DATE + timedelta(days=rng.randrange(HISTORY_DAYS))).isoformat(),
+                "amount": round(rng.uniform(1, 500), 2),
+                "category": rng.choice(CATEGORIES),
+                "subcategory": "",
+                "note": "bench",
+                "created_at": now
+            }
+            for _ in range(min(SEED_BATCH, n - start))
+        ], ordered=False)
+
+async def time_pipeline(collection, pipeline, hint, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await collection.aggregate(pipeline, hint=hint).to_list(None)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+async def docs_examined(db, pipeline, hint):
+    from telemetry.slow_queries import summarize_plan
+    result = await db.command({
+        "explain": {"aggregate": "expenses", "pipeline": pipeline, "cursor": {}, "hint": hint},
+        "verbosity": "executionStats"
+    })
+    plan = summarize_plan(result)
+    return plan["docs_examined"], plan["stages"]
+
+async def run(args):
+    from db.client import db, database_name
+    from db.init import setup_collection_hybrid
+    from server.utils.analytics import build_summary_pipeline
+
+    if database_name() == "expense_tracker":
+        raise SystemExit("Refusing to seed the expense_tracker database; set MONGODB_DB")
+
+    await setup_collection_hybrid(force=True)
+    collection = db["expenses"]
+    await collection.create_index([("user_id", 1), ("date", -1)], name=FETCH_INDEX)
+
+    end_date = (START_DATE + timedelta(days=HISTORY_DAYS)).isoformat()
+    start_date = (START_DATE + timedelta(days=HISTORY_DAYS - args.days)).isoformat()
+    rng = random.Random(args.seed)
+
+    try:
+        for size in args.sizes.split(","):
+            n = SIZES.get(size.lower()) or int(size)
+            started = time.perf_counter()
+            await seed(collection, n, rng)
+            print(f"\n[{size}] seeded {n:,} expenses in {time.perf_counter() - started:.1f}s, "
+                  f"summarizing the last {args.days} days")
+
+            cases = [
+                ("fetch", fetch_pipeline(USER_ID, start_date, end_date), FETCH_INDEX),
+                ("covered", build_summary_pipeline(USER_ID, start_date, end_date), "idx_user_date_category_amount"),
+            ]
+            medians = {}
+            for label, pipeline, hint in cases:
+                await time_pipeline(collection, pipeline, hint, 2)  # warm the cache
+                latencies = sorted(await time_pipeline(collection, pipeline, hint, args.iterations))
+                examined, stages = await docs_examined(db, pipeline, hint)
+                medians[label] = statistics.median(latencies)
+                print(f"  {label:<8} p50 {medians[label]:9.2f}ms  p95 {latencies[int(len(latencies) * 0.95) - 1]:9.2f}ms  "
+                      f"docs examined {examined:>9,}  stages {stages}")
+            print(f"  speedup  {medians['fetch'] / medians['covered']:.2f}x")
+    finally:
+        await collection.delete_many({"user_id": USER_ID})
+        await collection.drop_index(FETCH_INDEX)
+
+def main():
+    parser = argparse.ArgumentParser(description="summarize: covered index vs document fetch")
+    parser.add_argument("--sizes", default="10k,100k,1m", help="Comma-separated history sizes: 10k, 100k, 1m or a number")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365, help="Summary window at the end of the history")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Benchmark: every MCP tool against a seeded local mongod
+
+Seeds a benchmark database at each data scale, then calls each tool in
+server/server.py through an in-memory FastMCP client (no HTTP, no LLM),
+so the numbers are tool logic + MongoDB. Group tools run once per group
+size. Results are written as JSON for comparison between builds; with
+--baseline the run exits non-zero if any tool's p50 regressed by more
+than --threshold.
+
+The database is dropped and re-seeded for each scale. It defaults to
+expense_tracker_bench without TLS on localhost and refuses to touch
+expense_tracker.
+
+Usage:
+    python benchmarks/bench_tools.py [--scales 1k,100k,1m] [--group-sizes 3,50,500]
+        [--iterations 50] [--output bench_tools.json] [--baseline old.json --threshold 1.25]
+"""
+
+import os
+import sys
+import pathlib
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+from datetime import date, datetime, timedelta
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+for path in (PROJECT_ROOT, PROJECT_ROOT / "server"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB", "expense_tracker_bench")
+os.environ.setdefault("MONGODB_TLS", "0")
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+CATEGORIES = ["Food", "Travel", "Rent", "Utilities", "Shopping", "Entertainment"]
+SEED_BATCH = 10_000
+START_DATE = date(2024, 1, 1)
+DAYS = 730
+
+# ============================================================================
+# SEEDING
+# ============================================================================
+
+def random_date(rng):
+    return (START_DATE + timedelta(days=rng.randrange(DAYS))).isoformat()
+
+async def insert_batched(collection, docs):
+    """insert_many in SEED_BATCH chunks, a few in flight at once"""
+    batches = [docs[i:i + SEED_BATCH] for i in range(0, len(docs), SEED_BATCH)]
+    for i in range(0, len(batches), 4):
+        await asyncio.gather(*[collection.insert_many(b, ordered=False) for b in batches[i:i + 4]])
+
+async def seed(db, n_expenses, group_sizes, spares, max_participants, rng):
+    """
+    Users, one shared group per size (bench user is admin), and expenses:
+    1% (at least 100) personal expenses for the bench user, the same
+    number per group, the rest spread over other users.
+    """
+    from db.init import setup_collection_hybrid
+
+    for name in ("users", "expenses", "groups", "group_members", "expense_participants", "idempotency_keys"):
+        await db[name].drop()
+    await setup_collection_hybrid(force=True)
+
+    now = datetime.utcnow()
+    n_users = max(max(group_sizes) + spares + 1, n_expenses // 1000)
+    users = [{"email": f"bench{i}@example.com", "password_hash": "x", "full_name": f"Bench {i}",
+              "created_at": now, "updated_at": now} for i in range(n_users)]
+    await insert_batched(db["users"], users)
+    user_ids = [str(u["_id"]) for u in users]
+    bench_user = user_ids[0]
+    spare_users = users[n_users - spares:]
+
+    per_owner = max(100, n_expenses // 100)
+    expenses = [{"user_id": bench_user, "date": random_date(rng), "amount": round(rng.uniform(1, 500), 2),
+                 "category": rng.choice(CATEGORIES), "subcategory": "", "note": "", "created_at": now}
+                for _ in range(per_owner)]
+    await insert_batched(db["expenses"], expenses)
+
+    groups, members, participants = {}, [], []
+    for size in group_sizes:
+        group = {"name": f"Bench group {size}", "description": "", "created_by": bench_user,
+                 "is_active": True, "created_at": now, "updated_at": now}
+        await db["groups"].insert_one(group)
+        group_id = str(group["_id"])
+        member_ids = [bench_user] + user_ids[1:size]
+        members += [{"group_id": group_id, "user_id": uid, "role": "admin" if uid == bench_user else "member",
+                     "is_active": True, "joined_at": now} for uid in member_ids]
+        groups[size] = {"group_id": group_id, "member_ids": member_ids}
+
+        split_ids = member_ids[:max_participants]
+        group_expenses = []
+        for _ in range(per_owner):
+            payer = rng.choice(split_ids)
+            amount = round(rng.uniform(10, 1000), 2)
+            group_expenses.append({
+                "group_id": group_id, "paid_by": payer, "user_id": payer, "amount": amount,
+                "description": "bench", "category": rng.choice(CATEGORIES), "subcategory": "", "note": "",
+                "date": random_date(rng), "split_type": "equal", "created_at": now, "updated_at": now
+            })
+        await insert_batched(db["expenses"], group_expenses)
+        for expense in group_expenses:
+            share = round(expense["amount"] / len(split_ids), 2)
+            participants += [{"expense_id": str(expense["_id"]), "user_id": uid, "share_amount": share,
+                              "created_at": now} for uid in split_ids]
+        groups[size]["expense_id"] = str(group_expenses[0]["_id"])
+    await insert_batched(db["group_members"], members)
+    await insert_batched(db["expense_participants"], participants)
+
+    remaining = n_expenses - per_owner * (1 + len(group_sizes))
+    others = user_ids[1:]
+    for start in range(0, max(0, remaining), SEED_BATCH * 4):
+        chunk = [{"user_id": rng.choice(others), "date": random_date(rng), "amount": round(rng.uniform(1, 500), 2),
+                  "category": rng.choice(CATEGORIES), "subcategory": "", "note": "", "created_at": now}
+                 for _ in range(min(SEED_BATCH * 4, remaining - start))]
+        await insert_batched(db["expenses"], chunk)
+
+    return {"bench_user": bench_user, "groups": groups, "spares": spare_users}
+
+# ============================================================================
+# CASES
+# ============================================================================
+
+class Case:
+    """One tool at one group size; args(i) builds the i-th call's arguments"""
+
+    def __init__(self, tool, args, group_size=None, setup=None, on_result=None):
+        self.tool = tool
+        self.args = args
+        self.group_size = group_size
+        self.setup = setup
+        self.on_result = on_result
+
+    @property
+    def label(self):
+        return f"{self.tool}[{self.group_size}]" if self.group_size else self.tool
+
+def build_cases(db, ctx, calls, rng):
+    user = ctx["bench_user"]
+    year = {"start_date": "2024-01-01", "end_date": "2025-12-31"}
+    month = {"start_date": "2025-06-01", "end_date": "2025-06-30"}
+    created_groups = []
+    to_delete = []
+
+    async def seed_deletable():
+        docs = [{"user_id": user, "date": "2025-01-01", "amount": 1.0, "category": "Food", "created_at": datetime.utcnow()}
+                for _ in range(calls)]
+        await db["expenses"].insert_many(docs)
+        to_delete.extend(str(d["_id"]) for d in docs)
+
+    def remember_group(result):
+        created_groups.append(result["group_id"])
+
+    cases = [
+        Case("add_expense", lambda i: {"user_id": user, "date": random_date(rng), "amount": 12.5,
+                                       "category": "Food", "note": "bench"}),
+        Case("list_expenses", lambda i: {"user_id": user, **month}),
+        Case("summarize", lambda i: {"user_id": user, **year}),
+        Case("delete_expense", lambda i: {"user_id": user, "expense_id": to_delete[i]}, setup=seed_deletable),
+        Case("create_group", lambda i: {"user_id": user, "name": f"Created {i}"}, on_result=remember_group),
+        Case("list_groups", lambda i: {"user_id": user}),
+        Case("delete_group", lambda i: {"user_id": user, "group_id": created_groups[i]}),
+    ]
+
+    for size, group in ctx["groups"].items():
+        group_id = group["group_id"]
+        spares = ctx["spares"]
+        participants = group["member_ids"][:min(size, 50)]
+
+        async def add_spares_for_leave(group_id=group_id):
+            # leave_group needs members to leave; add them directly (untimed)
+            now = datetime.utcnow()
+            await db["group_members"].insert_many([
+                {"group_id": group_id, "user_id": str(u["_id"]), "role": "member", "is_active": True, "joined_at": now}
+                for u in spares[calls:2 * calls]
+            ])
+
+        cases += [
+            Case("get_group_details", lambda i, g=group_id: {"user_id": user, "group_id": g}, size),
+            Case("update_group", lambda i, g=group_id: {"user_id": user, "group_id": g, "description": f"rev {i}"}, size),
+            Case("add_group_member", lambda i, g=group_id: {"user_id": user, "group_id": g,
+                                                             "member_email": spares[i]["email"]}, size),
+            Case("remove_group_member", lambda i, g=group_id: {"user_id": user, "group_id": g,
+                                                                "member_user_id": str(spares[i]["_id"])}, size),
+            Case("leave_group", lambda i, g=group_id: {"user_id": str(spares[calls + i]["_id"]), "group_id": g},
+                 size, setup=add_spares_for_leave),
+            Case("get_group_members", lambda i, g=group_id: {"user_id": user, "group_id": g}, size),
+            Case("add_group_expense", lambda i, g=group_id, p=participants: {
+                "user_id": user, "group_id": g, "amount": 100.0, "description": "bench", "category": "Food",
+                "date": "2025-06-15", "split_type": "equal", "participants": p}, size),
+            Case("list_group_expenses", lambda i, g=group_id: {"user_id": user, "group_id": g, **month}, size),
+            Case("get_expense_details", lambda i, e=group["expense_id"]: {"user_id": user, "expense_id": e}, size),
+            Case("group_analytics", lambda i, g=group_id: {"user_id": user, "group_id": g, **year}, size),
+        ]
+    return cases
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def payload(result):
+    if getattr(result, "structured_content", None):
+        return result.structured_content
+    try:
+        return json.loads(result.content[0].text)
+    except (AttributeError, IndexError, ValueError):
+        return {}
+
+def summarize_latencies(samples):
+    samples = sorted(samples)
+    n = len(samples)
+    pick = lambda p: samples[min(n - 1, int(n * p))] * 1000
+    return {
+        "mean_ms": round(sum(samples) / n * 1000, 3),
+        "p50_ms": round(pick(0.50), 3),
+        "p95_ms": round(pick(0.95), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "min_ms": round(samples[0] * 1000, 3),
+    }
+
+async def run_case(client, case, warmup, iterations):
+    calls = warmup + iterations
+    if case.setup:
+        await case.setup()
+    latencies, errors, first_error = [], 0, None
+    for i in range(calls):
+        start = time.perf_counter()
+        result = await client.call_tool(case.tool, case.args(i), raise_on_error=False)
+        elapsed = time.perf_counter() - start
+        data = payload(result)
+        if getattr(result, "is_error", False) or data.get("status") == "error":
+            errors += 1
+            first_error = first_error or data.get("message") or str(result.content)[:200]
+        elif case.on_result:
+            case.on_result(data)
+        if i >= warmup:
+            latencies.append(elapsed)
+    row = {"tool": case.tool, "group_size": case.group_size, "iterations": iterations, "errors": errors,
+           **summarize_latencies(latencies)}
+    if first_error:
+        row["first_error"] = first_error
+    return row
+
+def compare(results, baseline_path, threshold):
+    """Rows whose p50 grew by more than threshold x the baseline"""
+    with open(baseline_path) as f:
+        baseline = {(r["scale"], r["tool"], r["group_size"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for row in results:
+        old = baseline.get((row["scale"], row["tool"], row["group_size"]))
+        if old and old["p50_ms"] > 0 and row["p50_ms"] / old["p50_ms"] > threshold:
+            regressions.append((row, old))
+    return regressions
+
+async def run(args):
+    from fastmcp import Client
+    from db.client import db, database_name
+    from server import mcp
+
+    DB_NAME = database_name()
+    if DB_NAME == "expense_tracker":
+        raise SystemExit("Refusing to seed the expense_tracker database; set MONGODB_DB")
+
+    group_sizes = [int(s) for s in args.group_sizes.split(",")]
+    calls = args.warmup + args.iterations
+    results = []
+
+    for scale in args.scales.split(","):
+        n_expenses = SCALES.get(scale.lower()) or int(scale)
+        rng = random.Random(args.seed)
+        start = time.perf_counter()
+        ctx = await seed(db, n_expenses, group_sizes, 2 * calls, args.max_participants, rng)
+        print(f"\n[{scale}] seeded {n_expenses:,} expenses in {time.perf_counter() - start:.1f}s")
+
+        async with Client(mcp) as client:
+            for case in build_cases(db, ctx, calls, rng):
+                row = await run_case(client, case, args.warmup, args.iterations)
+                row["scale"] = scale
+                results.append(row)
+                flag = f"  ({row['errors']} errors: {row.get('first_error')})" if row["errors"] else ""
+                print(f"  {case.label:<28} p50 {row['p50_ms']:9.2f}ms  p95 {row['p95_ms']:9.2f}ms  "
+                      f"p99 {row['p99_ms']:9.2f}ms{flag}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "database": DB_NAME,
+            "group_sizes": group_sizes,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        for row, old in regressions:
+            print(f"REGRESSION {row['scale']} {row['tool']}[{row['group_size']}]: "
+                  f"p50 {old['p50_ms']:.2f}ms -> {row['p50_ms']:.2f}ms")
+        if regressions:
+            sys.exit(1)
+        print(f"No p50 regressions beyond {args.threshold}x of {args.baseline}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-tool latency at several data scales")
+    parser.add_argument("--scales", default="1k,100k,1m", help="Comma-separated: 1k, 10k, 100k, 1m or a number")
+    parser.add_argument("--group-sizes", default="3,50,500")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per tool")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--max-participants", type=int, default=50, help="Participants per seeded group expense")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_tools.json")
+    parser.add_argument("--baseline", help="Previous results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Allowed p50 ratio vs baseline")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
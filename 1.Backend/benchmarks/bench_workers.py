@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Benchmark: gateway throughput vs worker count
+
+Starts the gateway with `serve.py --workers N` for each N, drives it from
+several client processes with closed-loop keep-alive connections, and
+reports requests/s, latency and scaling against one worker.
+
+Targets:
+- default   GET /health: the HTTP stack, middleware and routing only;
+            needs no database, MCP server or model
+- --tool    POST /mcp/execute for one tool as a signed-up user; needs a
+            local mongod and the MCP server (run it with workers too, see
+            gunicorn.conf.py) and LLM_PROVIDER=stub so the model is not
+            the bottleneck
+
+Rate limits are switched off for the run. Client processes compete with
+the workers for CPU: on an N-core machine scaling flattens before N
+workers unless the clients run elsewhere. With --url no gateway is
+started; run one count at a time against `serve.py --workers N` on the
+server host and pass the same N as --workers to label the run.
+
+Usage:
+    python benchmarks/bench_workers.py [--workers 1,2,4,8] [--duration 10]
+        [--clients 4] [--connections 32] [--tool list_expenses] [--json workers.json]
+"""
+
+import os
+import sys
+import pathlib
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import subprocess
+import time
+import uuid
+from datetime import date
+
+import httpx
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.loadgen import VirtualUser, create_user, make_args, percentile
+
+GATEWAY_ENV = {
+    "MONGODB_URI": "mongodb://localhost:27017",
+    "MONGODB_TLS": "0",
+    "JWT_SECRET_KEY": "bench-workers-secret",
+    "MCP_SERVER_URL": "http://localhost:8000/mcp",
+    "LLM_PROVIDER": "stub",
+    "LLM_STUB_LATENCY_MS": "0",
+}
+
+RATE_LIMITS_OFF = {
+    "RATE_LIMIT_LLM_USER": "off",
+    "RATE_LIMIT_LLM_GLOBAL": "off",
+    "RATE_LIMIT_DIRECT_USER": "off",
+    "RATE_LIMIT_DIRECT_GLOBAL": "off",
+}
+
+# ============================================================================
+# GATEWAY
+# ============================================================================
+
+def start_gateway(workers: int, port: int) -> subprocess.Popen:
+    env = {**GATEWAY_ENV, **os.environ, **RATE_LIMITS_OFF, "WEB_CONCURRENCY": str(workers)}
+    return subprocess.Popen(
+        [sys.executable, "serve.py", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=PROJECT_ROOT,
+        env=env
+    )
+
+def wait_ready(url: str, workers: int, timeout: float = 60.0) -> None:
+    """Every worker must have started: poll until health answers steadily"""
+    deadline = time.monotonic() + timeout
+    ok = 0
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1.0).status_code == 200:
+                ok += 1
+                if ok >= 20 * max(workers, 1):
+                    return
+                continue
+        except httpx.HTTPError:
+            pass
+        ok = 0
+        time.sleep(0.1)
+    raise RuntimeError(f"Gateway at {url} not ready after {timeout:.0f}s")
+
+def stop_gateway(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+# ============================================================================
+# CLIENTS
+# ============================================================================
+
+async def _drive(url: str, connections: int, duration: float, tool, token, seed: int):
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    cookies = {"Cookie": f"access_token={token}"} if token else {}
+
+    async with httpx.AsyncClient(base_url=url, timeout=30.0, limits=limits, headers=cookies) as client:
+        user = VirtualUser("bench@example.com", token) if tool else None
+        deadline = time.perf_counter() + duration
+
+        async def loop():
+            nonlocal errors
+            today = date.today()
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    if tool:
+                        response = await client.post("/mcp/execute", json={"tool": tool, "args": make_args(tool, user, rng, today)})
+                    else:
+                        response = await client.get("/health")
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*[loop() for _ in range(connections)])
+    return latencies, errors
+
+def client_process(url, connections, duration, tool, token, seed):
+    return asyncio.run(_drive(url, connections, duration, tool, token, seed))
+
+def measure(url: str, clients: int, connections: int, duration: float, tool, token) -> dict:
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        results = pool.starmap(client_process, [
+            (url, connections, duration, tool, token, seed) for seed in range(clients)
+        ])
+    latencies = sorted(s for samples, _ in results for s in samples)
+    errors = sum(e for _, e in results)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+# ============================================================================
+# DRIVER
+# ============================================================================
+
+async def sign_up(url: str) -> str:
+    async with httpx.AsyncClient(base_url=url, timeout=30.0) as client:
+        return (await create_user(client, uuid.uuid4().hex[:8], 0)).token
+
+def run(args):
+    counts = [int(n) for n in args.workers.split(",")]
+    rows = []
+    for workers in counts:
+        url = args.url or f"http://127.0.0.1:{args.port}"
+        process = None if args.url else start_gateway(workers, args.port)
+        try:
+            wait_ready(url, workers)
+            token = asyncio.run(sign_up(url)) if args.tool else None
+            measure(url, args.clients, args.connections, min(2.0, args.duration), args.tool, token)  # warm up
+            row = {"workers": workers, **measure(url, args.clients, args.connections, args.duration, args.tool, token)}
+        finally:
+            if process is not None:
+                stop_gateway(process)
+        base = rows[0]["throughput_rps"] if rows else row["throughput_rps"]
+        row["speedup"] = round(row["throughput_rps"] / base, 2) if base else 0.0
+        row["efficiency"] = round(row["speedup"] / workers, 2) if workers else None
+        rows.append(row)
+        print(f"workers {workers:>3}  {row['throughput_rps']:>10,.1f} req/s  p50 {row['p50_ms']:7.2f}ms  "
+              f"p99 {row['p99_ms']:7.2f}ms  errors {row['errors']:>5}  speedup {row['speedup']:5.2f}x"
+              + (f"  efficiency {row['efficiency']:.0%}" if row["efficiency"] is not None else ""))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cpu_count": os.cpu_count(), "config": vars(args), "runs": rows}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return rows
+
+def main():
+    cores = os.cpu_count() or 1
+    default_workers = ",".join(str(n) for n in sorted({1, 2, 4, 8, cores}) if n <= cores)
+    parser = argparse.ArgumentParser(description="Gateway throughput vs worker count")
+    parser.add_argument("--workers", default=default_workers, help="Comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    parser.add_argument("--clients", type=int, default=max(1, cores // 2), help="Client processes")
+    parser.add_argument("--connections", type=int, default=32, help="Keep-alive connections per client process")
+    parser.add_argument("--tool", help="POST /mcp/execute with this tool instead of GET /health")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--url", help="Benchmark an already running gateway instead")
+    parser.add_argument("--json", help="Write the results to this file")
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
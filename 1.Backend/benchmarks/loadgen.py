@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Load generator: /mcp/execute throughput and tail latency
+
+Signs up synthetic users, logs them in, puts them into shared groups and
+then drives /mcp/execute at a target request rate with a weighted tool
+mix. Arrivals are open-loop (Poisson), so a slow server shows up as
+latency and backlog rather than as a lower offered rate.
+
+Start the stack against a local mongod first, with the stub model if the
+LLM path should run without network:
+
+    MONGODB_URI=mongodb://localhost:27017 MONGODB_TLS=0 python server/server.py
+    MONGODB_URI=mongodb://localhost:27017 MONGODB_TLS=0 MCP_SERVER_URL=http://localhost:8000/mcp \\
+        LLM_PROVIDER=stub LLM_STUB_LATENCY_MS=0 python main.py
+
+Usage:
+    python benchmarks/loadgen.py [--url http://localhost:8001] [--users 20] [--rate 50]
+        [--duration 60] [--mix add_expense=40,list_expenses=25,summarize=15,
+        add_group_expense=10,list_group_expenses=10] [--json results.json]
+"""
+
+import sys
+import pathlib
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+
+import httpx
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+DEFAULT_MIX = "add_expense=40,list_expenses=25,summarize=15,add_group_expense=10,list_group_expenses=10"
+GROUP_TOOLS = {"add_group_expense", "list_group_expenses", "group_analytics", "list_groups", "get_group_details"}
+CATEGORIES = ["Food", "Travel", "Rent", "Utilities", "Shopping", "Entertainment"]
+
+# ============================================================================
+# SYNTHETIC USERS
+# ============================================================================
+
+class VirtualUser:
+    """A logged-in user plus the group they share with others"""
+
+    def __init__(self, email: str, token: str):
+        self.email = email
+        self.token = token
+        self.user_id = jwt_user_id(token)
+        self.group_id = None
+        self.group_member_ids = []
+
+    @property
+    def headers(self):
+        # The auth cookie is Secure; send it explicitly so plain-http runs work
+        return {"Cookie": f"access_token={self.token}"}
+
+def jwt_user_id(token: str) -> str:
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload))["user_id"]
+
+def parse_mix(spec: str) -> dict:
+    """'add_expense=40,summarize=10' -> {tool: weight}"""
+    mix = {}
+    for part in spec.split(","):
+        tool, _, weight = part.strip().partition("=")
+        mix[tool] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError(f"Invalid mix: {spec!r}")
+    return mix
+
+async def create_user(client: httpx.AsyncClient, run_id: str, index: int) -> VirtualUser:
+    email = f"load-{run_id}-{index}@example.com"
+    password = "load-test-password"
+    response = await client.post("/auth/signup", json={"email": email, "password": password, "full_name": f"Load {index}"})
+    response.raise_for_status()
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return VirtualUser(email, response.cookies["access_token"])
+
+async def execute(client: httpx.AsyncClient, user: VirtualUser, tool: str, args: dict, headers=None) -> dict:
+    response = await client.post(
+        "/mcp/execute",
+        json={"tool": tool, "args": args},
+        headers={**user.headers, **(headers or {})}
+    )
+    response.raise_for_status()
+    return response.json()
+
+async def setup_groups(client: httpx.AsyncClient, users: list, group_size: int) -> None:
+    """Split users into groups; the first user of each creates it and adds the rest"""
+    for start in range(0, len(users), group_size):
+        members = users[start:start + group_size]
+        owner = members[0]
+        created = await execute(client, owner, "create_group", {"name": f"Load group {start // group_size}"})
+        group_id = created["group_id"]
+        for member in members[1:]:
+            await execute(client, owner, "add_group_member", {"group_id": group_id, "member_email": member.email})
+        for member in members:
+            member.group_id = group_id
+            member.group_member_ids = [m.user_id for m in members]
+
+# ============================================================================
+# REQUESTS
+# ============================================================================
+
+def make_args(tool: str, user: VirtualUser, rng: random.Random, today: date) -> dict:
+    day = (today - timedelta(days=rng.randrange(90))).isoformat()
+    month_start = (today - timedelta(days=30)).isoformat()
+    amount = round(rng.uniform(1, 200), 2)
+
+    if tool == "add_expense":
+        return {"date": day, "amount": amount, "category": rng.choice(CATEGORIES), "note": "load"}
+    if tool in ("list_expenses", "summarize"):
+        return {"start_date": month_start, "end_date": today.isoformat()}
+    if tool == "add_group_expense":
+        return {
+            "group_id": user.group_id,
+            "amount": amount,
+            "description": "load",
+            "category": rng.choice(CATEGORIES),
+            "date": day,
+            "split_type": "equal",
+            "participants": user.group_member_ids
+        }
+    if tool in ("list_group_expenses", "group_analytics"):
+        return {"group_id": user.group_id, "start_date": month_start, "end_date": today.isoformat()}
+    if tool == "get_group_details":
+        return {"group_id": user.group_id}
+    return {}
+
+class Results:
+    """Latencies and errors per tool"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+
+    def record(self, tool: str, seconds: float, error: str = None):
+        self.latencies[tool].append(seconds)
+        if error:
+            self.errors[tool][error] += 1
+
+    def report(self, elapsed: float) -> dict:
+        tools = {}
+        for tool in sorted(self.latencies):
+            samples = sorted(self.latencies[tool])
+            errors = sum(self.errors[tool].values())
+            tools[tool] = {
+                "requests": len(samples),
+                "errors": errors,
+                "error_types": dict(self.errors[tool]),
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+                "max_ms": round(samples[-1] * 1000, 2),
+            }
+        all_samples = sorted(s for samples in self.latencies.values() for s in samples)
+        total = len(all_samples)
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "errors": sum(t["errors"] for t in tools.values()),
+            "p50_ms": round(percentile(all_samples, 50) * 1000, 2),
+            "p95_ms": round(percentile(all_samples, 95) * 1000, 2),
+            "p99_ms": round(percentile(all_samples, 99) * 1000, 2),
+            "tools": tools,
+        }
+
+def percentile(sorted_samples: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, -(-len(sorted_samples) * pct // 100))
+    return sorted_samples[int(rank) - 1]
+
+async def one_request(client, user, tool, args, results: Results, start: float):
+    """One call; latency counts from the scheduled arrival, including queueing"""
+    headers = {"Idempotency-Key": uuid.uuid4().hex} if tool in ("add_expense", "add_group_expense") else None
+    error = None
+    try:
+        result = await execute(client, user, tool, args, headers)
+        if isinstance(result, dict) and result.get("status") == "error":
+            error = "tool_error"
+    except httpx.HTTPStatusError as e:
+        error = f"http_{e.response.status_code}"
+    except httpx.HTTPError as e:
+        error = type(e).__name__
+    results.record(tool, time.perf_counter() - start, error)
+
+# ============================================================================
+# DRIVER
+# ============================================================================
+
+async def run(args):
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    tools, weights = list(mix), list(mix.values())
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        print(f"Creating {args.users} users...")
+        users = await asyncio.gather(*[create_user(client, run_id, i) for i in range(args.users)])
+        if any(tool in GROUP_TOOLS for tool in tools):
+            print(f"Creating groups of {args.group_size}...")
+            await setup_groups(client, users, args.group_size)
+
+        print(f"Driving {args.rate:g} req/s for {args.duration:g}s (mix: {args.mix})")
+        results = Results()
+        in_flight = set()
+        semaphore = asyncio.Semaphore(args.concurrency)
+        today = date.today()
+
+        async def bounded(user, tool, tool_args):
+            arrived = time.perf_counter()
+            async with semaphore:
+                await one_request(client, user, tool, tool_args, results, arrived)
+
+        start = time.perf_counter()
+        next_at = start
+        while True:
+            next_at += rng.expovariate(args.rate)
+            if next_at - start >= args.duration:
+                break
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            user = rng.choice(users)
+            tool = rng.choices(tools, weights)[0]
+            task = asyncio.ensure_future(bounded(user, tool, make_args(tool, user, rng, today)))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        elapsed = time.perf_counter() - start
+
+    report = results.report(elapsed)
+    report["config"] = {k: v for k, v in vars(args).items() if k != "json"}
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return report
+
+def print_report(report: dict):
+    print(f"\n{report['requests']} requests in {report['elapsed_s']}s "
+          f"({report['throughput_rps']} req/s), {report['errors']} errors")
+    print(f"overall  p50 {report['p50_ms']:.1f}ms  p95 {report['p95_ms']:.1f}ms  p99 {report['p99_ms']:.1f}ms\n")
+    print(f"{'tool':<22}{'n':>7}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for tool, row in report["tools"].items():
+        print(f"{tool:<22}{row['requests']:>7}{row['errors']:>6}{row['p50_ms']:>10.1f}"
+              f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+        for error, count in row["error_types"].items():
+            print(f"    {error}: {count}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive /mcp/execute at a target rate")
+    parser.add_argument("--url", default="http://localhost:8001", help="Gateway base URL")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--group-size", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=50.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load")
+    parser.add_argument("--concurrency", type=int, default=200, help="Max requests in flight")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="tool=weight,... ")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Write the report to this file")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
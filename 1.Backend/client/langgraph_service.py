@@ -1,35 +1,68 @@
 # client/langgraph_service.py - LangGraph MCP Service
 from langgraph.graph import StateGraph, START
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
 from typing import TypedDict, Annotated
 from langchain_core.messages import BaseMessage, HumanMessage
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
 from langchain_mcp_adapters.client import MultiServerMCPClient
 import os
+import sys
 import json
+import time
 import asyncio
+import httpx
+import inspect
+import logging
 from pathlib import Path
 
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from telemetry import record_llm_call, span
+from telemetry.http_client import TracingTransport
+from llm_provider import create_chat_model
+
+logger = logging.getLogger(__name__)
+
 # Load .env from parent directory
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-api_key = os.getenv("GEMINI_API_KEY")
 mcp_server_url = os.getenv("MCP_SERVER_URL", "https://optimistic-brown-antelope.fastmcp.app/mcp")
 
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=api_key,
-    temperature=0.1
-)
+# LLM (LLM_PROVIDER=gemini|stub|record|replay, see llm_provider.py); built on
+# first use so importing this module never constructs a client
+LLM_MODEL = None
+llm = None
+
+def get_chat_model():
+    global LLM_MODEL, llm
+    if llm is None:
+        LLM_MODEL, llm = create_chat_model()
+    return llm
 
 # MCP client - global instance
 _mcp_client = None
 _chatbot = None
 
+# ============================================================================
+# TRACE PROPAGATION TO THE MCP SERVER
+# ============================================================================
+
+# Same defaults as the MCP transports: the server may hold a stream open
+MCP_HTTP_TIMEOUT = httpx.Timeout(30.0, read=300.0)
+
+def traced_http_client_factory(headers=None, timeout=None, auth=None):
+    """MCP HTTP client with an mcp.http span (and traceparent) per request"""
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=timeout or MCP_HTTP_TIMEOUT,
+        auth=auth,
+        transport=TracingTransport(httpx.AsyncHTTPTransport(), span_name="mcp.http")
+    )
+
 # State
 class ChatState(TypedDict):
     messages: Annotated[list[BaseMessage], add_messages]
@@ -46,67 +79,110 @@ async def initialize_client():
         {
             "expense": {
                 "transport": "streamable_http",
-                "url": mcp_server_url
+                "url": mcp_server_url,
+                "httpx_client_factory": traced_http_client_factory
             }
         }
     )
     
     # Get tools from MCP server
     tools = await _mcp_client.get_tools()
-    llm_with_tools = llm.bind_tools(tools)
+    model = get_chat_model()
+    _chatbot = build_chatbot(model, tools, LLM_MODEL)
+    return _chatbot
+
+async def _aclose(resource) -> None:
+    """Await resource.aclose() or close(), whichever it has"""
+    for name in ("aclose", "close"):
+        close = getattr(resource, name, None)
+        if callable(close):
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+            return
+
+async def close_client():
+    """Close and drop the MCP client, graph and chat model (worker shutdown)"""
+    global _mcp_client, _chatbot, LLM_MODEL, llm
+    # A recording model holds the real one as inner
+    for resource in (_mcp_client, llm, getattr(llm, "inner", None)):
+        if resource is None:
+            continue
+        try:
+            await _aclose(resource)
+        except Exception as e:
+            logger.warning("Closing %s failed: %s", type(resource).__name__, e)
+    _mcp_client = None
+    _chatbot = None
+    LLM_MODEL, llm = None, None
+
+def build_chatbot(model, tools, model_name: str = "unknown"):
+    """Compile the chat -> tools -> chat graph around a chat model"""
+    llm_with_tools = model.bind_tools(tools)
     
     # Build graph
     async def chat_node(state: ChatState):
         messages = state["messages"]
-        response = await llm_with_tools.ainvoke(messages)
+        with span("graph.chat_node", {"llm.model": model_name}) as node_span:
+            start = time.perf_counter()
+            response = await llm_with_tools.ainvoke(messages)
+            usage = getattr(response, "usage_metadata", None)
+            record_llm_call(model_name, time.perf_counter() - start, usage)
+            if usage:
+                node_span.set_attribute("llm.input_tokens", usage.get("input_tokens"))
+                node_span.set_attribute("llm.output_tokens", usage.get("output_tokens"))
         return {'messages': [response]}
     
     tool_node = ToolNode(tools)
     
+    async def tools_node(state: ChatState, config):
+        with span("graph.tools"):
+            return await tool_node.ainvoke(state, config)
+    
     graph = StateGraph(ChatState)
     graph.add_node("chat_node", chat_node)
-    graph.add_node("tools", tool_node)
+    graph.add_node("tools", tools_node)
     
     graph.add_edge(START, "chat_node")
     graph.add_conditional_edges("chat_node", tools_condition)
     graph.add_edge("tools", "chat_node")
     
-    _chatbot = graph.compile()
-    return _chatbot
+    return graph.compile()
 
 async def process_tool_call(tool_name: str, args: dict, user_id: str):
     """
     Process a pre-parsed tool call (from Gemini.js) through LangGraph
     This maintains compatibility with existing frontend
     """
-    try:
-        # Initialize chatbot if needed
-        chatbot = await initialize_client()
-        
-        # Inject user_id into args
-        args_with_user = {
-            "user_id": user_id,
-            **args
-        }
-        
-        # Convert to natural language for LLM
-        if tool_name == "add_expense":
-            user_input = f"Add an expense: amount={args.get('amount')}, category={args.get('category')}, date={args.get('date')}"
-            if args.get('subcategory'):
-                user_input += f", subcategory={args.get('subcategory')}"
-            if args.get('note'):
-                user_input += f", note={args.get('note')}"
-        elif tool_name == "list_expenses":
-            user_input = f"List expenses from {args.get('start_date')} to {args.get('end_date')}"
-        elif tool_name == "summarize":
-            user_input = f"Summarize expenses from {args.get('start_date')} to {args.get('end_date')}"
-            if args.get('category'):
-                user_input += f" for category {args.get('category')}"
-        else:
-            user_input = f"Call tool {tool_name} with args: {json.dumps(args)}"
-        
-        # Add user context
-        enhanced_input = f"""User ID: {user_id}
+    with span("process_tool_call", {"tool": tool_name}):
+        return await _process_tool_call(tool_name, args, user_id)
+
+def build_prompt(tool_name: str, args: dict, user_id: str) -> str:
+    """The instruction sent to the model for a pre-parsed tool call"""
+    # Inject user_id into args
+    args_with_user = {
+        "user_id": user_id,
+        **args
+    }
+    
+    # Convert to natural language for LLM
+    if tool_name == "add_expense":
+        user_input = f"Add an expense: amount={args.get('amount')}, category={args.get('category')}, date={args.get('date')}"
+        if args.get('subcategory'):
+            user_input += f", subcategory={args.get('subcategory')}"
+        if args.get('note'):
+            user_input += f", note={args.get('note')}"
+    elif tool_name == "list_expenses":
+        user_input = f"List expenses from {args.get('start_date')} to {args.get('end_date')}"
+    elif tool_name == "summarize":
+        user_input = f"Summarize expenses from {args.get('start_date')} to {args.get('end_date')}"
+        if args.get('category'):
+            user_input += f" for category {args.get('category')}"
+    else:
+        user_input = f"Call tool {tool_name} with args: {json.dumps(args)}"
+    
+    # Add user context
+    enhanced_input = f"""User ID: {user_id}
 Task: {user_input}
 
 CRITICAL: When calling MCP tools, use these EXACT parameters:
@@ -114,6 +190,14 @@ CRITICAL: When calling MCP tools, use these EXACT parameters:
 
 Dates must be in YYYY-MM-DD format (no timestamps).
 """
+    return enhanced_input
+
+async def _process_tool_call(tool_name: str, args: dict, user_id: str):
+    try:
+        # Initialize chatbot if needed
+        chatbot = await initialize_client()
+        
+        enhanced_input = build_prompt(tool_name, args, user_id)
         
         # Run the graph
         result = await chatbot.ainvoke({
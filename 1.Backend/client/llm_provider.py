@@ -0,0 +1,248 @@
+# client/llm_provider.py
+"""
+Chat model providers for the LangGraph service
+
+LLM_PROVIDER selects the model behind chat_node:
+    gemini          ChatGoogleGenerativeAI (default)
+    stub            deterministic tool caller, see stub_llm.py
+    record          Gemini, with every prompt/response pair appended to
+                    LLM_CASSETTE (JSON lines)
+    replay          answers from LLM_CASSETTE, no network
+    pkg.mod:Class   any BaseChatModel subclass
+
+Replay matching
+    Prompts carry values that change from run to run (user and group ids,
+    dates, amounts). Both modes key a call on the conversation with those
+    tokens masked, and replay maps the recorded tokens onto the current
+    ones in the response, so a cassette recorded for one user answers the
+    same request for another. Tool results are keyed by tool name only;
+    their contents come from the database and never match exactly.
+
+    LLM_REPLAY_LATENCY_MS   fixed delay per call, or "recorded" to sleep
+                            for the latency captured at record time
+                            (default 0)
+    LLM_REPLAY_MISS         "error" (default) or "stub" to fall back to the
+                            stub model for prompts not in the cassette
+"""
+
+import asyncio
+import hashlib
+import importlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from stub_llm import StubChatModel, stub_model_from_env
+
+GEMINI_MODEL = "gemini-2.5-flash"
+DEFAULT_CASSETTE = "llm_cassette.jsonl"
+
+# ObjectIds, uuids / hex ids, ISO dates, decimal numbers
+_VOLATILE = re.compile(
+    r"\b[0-9a-f]{24}\b|\b[0-9a-f]{32}\b|\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"
+    r"|\b\d{4}-\d{2}-\d{2}\b|(?<![\w.])\d+\.\d+\b"
+)
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded response for a prompt"""
+
+# ============================================================================
+# PROMPT KEYS
+# ============================================================================
+
+def mask(text: str) -> Tuple[str, List[str]]:
+    """Text with volatile tokens replaced by placeholders, plus the tokens"""
+    tokens = []
+
+    def replace(match):
+        tokens.append(match.group(0))
+        return f"<{len(tokens) - 1}>"
+
+    return _VOLATILE.sub(replace, text), tokens
+
+def _content(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else json.dumps(message.content, sort_keys=True)
+
+def conversation_key(messages: List[BaseMessage]) -> Tuple[str, List[str]]:
+    """Stable key for a conversation and the volatile tokens it contained"""
+    parts, tokens = [], []
+    for message in messages:
+        if isinstance(message, ToolMessage):
+            parts.append(["tool", message.name])
+            continue
+        text = _content(message)
+        if isinstance(message, AIMessage) and message.tool_calls:
+            text += json.dumps([[c["name"], c["args"]] for c in message.tool_calls], sort_keys=True)
+        masked, found = mask(text)
+        # Placeholders are numbered per conversation, not per message
+        masked = re.sub(r"<(\d+)>", lambda m: f"<{int(m.group(1)) + len(tokens)}>", masked)
+        tokens.extend(found)
+        parts.append([message.type, masked])
+    key = hashlib.sha1(json.dumps(parts, separators=(",", ":")).encode("utf-8")).hexdigest()
+    return key, tokens
+
+def substitute(value: Any, mapping: Dict[str, str]) -> Any:
+    """Replace recorded volatile tokens with the current ones"""
+    if not mapping:
+        return value
+    if isinstance(value, str):
+        return _VOLATILE.sub(lambda m: mapping.get(m.group(0), m.group(0)), value)
+    if isinstance(value, dict):
+        return {k: substitute(v, mapping) for k, v in value.items()}
+    if isinstance(value, list):
+        return [substitute(v, mapping) for v in value]
+    if isinstance(value, float) and repr(value) in mapping:
+        return float(mapping[repr(value)])
+    return value
+
+def _result(message: AIMessage) -> ChatResult:
+    return ChatResult(generations=[ChatGeneration(message=message)])
+
+# ============================================================================
+# RECORD
+# ============================================================================
+
+class RecordingChatModel(BaseChatModel):
+    """Wraps a real model and appends each call to a cassette"""
+
+    inner: Any
+    bound: Any = None
+    path: str = DEFAULT_CASSETTE
+
+    @property
+    def _llm_type(self) -> str:
+        return "record"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"bound": self.inner.bind_tools(tools, **kwargs)})
+
+    def _write(self, messages, response: AIMessage, latency_ms: float) -> None:
+        key, tokens = conversation_key(messages)
+        line = json.dumps({
+            "key": key,
+            "tokens": tokens,
+            "latency_ms": round(latency_ms, 3),
+            "response": message_to_dict(response),
+        }, default=str, separators=(",", ":"))
+        with _write_lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        start = time.perf_counter()
+        response = (self.bound or self.inner).invoke(messages)
+        self._write(messages, response, (time.perf_counter() - start) * 1000)
+        return _result(response)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        start = time.perf_counter()
+        response = await (self.bound or self.inner).ainvoke(messages)
+        self._write(messages, response, (time.perf_counter() - start) * 1000)
+        return _result(response)
+
+_write_lock = threading.Lock()
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+def load_cassette(path: str) -> Dict[str, Dict]:
+    """key -> first recorded entry"""
+    entries: Dict[str, Dict] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries.setdefault(entry["key"], entry)
+    return entries
+
+class ReplayChatModel(BaseChatModel):
+    """Serves recorded responses; deterministic for a given cassette"""
+
+    entries: Dict[str, Dict]
+    latency_ms: Optional[float] = 0.0  # None: use the recorded latency
+    fallback: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, **kwargs):
+        if self.fallback is None:
+            return self
+        return self.model_copy(update={"fallback": self.fallback.bind_tools(tools, **kwargs)})
+
+    def _lookup(self, messages) -> Tuple[Optional[AIMessage], float]:
+        key, tokens = conversation_key(messages)
+        entry = self.entries.get(key)
+        if entry is None:
+            if self.fallback is None:
+                raise CassetteMiss(f"No recorded response for prompt key {key}")
+            return None, self.latency_ms or 0.0
+
+        mapping = {old: new for old, new in zip(entry["tokens"], tokens) if old != new}
+        data = entry["response"]
+        data = {**data, "data": substitute(data["data"], mapping)}
+        message = messages_from_dict([data])[0]
+        delay = entry["latency_ms"] if self.latency_ms is None else self.latency_ms
+        return message, delay
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message, delay = self._lookup(messages)
+        if delay:
+            time.sleep(delay / 1000)
+        if message is None:
+            return _result(self.fallback.invoke(messages))
+        return _result(message)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message, delay = self._lookup(messages)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if message is None:
+            return _result(await self.fallback.ainvoke(messages))
+        return _result(message)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+def _gemini():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=GEMINI_MODEL,
+        google_api_key=os.getenv("GEMINI_API_KEY"),
+        temperature=0.1
+    )
+
+def create_chat_model(provider: Optional[str] = None) -> Tuple[str, BaseChatModel]:
+    """(model label for metrics/spans, chat model) for LLM_PROVIDER"""
+    provider = (provider or os.getenv("LLM_PROVIDER", "gemini")).strip()
+    cassette = os.getenv("LLM_CASSETTE", DEFAULT_CASSETTE)
+
+    if provider == "gemini":
+        return GEMINI_MODEL, _gemini()
+    if provider == "stub":
+        return "stub", stub_model_from_env()
+    if provider == "record":
+        return GEMINI_MODEL, RecordingChatModel(inner=_gemini(), path=cassette)
+    if provider == "replay":
+        latency = os.getenv("LLM_REPLAY_LATENCY_MS", "0")
+        fallback = StubChatModel() if os.getenv("LLM_REPLAY_MISS", "error") == "stub" else None
+        return "replay", ReplayChatModel(
+            entries=load_cassette(cassette),
+            latency_ms=None if latency == "recorded" else float(latency),
+            fallback=fallback
+        )
+
+    module_name, _, class_name = provider.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown LLM_PROVIDER: {provider!r}")
+    return class_name, getattr(importlib.import_module(module_name), class_name)()
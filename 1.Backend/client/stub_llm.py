@@ -0,0 +1,113 @@
+# client/stub_llm.py
+"""
+Deterministic stand-in for the Gemini model (LLM_PROVIDER=stub)
+
+The gateway already knows which tool to call; the prompt built by
+process_tool_call carries the tool and its exact arguments. The stub reads
+them back out and answers with that tool call, then echoes the tool result
+as its final answer, so the graph runs the same two chat_node turns as
+with Gemini but without the network.
+
+LLM_STUB_LATENCY_MS adds a fixed delay per model call to approximate a
+real provider in load tests.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Task line -> tool name, mirroring the phrasing in _process_tool_call
+_TASK_PATTERNS = [
+    (re.compile(r"^Task: Add an expense"), "add_expense"),
+    (re.compile(r"^Task: List expenses"), "list_expenses"),
+    (re.compile(r"^Task: Summarize expenses"), "summarize"),
+    (re.compile(r"^Task: Call tool (\w+)"), None),
+]
+
+_PARAMETERS_MARKER = "EXACT parameters:"
+
+def parse_tool_request(prompt: str) -> Optional[tuple]:
+    """(tool_name, args) from a process_tool_call prompt, or None"""
+    tool_name = None
+    for line in prompt.splitlines():
+        for pattern, name in _TASK_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                tool_name = name or match.group(1)
+                break
+        if tool_name:
+            break
+
+    start = prompt.find(_PARAMETERS_MARKER)
+    if tool_name is None or start < 0:
+        return None
+    body = prompt[start + len(_PARAMETERS_MARKER):].lstrip()
+    try:
+        args, _ = json.JSONDecoder().raw_decode(body)
+    except json.JSONDecodeError:
+        return None
+    return tool_name, args
+
+def _usage(text: str, output: str) -> dict:
+    # ~4 characters per token, enough for the token metrics to move
+    input_tokens = len(text) // 4
+    output_tokens = len(output) // 4
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens
+    }
+
+class StubChatModel(BaseChatModel):
+    """Tool-calling chat model that never leaves the process"""
+
+    latency_ms: float = 0.0
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools, **kwargs):
+        names = [getattr(tool, "name", None) or tool["name"] for tool in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            content = last.content if isinstance(last.content, str) else json.dumps(last.content)
+            return AIMessage(content=content, usage_metadata=_usage(content, content))
+
+        prompt = last.content if isinstance(last.content, str) else str(last.content)
+        request = parse_tool_request(prompt)
+        if request is None or (self.tool_names and request[0] not in self.tool_names):
+            text = "I could not determine which tool to call."
+            return AIMessage(content=text, usage_metadata=_usage(prompt, text))
+
+        tool_name, args = request
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": tool_name, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}"}],
+            usage_metadata=_usage(prompt, json.dumps(args))
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+def stub_model_from_env() -> StubChatModel:
+    return StubChatModel(latency_ms=float(os.getenv("LLM_STUB_LATENCY_MS", "0")))
@@ -1,57 +1,291 @@
 # db/client.py - MongoDB client and collection setup
 # Phase 1: Added new collections for expense sharing functionality
+"""
+Lazily connected MongoDB access.
 
+Importing this module reads no settings and opens no connections. The
+Motor client is built on first use, one per event loop (a Motor client
+is bound to the loop it first ran on, so tests and tools that create
+their own loops each get their own). The module-level names
+(`db`, `expenses_col`, ...) are thin proxies that resolve on every
+attribute access, so `from db.client import expenses_col` stays cheap.
+
+    await connect()        # build the client for this loop and ping it
+    close()                # close every client (shutdown, end of tests)
+    configure(uri=..., db_name=..., tls=False)   # explicit settings
+    with use_database(other_db): ...            # test / bench backend
+
+Settings default to MONGODB_URI, MONGODB_DB (expense_tracker) and
+MONGODB_TLS (on), read when the first client is built.
+
+Clients are never shared across processes: a forked worker (gunicorn,
+uvicorn --workers) forgets any client its parent built and builds its
+own on first use.
+"""
+
+import asyncio
 import os
-import certifi
-import ssl
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-
-load_dotenv()
-
-MONGO_URI = os.getenv("MONGODB_URI")
-if not MONGO_URI:
-    raise ValueError("Missing MONGODB_URI environment variable")
-
-# Create SSL context with proper certificate verification
-ssl_context = ssl.create_default_context(cafile=certifi.where())
-ssl_context.check_hostname = True
-ssl_context.verify_mode = ssl.CERT_REQUIRED
-
-# Configure connection with SSL certificate and proper pooling
-client = AsyncIOMotorClient(
-    MONGO_URI,
-    tls=True,
-    tlsCAFile=certifi.where(),
-    tlsAllowInvalidCertificates=False,
-    tlsAllowInvalidHostnames=False,
-    maxPoolSize=10,
-    minPoolSize=1,
-    serverSelectionTimeoutMS=30000,
-    connectTimeoutMS=30000,
-)
+
+# ============================================================================
+# SETTINGS
+# ============================================================================
+
+_settings: Dict[str, Any] = {}
+_override = None
+_lock = threading.Lock()
+_handles: Dict[Any, "_Handle"] = {}  # loop -> _Handle; closed loops pruned on the next build
+_sync_handle = None  # used outside a running loop
+_slow_query_monitor = None  # one per process (SLOW_QUERY_MS), shared by every client
+
+def configure(uri: Optional[str] = None, db_name: Optional[str] = None, tls: Optional[bool] = None, **client_options) -> None:
+    """Override environment settings; closes clients built with the old ones"""
+    close()
+    for key, value in (("uri", uri), ("db_name", db_name), ("tls", tls)):
+        if value is not None:
+            _settings[key] = value
+    _settings.setdefault("client_options", {}).update(client_options)
+
+def _setting(key: str):
+    if key in _settings:
+        return _settings[key]
+    load_dotenv()
+    if key == "uri":
+        uri = os.getenv("MONGODB_URI")
+        if not uri:
+            raise ValueError("Missing MONGODB_URI environment variable")
+        return uri
+    if key == "db_name":
+        return os.getenv("MONGODB_DB", "expense_tracker")
+    if key == "tls":
+        return os.getenv("MONGODB_TLS", "1").lower() not in ("0", "false", "no")
+    return None
+
+def database_name() -> str:
+    return _setting("db_name")
+
+def tls_options() -> Dict[str, Any]:
+    """Certificate-verified TLS unless disabled (local mongod)"""
+    if not _setting("tls"):
+        return {}
+    import certifi
+    return dict(
+        tls=True,
+        tlsCAFile=certifi.where(),
+        tlsAllowInvalidCertificates=False,
+        tlsAllowInvalidHostnames=False,
+    )
+
+# ============================================================================
+# CLIENTS
+# ============================================================================
+
+def _explain_client():
+    from pymongo import MongoClient
+    return MongoClient(_setting("uri"), maxPoolSize=1, serverSelectionTimeoutMS=30000, **tls_options())
+
+def _slow_query_listener():
+    """Slow-query log (SLOW_QUERY_MS); explains run on a separate 1-connection client"""
+    global _slow_query_monitor
+    if _slow_query_monitor is None:
+        from telemetry import slow_query_monitor_from_env
+        _slow_query_monitor = slow_query_monitor_from_env(_explain_client)
+    return _slow_query_monitor
+
+def _build_client():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from telemetry import command_listener
+
+    uri = _setting("uri")
+    tls = tls_options()
+
+    slow_query_monitor = _slow_query_listener()
+    event_listeners = [command_listener] + ([slow_query_monitor] if slow_query_monitor else [])
+
+    # Configure connection with SSL certificate and proper pooling
+    options = dict(
+        maxPoolSize=10,
+        minPoolSize=1,
+        serverSelectionTimeoutMS=30000,
+        connectTimeoutMS=30000,
+        event_listeners=event_listeners,
+    )
+    options.update(_settings.get("client_options", {}))
+    return AsyncIOMotorClient(uri, **tls, **options)
+
+class _Handle:
+    """A client with its database and collection objects"""
+
+    def __init__(self, client, database):
+        self.client = client
+        self.database = database
+        self.collections: Dict[str, Any] = {}
+
+    def collection(self, name: str):
+        collection = self.collections.get(name)
+        if collection is None:
+            collection = self.collections[name] = self.database[name]
+        return collection
+
+def _handle() -> _Handle:
+    global _sync_handle
+    if _override is not None:
+        return _override
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    with _lock:
+        handle = _sync_handle if loop is None else _handles.get(loop)
+        if handle is None:
+            _prune_closed_loops()
+            client = _build_client()
+            handle = _Handle(client, client[database_name()])
+            if loop is None:
+                _sync_handle = handle
+            else:
+                _handles[loop] = handle
+        return handle
+
+def _prune_closed_loops() -> None:
+    """Close clients of loops that have finished (repeated asyncio.run)
+
+    A client references its loop, so entries never go away by themselves.
+    """
+    for loop in [loop for loop in _handles if loop.is_closed()]:
+        _handles.pop(loop).client.close()
+
+def get_client():
+    """Motor client for the running event loop (built on first use)"""
+    return _handle().client
+
+def get_db():
+    """Database for the running event loop, or the override if one is set"""
+    return _handle().database
+
+def get_collection(name: str):
+    return _handle().collection(name)
+
+async def connect():
+    """Build the client for this loop and check the server is reachable"""
+    database = get_db()
+    await database.command("ping")
+    return database
+
+def _forget_clients() -> None:
+    """After fork: drop the parent's clients without closing them
+
+    Their sockets and monitor threads belong to the parent; closing them
+    here would close the parent's connections.
+    """
+    global _lock, _sync_handle, _slow_query_monitor
+    _lock = threading.Lock()  # may have been held by another thread at fork
+    _handles.clear()
+    _sync_handle = None
+    _slow_query_monitor = None  # its explain thread stayed in the parent
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_clients)
+
+def close() -> None:
+    """Close all clients and the slow-query explain client; the next use builds new ones"""
+    global _sync_handle
+    with _lock:
+        handles = list(_handles.values()) + ([_sync_handle] if _sync_handle else [])
+        _handles.clear()
+        _sync_handle = None
+    for handle in handles:
+        handle.client.close()
+    if _slow_query_monitor is not None:
+        _slow_query_monitor.close()
+
+@contextmanager
+def use_database(database):
+    """Route every proxy to another database (tests, benchmarks)
+
+    `database` is any Motor/PyMongo-style database object; `client`
+    resolves to its `.client`.
+    """
+    global _override
+    previous = _override
+    _override = _Handle(getattr(database, "client", None), database)
+    try:
+        yield database
+    finally:
+        _override = previous
+
+# ============================================================================
+# PROXIES
+# ============================================================================
+
+class _LazyDatabase:
+    """Forwards to get_db() on each use"""
+
+    def __getattr__(self, attr):
+        return getattr(get_db(), attr)
+
+    def __getitem__(self, name):
+        return get_collection(name)
+
+    def __repr__(self):
+        return "<lazy database>"
+
+class _LazyCollection:
+    """Forwards to the named collection of get_db() on each use"""
+
+    __slots__ = ("_name",)
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_collection(self._name), attr)
+
+    def __getitem__(self, key):
+        return get_collection(self._name)[key]
+
+    def __repr__(self):
+        return f"<lazy collection {self._name}>"
+
+class _LazyClient:
+    def __getattr__(self, attr):
+        return getattr(get_client(), attr)
+
+client = _LazyClient()
 
 # Database reference
-db = client["expense_tracker"]
+db = _LazyDatabase()
 
 # ============================================================================
 # EXISTING COLLECTIONS (maintained for backward compatibility)
 # ============================================================================
 
-expenses_col = db["expenses"]
-users_col = db["users"]
+expenses_col = _LazyCollection("expenses")
+users_col = _LazyCollection("users")
 
 # ============================================================================
 # NEW COLLECTIONS (Phase 1: Expense Sharing)
 # ============================================================================
 
 # Group management
-groups_col = db["groups"]
-group_members_col = db["group_members"]
+groups_col = _LazyCollection("groups")
+group_members_col = _LazyCollection("group_members")
 
 # Split tracking
-expense_participants_col = db["expense_participants"]
+expense_participants_col = _LazyCollection("expense_participants")
 
 # Balance tracking
-balances_col = db["balances"]
-settlements_col = db["settlements"]
+balances_col = _LazyCollection("balances")
+settlements_col = _LazyCollection("settlements")
+
+# ============================================================================
+# REQUEST DEDUPLICATION
+# ============================================================================
+
+# Idempotency keys for expense-creating tools (TTL-expired)
+idempotency_keys_col = _LazyCollection("idempotency_keys")
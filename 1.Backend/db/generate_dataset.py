@@ -0,0 +1,363 @@
+# db/generate_dataset.py
+"""
+Synthetic dataset generator for scale testing
+
+Bulk-loads a reproducible dataset into a local mongod:
+1. Users (all with the same password, so the load generator can log in)
+2. A "Personal" group and admin membership per user, as created by
+   phase1_migration.py
+3. Shared groups with skewed (truncated Pareto) sizes and their members
+4. Expenses: personal ones in the owner's Personal group
+   (split_type='none'), group ones split equally with
+   expense_participants rows, as add_group_expense writes them
+
+Users, groups and memberships are planned in the parent process.
+Expenses are generated in fixed-size chunks by worker processes, each
+with its own client and insert_many(ordered=False) batches. Every chunk
+has its own seed and ObjectIds are derived from (kind, chunk, counter),
+so the same arguments always produce the same documents, whatever the
+worker count.
+
+Indexes are built after the load (db/init.py), which is much faster
+than maintaining them during inserts.
+
+Usage:
+    python db/generate_dataset.py --expenses 10000000 --users 100000 --drop
+    python db/generate_dataset.py --expenses 1000000 --group-size-alpha 1.2 --max-group-size 500
+"""
+
+import sys
+import pathlib
+import argparse
+import asyncio
+import logging
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+
+# Add parent directory to path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ["Food", "Travel", "Rent", "Utilities", "Shopping", "Entertainment", "Health", "Education"]
+SUBCATEGORIES = ["", "", "", "Groceries", "Dining", "Fuel", "Online"]
+DEFAULT_PASSWORD = "password123"
+
+# ObjectId layout: 4-byte timestamp | 1-byte kind | 3-byte chunk | 4-byte counter
+ID_EPOCH = 1_700_000_000
+KIND_USER, KIND_GROUP, KIND_MEMBER, KIND_EXPENSE, KIND_PARTICIPANT = range(1, 6)
+PLAN_CHUNK = 0xFFFFFF  # chunk number reserved for parent-process documents
+
+# ============================================================================
+# IDS AND DISTRIBUTIONS
+# ============================================================================
+
+def id_prefix(kind: int, chunk: int) -> bytes:
+    return struct.pack(">IB", ID_EPOCH, kind) + chunk.to_bytes(3, "big")
+
+def make_id(kind: int, chunk: int, counter: int) -> ObjectId:
+    """Deterministic, unique ObjectId"""
+    return ObjectId(id_prefix(kind, chunk) + counter.to_bytes(4, "big"))
+
+def group_sizes(rng: np.random.Generator, n_groups: int, alpha: float, min_size: int, max_size: int) -> np.ndarray:
+    """Truncated Pareto: most groups small, a long tail of large ones"""
+    u = rng.random(n_groups)
+    sizes = np.floor(min_size * (1 - u) ** (-1 / alpha)).astype(np.int64)
+    return np.clip(sizes, min_size, max_size)
+
+def activity_weights(rng: np.random.Generator, n: int, alpha: float) -> np.ndarray:
+    """Pareto activity per user/group; normalized cumulative weights"""
+    weights = rng.pareto(alpha, n) + 1
+    cumulative = np.cumsum(weights)
+    return cumulative / cumulative[-1]
+
+# ============================================================================
+# PLAN (parent process)
+# ============================================================================
+
+class Plan:
+    """Users, groups and memberships; everything expense chunks need"""
+
+    def __init__(self, args):
+        rng = np.random.default_rng(args.seed)
+        self.args = args
+        now = datetime(2025, 1, 1)
+
+        self.user_ids = [str(make_id(KIND_USER, PLAN_CHUNK, i)) for i in range(args.users)]
+        self.personal_group_ids = [str(make_id(KIND_GROUP, PLAN_CHUNK, i)) for i in range(args.users)]
+
+        n_shared = args.groups if args.groups is not None else max(1, args.users // 10)
+        max_size = min(args.max_group_size, args.users)
+        sizes = group_sizes(rng, n_shared, args.group_size_alpha, min(args.min_group_size, max_size), max_size)
+        self.group_ids = [str(make_id(KIND_GROUP, PLAN_CHUNK, args.users + i)) for i in range(n_shared)]
+        self.group_members = [
+            rng.choice(args.users, size=int(size), replace=False).astype(np.int32) for size in sizes
+        ]
+
+        self.user_weights = activity_weights(rng, args.users, args.activity_alpha)
+        # Bigger groups record more expenses
+        self.group_weights = np.cumsum(sizes.astype(np.float64))
+        self.group_weights /= self.group_weights[-1]
+
+        self.now = now
+        self.sizes = sizes
+        self._member_ids = None
+
+    @property
+    def member_ids(self):
+        """Per shared group, member user ids as strings (built lazily in each worker)"""
+        if self._member_ids is None:
+            self._member_ids = [[self.user_ids[m] for m in members.tolist()] for members in self.group_members]
+        return self._member_ids
+
+    def users(self, password_hash: str):
+        for i, user_id in enumerate(self.user_ids):
+            yield {
+                "_id": ObjectId(user_id),
+                "email": f"user{i}@example.com",
+                "password_hash": password_hash,
+                "full_name": f"User {i}",
+                "created_at": self.now,
+                "updated_at": self.now
+            }
+
+    def groups(self):
+        for i, group_id in enumerate(self.personal_group_ids):
+            yield {
+                "_id": ObjectId(group_id),
+                "name": "Personal",
+                "description": "Personal expenses (auto-created during migration)",
+                "created_by": self.user_ids[i],
+                "is_active": True,
+                "group_type": "personal",
+                "created_at": self.now,
+                "updated_at": self.now
+            }
+        for i, group_id in enumerate(self.group_ids):
+            yield {
+                "_id": ObjectId(group_id),
+                "name": f"Group {i}",
+                "description": f"{len(self.group_members[i])} members",
+                "created_by": self.user_ids[self.group_members[i][0]],
+                "is_active": True,
+                "created_at": self.now,
+                "updated_at": self.now
+            }
+
+    def memberships(self):
+        counter = 0
+        for i, group_id in enumerate(self.personal_group_ids):
+            yield {"_id": make_id(KIND_MEMBER, PLAN_CHUNK, counter), "group_id": group_id,
+                   "user_id": self.user_ids[i], "role": "admin", "is_active": True, "joined_at": self.now}
+            counter += 1
+        for group_id, members in zip(self.group_ids, self.group_members):
+            for position, member in enumerate(members.tolist()):
+                yield {"_id": make_id(KIND_MEMBER, PLAN_CHUNK, counter), "group_id": group_id,
+                       "user_id": self.user_ids[member], "role": "admin" if position == 0 else "member",
+                       "is_active": True, "joined_at": self.now}
+                counter += 1
+
+# ============================================================================
+# EXPENSE CHUNKS (worker processes)
+# ============================================================================
+
+def generate_chunk(plan: Plan, chunk: int, n: int):
+    """(expenses, participants) for one chunk; deterministic per (seed, chunk)"""
+    args = plan.args
+    rng = np.random.default_rng([args.seed, chunk])
+
+    end = date.fromisoformat(args.end_date)
+    days = [end - timedelta(days=d) for d in range(args.days)]
+    day_strings = [d.isoformat() for d in days]
+    day_times = [datetime(d.year, d.month, d.day, 12) for d in days]
+
+    is_group = (rng.random(n) < args.group_ratio).tolist() if plan.group_ids else [False] * n
+    owners = np.searchsorted(plan.user_weights, rng.random(n)).tolist()
+    groups = np.searchsorted(plan.group_weights, rng.random(n)).tolist()
+    offsets = rng.integers(0, 1 << 30, n).tolist()
+    day_index = rng.integers(0, args.days, n).tolist()
+    amounts = np.round(rng.lognormal(args.amount_mu, args.amount_sigma, n), 2).tolist()
+    categories = rng.integers(0, len(CATEGORIES), n).tolist()
+    subcategories = rng.integers(0, len(SUBCATEGORIES), n).tolist()
+
+    expense_prefix = id_prefix(KIND_EXPENSE, chunk)
+    participant_prefix = id_prefix(KIND_PARTICIPANT, chunk)
+    member_ids = plan.member_ids
+
+    expenses, participants = [], []
+    participant_counter = 0
+    for i in range(n):
+        expense_id = ObjectId(expense_prefix + i.to_bytes(4, "big"))
+        day = day_index[i]
+        amount = max(amounts[i], 0.01)
+        doc = {
+            "_id": expense_id,
+            "date": day_strings[day],
+            "amount": amount,
+            "category": CATEGORIES[categories[i]],
+            "subcategory": SUBCATEGORIES[subcategories[i]],
+            "note": "",
+            "created_at": day_times[day],
+            "updated_at": day_times[day],
+        }
+
+        if is_group[i]:
+            group = groups[i]
+            members = member_ids[group]
+            k = min(len(members), args.max_participants)
+            # A window of the (randomly ordered) member list, wrapping around
+            start = offsets[i] % len(members)
+            split = members[start:start + k]
+            if len(split) < k:
+                split = split + members[:k - len(split)]
+            payer = split[0]
+            share = round(amount / k, 2)
+            doc.update({
+                "group_id": plan.group_ids[group],
+                "paid_by": payer,
+                "user_id": payer,
+                "description": f"{doc['category']} expense",
+                "split_type": "equal",
+            })
+            expense_key = str(expense_id)
+            for user_id in split:
+                participants.append({
+                    "_id": ObjectId(participant_prefix + participant_counter.to_bytes(4, "big")),
+                    "expense_id": expense_key,
+                    "user_id": user_id,
+                    "share_amount": share,
+                    "created_at": day_times[day]
+                })
+                participant_counter += 1
+        else:
+            owner = owners[i]
+            doc.update({
+                "user_id": plan.user_ids[owner],
+                "group_id": plan.personal_group_ids[owner],
+                "paid_by": plan.user_ids[owner],
+                "split_type": "none",
+            })
+        expenses.append(doc)
+
+    return expenses, participants
+
+_worker_plan = None
+_worker_db = None
+
+def _init_worker(plan: Plan):
+    global _worker_plan, _worker_db
+    from pymongo import MongoClient
+    _worker_plan = plan
+    _worker_db = MongoClient(plan.args.uri, w=plan.args.write_concern)[plan.args.db]
+
+def insert_batched(collection, docs, batch_size: int) -> None:
+    for start in range(0, len(docs), batch_size):
+        collection.insert_many(docs[start:start + batch_size], ordered=False, bypass_document_validation=True)
+
+def _load_chunk(job):
+    chunk, n = job
+    expenses, participants = generate_chunk(_worker_plan, chunk, n)
+    batch_size = _worker_plan.args.batch_size
+    insert_batched(_worker_db["expenses"], expenses, batch_size)
+    insert_batched(_worker_db["expense_participants"], participants, batch_size)
+    return len(expenses), len(participants)
+
+# ============================================================================
+# LOAD
+# ============================================================================
+
+COLLECTIONS = ["users", "groups", "group_members", "expenses", "expense_participants"]
+
+def load(args):
+    from pymongo import MongoClient
+    import bcrypt
+
+    db = MongoClient(args.uri, w=args.write_concern)[args.db]
+    if args.drop:
+        if args.db == "expense_tracker":
+            raise SystemExit("Refusing to drop expense_tracker; pass --db")
+        for name in COLLECTIONS:
+            db[name].drop()
+
+    started = time.perf_counter()
+    plan = Plan(args)
+    password_hash = bcrypt.hashpw(DEFAULT_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+    insert_batched(db["users"], list(plan.users(password_hash)), args.batch_size)
+    insert_batched(db["groups"], list(plan.groups()), args.batch_size)
+    members = list(plan.memberships())
+    insert_batched(db["group_members"], members, args.batch_size)
+    logger.info(f"Users: {len(plan.user_ids):,}  shared groups: {len(plan.group_ids):,} "
+                f"(largest {int(plan.sizes.max()) if len(plan.sizes) else 0})  memberships: {len(members):,}")
+
+    jobs = [(chunk, min(args.chunk_size, args.expenses - start))
+            for chunk, start in enumerate(range(0, args.expenses, args.chunk_size))]
+    n_expenses = n_participants = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(plan,)) as pool:
+        for expenses, participants in pool.map(_load_chunk, jobs):
+            n_expenses += expenses
+            n_participants += participants
+            elapsed = time.perf_counter() - started
+            logger.info(f"Expenses {n_expenses:,}/{args.expenses:,}  participants {n_participants:,}  "
+                        f"({(n_expenses + n_participants) / elapsed:,.0f} docs/s)")
+
+    load_seconds = time.perf_counter() - started
+    total = len(plan.user_ids) + len(plan.group_ids) + len(plan.personal_group_ids) + len(members) + n_expenses + n_participants
+    logger.info(f"Loaded {total:,} documents in {load_seconds:.1f}s ({total / load_seconds:,.0f} docs/s)")
+
+    if not args.skip_indexes:
+        os.environ["MONGODB_URI"] = args.uri
+        os.environ["MONGODB_DB"] = args.db
+        os.environ.setdefault("MONGODB_TLS", "0")  # local mongod unless told otherwise
+        from db.init import setup_collection_hybrid
+        index_start = time.perf_counter()
+        asyncio.run(setup_collection_hybrid(force=True))
+        logger.info(f"Indexes built in {time.perf_counter() - index_start:.1f}s")
+
+    return {"documents": total, "expenses": n_expenses, "participants": n_participants, "seconds": load_seconds}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic expense dataset")
+    parser.add_argument("--uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default=os.getenv("MONGODB_DB", "expense_tracker_synthetic"))
+    parser.add_argument("--drop", action="store_true", help="Drop the collections first")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--expenses", type=int, default=1_000_000)
+    parser.add_argument("--groups", type=int, help="Shared groups (default: users / 10)")
+    parser.add_argument("--min-group-size", type=int, default=2)
+    parser.add_argument("--max-group-size", type=int, default=500)
+    parser.add_argument("--group-size-alpha", type=float, default=1.5, help="Pareto shape; lower = more large groups")
+    parser.add_argument("--activity-alpha", type=float, default=1.2, help="Pareto shape of per-user activity")
+    parser.add_argument("--group-ratio", type=float, default=0.3, help="Fraction of expenses that are group expenses")
+    parser.add_argument("--max-participants", type=int, default=20, help="Participants per group expense")
+    parser.add_argument("--amount-mu", type=float, default=3.5, help="Lognormal mean of log(amount)")
+    parser.add_argument("--amount-sigma", type=float, default=1.0)
+    parser.add_argument("--days", type=int, default=730, help="Date range length")
+    parser.add_argument("--end-date", default="2025-12-31")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Expenses per worker job")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Documents per insert_many")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--write-concern", type=int, default=1, help="w for the load (0 = unacknowledged)")
+    parser.add_argument("--skip-indexes", action="store_true")
+    return parser.parse_args(argv)
+
+# ============================================================================
+# COMMAND LINE INTERFACE
+# ============================================================================
+
+if __name__ == "__main__":
+    load(parse_args())
@@ -0,0 +1,309 @@
+# db/index_audit.py
+"""
+Index audit: redundant, unused and missing indexes
+
+Inputs:
+- the declared indexes (COLLECTION_INDEXES), or the live ones with --live
+- the query shapes the MCP tools actually issue, from a slow-query log
+  recorded with SLOW_QUERY_MS=0 (every command, with its tool and plan)
+- with --live, $indexStats access counts and index sizes
+
+Reported:
+- redundant: an index whose key is a prefix of another index's key
+  (same directions). Unique, TTL, partial and sparse indexes are kept:
+  they do more than speed up reads.
+- unused: no recorded plan used it, or $indexStats shows no accesses
+  since the counters were last reset (they are per node and reset on
+  restart, so read them after a representative run)
+- missing: shapes that scan the collection or sort in memory, with an
+  equality-sort-range key suggestion
+
+Projected savings are the live sizes of the redundant and droppable
+unused indexes.
+
+Usage (from 1.Backend):
+    SLOW_QUERY_MS=0 SLOW_QUERY_LOG=shapes.jsonl python benchmarks/bench_tools.py --scales 10k
+    python -m db.index_audit --shapes shapes.jsonl [--live] [--json audit.json]
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import sys
+import pathlib
+from typing import Any, Dict, List, Optional
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from db.init import COLLECTION_INDEXES
+
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$exists", "$regex", "$not"}
+EQUALITY_OPERATORS = {"$eq", "$in"}
+
+# ============================================================================
+# REDUNDANT INDEXES
+# ============================================================================
+
+def _key(spec) -> List[tuple]:
+    return [(field, int(direction) if isinstance(direction, float) else direction) for field, direction in spec["key"]]
+
+def enforces_something(spec) -> bool:
+    """Indexes that are more than a read path"""
+    return (spec["name"] == "_id_" or bool(spec.get("unique")) or "expireAfterSeconds" in spec
+            or "partialFilterExpression" in spec or bool(spec.get("sparse")))
+
+def redundant_indexes(indexes: Dict[str, List[Dict]]) -> List[Dict]:
+    """[{collection, index, covered_by}] for indexes that prefix another index"""
+    found = []
+    for cname, specs in indexes.items():
+        for spec in specs:
+            if enforces_something(spec):
+                continue
+            key = _key(spec)
+            for other in specs:
+                other_key = _key(other)
+                if (other is not spec and len(other_key) > len(key) and other_key[:len(key)] == key
+                        and "partialFilterExpression" not in other and not other.get("sparse")):
+                    found.append({"collection": cname, "index": spec["name"], "covered_by": other["name"]})
+                    break
+    return found
+
+# ============================================================================
+# QUERY SHAPES
+# ============================================================================
+
+def load_shapes(path: str) -> List[Dict]:
+    """Distinct (tool, shape) records from a slow-query log and its rotations"""
+    shapes: Dict[str, Dict] = {}
+    for log in sorted(glob.glob(path + "*")):
+        with open(log, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                key = json.dumps([record.get("tool"), record["shape"]], sort_keys=True)
+                entry = shapes.setdefault(key, {"tool": record.get("tool"), "shape": record["shape"],
+                                                "count": 0, "total_ms": 0.0, "plan": None})
+                entry["count"] += 1
+                entry["total_ms"] += record.get("duration_ms", 0.0)
+                plan = record.get("plan")
+                if plan and "error" not in plan:
+                    entry["plan"] = plan
+    return list(shapes.values())
+
+def shape_predicate(shape: Dict):
+    """(filter, sort) of a command shape; aggregates use a leading $match/$sort"""
+    command = shape.get("command")
+    if command in ("find", "findAndModify"):
+        return shape.get("filter") or shape.get("query") or {}, shape.get("sort") or {}
+    if command in ("count", "distinct"):
+        return shape.get("query") or {}, {}
+    if command in ("update", "delete"):
+        ops = shape.get("updates") or shape.get("deletes") or [{}]
+        return ops[0] or {}, {}
+    if command == "aggregate":
+        pipeline = shape.get("pipeline") or []
+        match = pipeline[0].get("$match", {}) if pipeline else {}
+        following = pipeline[1] if match and len(pipeline) > 1 else (pipeline[0] if pipeline and not match else {})
+        sort = following.get("$sort", {}) if isinstance(following, dict) else {}
+        return match, sort if all(isinstance(v, int) for v in sort.values()) else {}
+    return {}, {}
+
+def classify_fields(predicate: Dict):
+    """(equality, range) field lists; $and is flattened, $or is skipped"""
+    equality, ranges = [], []
+    for field, value in predicate.items():
+        if field == "$and":
+            for clause in value:
+                e, r = classify_fields(clause)
+                equality += e
+                ranges += r
+        elif field.startswith("$"):
+            continue
+        elif isinstance(value, dict) and any(op in RANGE_OPERATORS for op in value):
+            ranges.append(field)
+        elif isinstance(value, dict) and value and not set(value) <= EQUALITY_OPERATORS:
+            continue  # $elemMatch etc.
+        else:
+            equality.append(field)
+    return equality, ranges
+
+def suggest_index(shape: Dict) -> Optional[List[tuple]]:
+    """Equality fields, then sort, then range fields (ESR)"""
+    predicate, sort = shape_predicate(shape)
+    equality, ranges = classify_fields(predicate)
+    key = [(f, 1) for f in equality]
+    key += [(f, d) for f, d in sort.items() if f not in equality]
+    key += [(f, 1) for f in ranges if f not in equality and f not in sort]
+    return key or None
+
+def _served(suggestion: List[tuple], specs: List[Dict]) -> bool:
+    """An index already starts with the suggested key (or its mirror)"""
+    mirrored = [(f, -d if isinstance(d, int) else d) for f, d in suggestion]
+    return any(_key(s)[:len(suggestion)] in (suggestion, mirrored) for s in specs)
+
+def missing_indexes(shapes: List[Dict], indexes: Dict[str, List[Dict]]) -> List[Dict]:
+    """Shapes that scan or sort in memory, with a suggested key"""
+    missing: Dict[str, Dict] = {}
+    for entry in shapes:
+        shape, plan = entry["shape"], entry.get("plan")
+        cname = shape.get("collection")
+        suggestion = suggest_index(shape)
+        if cname not in indexes or not suggestion:
+            continue
+        if plan:
+            stages = plan.get("stages") or []
+            if not (plan.get("collscan") or "SORT" in stages):
+                continue
+        elif _served(suggestion[:1], indexes[cname]):
+            continue  # no plan: assume a matching leading field is enough
+        if _served(suggestion, indexes[cname]):
+            continue
+        key = json.dumps([cname, suggestion])
+        row = missing.setdefault(key, {"collection": cname, "suggested_key": suggestion, "tools": [], "count": 0})
+        if entry.get("tool") and entry["tool"] not in row["tools"]:
+            row["tools"].append(entry["tool"])
+        row["count"] += entry.get("count", 1)
+    return sorted(missing.values(), key=lambda r: -r["count"])
+
+def used_by_plans(shapes: List[Dict]) -> Dict[str, set]:
+    used: Dict[str, set] = {}
+    for entry in shapes:
+        plan = entry.get("plan") or {}
+        for name in plan.get("indexes") or []:
+            used.setdefault(entry["shape"].get("collection"), set()).add(name)
+    return used
+
+# ============================================================================
+# AUDIT
+# ============================================================================
+
+def audit(indexes: Dict[str, List[Dict]], shapes: List[Dict], stats: Optional[Dict[str, Dict]] = None) -> Dict[str, Any]:
+    """
+    indexes: collection -> specs; shapes: load_shapes() output;
+    stats: collection -> index name -> {"ops", "size"} from --live.
+    """
+    stats = stats or {}
+    redundant = redundant_indexes(indexes)
+    redundant_names = {(r["collection"], r["index"]) for r in redundant}
+
+    used = used_by_plans(shapes)
+    planned = {entry["shape"].get("collection") for entry in shapes if entry.get("plan")}
+    unused = []
+    for cname, specs in indexes.items():
+        for spec in specs:
+            name = spec["name"]
+            if name == "_id_" or (cname, name) in redundant_names:
+                continue
+            ops = stats.get(cname, {}).get(name, {}).get("ops")
+            no_plan_use = cname in planned and name not in used.get(cname, set())
+            if ops == 0 or (ops is None and no_plan_use):
+                unused.append({"collection": cname, "index": name, "ops": ops,
+                               "droppable": not enforces_something(spec)})
+
+    def size(cname, name):
+        return stats.get(cname, {}).get(name, {}).get("size")
+
+    for row in redundant + unused:
+        row["size_bytes"] = size(row["collection"], row["index"])
+
+    savings = sum(row["size_bytes"] or 0 for row in redundant)
+    savings += sum(row["size_bytes"] or 0 for row in unused if row["droppable"])
+    return {
+        "redundant": redundant,
+        "unused": unused,
+        "missing": missing_indexes(shapes, indexes),
+        "shapes": len(shapes),
+        "projected_savings_bytes": savings if stats else None,
+    }
+
+# ============================================================================
+# LIVE DATABASE
+# ============================================================================
+
+async def fetch_live(collections) -> tuple:
+    """(indexes, stats) from $indexStats and $collStats"""
+    from db.client import get_db, close
+
+    database = get_db()
+    indexes, stats = {}, {}
+    try:
+        existing = set(await database.list_collection_names())
+        for cname in collections:
+            if cname not in existing:
+                continue
+            rows = await database[cname].aggregate([{"$indexStats": {}}]).to_list(None)
+            coll = await database[cname].aggregate([{"$collStats": {"storageStats": {}}}]).to_list(None)
+            sizes = coll[0]["storageStats"].get("indexSizes", {}) if coll else {}
+
+            specs, by_name = [], {}
+            for row in rows:
+                if row["name"] in by_name:
+                    by_name[row["name"]]["ops"] += row["accesses"]["ops"]  # one row per node
+                    continue
+                spec = dict(row.get("spec") or {"name": row["name"]})
+                spec["key"] = list(row["key"].items())
+                specs.append(spec)
+                by_name[row["name"]] = {"ops": row["accesses"]["ops"], "size": sizes.get(row["name"])}
+            indexes[cname], stats[cname] = specs, by_name
+    finally:
+        close()
+    return indexes, stats
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def _format_key(key) -> str:
+    return ", ".join(f"{f}:{d}" for f, d in key)
+
+def _format_size(size) -> str:
+    return "-" if size is None else f"{size / 1024 / 1024:.1f}MB"
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"Shapes analysed: {report['shapes']}")
+
+    print(f"\nRedundant ({len(report['redundant'])}):")
+    for row in report["redundant"]:
+        print(f"  {row['collection']}.{row['index']}  prefix of {row['covered_by']}  {_format_size(row['size_bytes'])}")
+
+    print(f"\nUnused ({len(report['unused'])}):")
+    for row in report["unused"]:
+        note = "" if row["droppable"] else "  (keep: enforces a constraint)"
+        ops = "-" if row["ops"] is None else row["ops"]
+        print(f"  {row['collection']}.{row['index']}  ops={ops}  {_format_size(row['size_bytes'])}{note}")
+
+    print(f"\nMissing ({len(report['missing'])}):")
+    for row in report["missing"]:
+        print(f"  {row['collection']}  {{{_format_key(row['suggested_key'])}}}  n={row['count']}  "
+              f"tools={','.join(row['tools']) or '-'}")
+
+    if report["projected_savings_bytes"] is not None:
+        print(f"\nProjected savings: {_format_size(report['projected_savings_bytes'])}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit MongoDB indexes against the queries tools issue")
+    parser.add_argument("--shapes", help="Slow-query log recorded with SLOW_QUERY_MS=0")
+    parser.add_argument("--live", action="store_true", help="Use live indexes, $indexStats and sizes (MONGODB_URI/MONGODB_DB)")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args(argv)
+
+    shapes = load_shapes(args.shapes) if args.shapes else []
+    indexes = {cname: [dict(spec) for spec in specs] for cname, specs in COLLECTION_INDEXES.items()}
+    stats = None
+    if args.live:
+        live_indexes, stats = asyncio.run(fetch_live(list(indexes)))
+        indexes.update(live_indexes)
+
+    report = audit(indexes, shapes, stats)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\nReport written to {args.json}")
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -1,370 +1,306 @@
 # db/init.py - Initialize all collections with schemas and indexes
 # Phase 1: Enhanced to support expense sharing functionality
+"""
+Database setup as a diff against the desired state.
 
-from .client import (
-    db, 
-    expenses_col, 
-    users_col,
-    groups_col,
-    group_members_col,
-    expense_participants_col,
-    balances_col,
-    settlements_col
-)
+COLLECTION_INDEXES (with COLLECTION_SCHEMAS) describes what every
+collection should look like. setup_collection_hybrid() fetches the
+existing collections and indexes once, creates only what is missing
+(collections concurrently, then one createIndexes batch per collection,
+all collections at once), drops RETIRED_INDEXES whose replacements
+exist, and records a fingerprint of the desired state in `schema_meta`.
+When the stored fingerprint matches, setup is a single find_one, so it
+is cheap enough to run on every boot.
+
+Workers booting together may race on the same steps: a collection
+another worker just created, or a retired index it just dropped, counts
+as done.
+"""
+
+from .client import db
 from .schema import COLLECTION_SCHEMAS
 from datetime import datetime
-from pymongo.errors import OperationFailure
+from pymongo import IndexModel
+from pymongo.errors import CollectionInvalid, OperationFailure
+import asyncio
+import hashlib
+import json
 import logging
+from typing import Any, Dict, List
 
 logger = logging.getLogger(__name__)
 
+# Server error codes for work another worker already did
+NAMESPACE_EXISTS = 48
+INDEX_NOT_FOUND = 27
+
 # ============================================================================
-# MAIN SETUP FUNCTION
+# DESIRED STATE
 # ============================================================================
 
-async def setup_collection_hybrid():
-    """
-    Creates collections if missing, applies schema validators,
-    creates indexes, and performs test writes.
-    
-    Phase 1: Enhanced to include all new collections for expense sharing.
-    """
-    
-    logger.info("=== Starting Database Initialization (Phase 1) ===")
-    
-    # Setup existing collections (backward compatible)
-    await setup_users_collection()
-    await setup_expenses_collection()
-    
-    # Setup new collections (Phase 1)
-    await setup_groups_collection()
-    await setup_group_members_collection()
-    await setup_expense_participants_collection()
-    await setup_balances_collection()
-    await setup_settlements_collection()
-    
-    logger.info("=== Database Initialization Complete ===")
+# How long a completed idempotency key keeps replaying its original result
+IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 60 * 60
+
+# Index options compared when deciding whether an existing index matches
+INDEX_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+# Partial filter for soft-deleted collections; queries must include is_active: True
+ACTIVE_ONLY = {"is_active": True}
+
+def index(keys, name: str, **options) -> Dict[str, Any]:
+    """Index spec in index_information() form"""
+    return {"key": list(keys), "name": name, **options}
+
+COLLECTION_INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    # Existing collections (backward compatible)
+    "users": [
+        index([("email", 1)], "idx_email_unique", unique=True),
+    ],
+    "expenses": [
+        # Covers summarize ($match user/date, $group category/amount); list_expenses uses its prefix
+        index([("user_id", 1), ("date", -1), ("category", 1), ("amount", 1)], "idx_user_date_category_amount"),
+        index([("user_id", 1), ("category", 1)], "idx_user_category"),
+        index([("date", -1)], "idx_date_desc"),
+        # Phase 1: group-based queries
+        index([("group_id", 1), ("date", -1)], "idx_group_date"),
+        index([("group_id", 1), ("paid_by", 1)], "idx_group_paidby"),
+        index([("paid_by", 1)], "idx_paidby"),
+    ],
+
+    # Phase 1: Expense Sharing
+    # Memberships and groups are soft-deleted; every lookup filters on
+    # is_active: True, so the indexes only hold active rows
+    "groups": [
+        index([("created_by", 1)], "idx_created_by_active", partialFilterExpression=ACTIVE_ONLY),
+    ],
+    "group_members": [
+        # Critical: prevents duplicate active memberships (a removed member can rejoin)
+        index([("group_id", 1), ("user_id", 1)], "idx_group_user_active_unique",
+              unique=True, partialFilterExpression=ACTIVE_ONLY),
+        index([("user_id", 1)], "idx_user_active", partialFilterExpression=ACTIVE_ONLY),
+    ],
+    "expense_participants": [
+        # Also serves expense_id-only lookups (key prefix)
+        index([("expense_id", 1), ("user_id", 1)], "idx_expense_user_unique", unique=True),
+        index([("user_id", 1)], "idx_user"),
+    ],
+    "balances": [
+        # Critical: fast balance lookups; its prefixes serve group_id and
+        # group_id + from_user_id queries
+        index([("group_id", 1), ("from_user_id", 1), ("to_user_id", 1)], "idx_group_from_to_unique", unique=True),
+        index([("group_id", 1), ("to_user_id", 1)], "idx_group_to"),
+    ],
+    "settlements": [
+        index([("group_id", 1), ("settled_at", -1)], "idx_group_settled"),
+        index([("paid_by", 1)], "idx_paid_by"),
+        index([("paid_to", 1)], "idx_paid_to"),
+        index([("group_id", 1), ("paid_by", 1), ("paid_to", 1)], "idx_group_payer_payee"),
+    ],
+
+    # Request deduplication: _id is the key, MongoDB expires old entries
+    "idempotency_keys": [
+        index([("created_at", 1)], "idx_created_ttl", expireAfterSeconds=IDEMPOTENCY_KEY_TTL_SECONDS),
+    ],
+}
+
+# Indexes replaced by the ones above. Setup drops them once every
+# declared index of the collection exists; groups and group_members need
+# db/migrations/partial_indexes_migration.py first (same key patterns).
+# The expense_participants and balances ones were prefixes of the unique
+# compound indexes (db/index_audit.py reports those as redundant).
+RETIRED_INDEXES: Dict[str, List[str]] = {
+    "expenses": ["idx_user_date"],
+    "groups": ["idx_created_by", "idx_is_active", "idx_creator_active"],
+    "group_members": ["idx_group_user_unique", "idx_user", "idx_group", "idx_group_active"],
+    "expense_participants": ["idx_expense"],
+    "balances": ["idx_group", "idx_group_from"],
+}
+
+# Where the fingerprint of the last applied state is kept
+META_COLLECTION = "schema_meta"
+META_ID = "setup"
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+
+def validator_for(cname: str) -> Dict[str, Any]:
+    return {"$jsonSchema": COLLECTION_SCHEMAS[cname]}
+
+def schema_fingerprint() -> str:
+    """Hash of the validators and indexes setup would apply"""
+    state = {
+        cname: {"validator": validator_for(cname), "indexes": COLLECTION_INDEXES[cname],
+                "retired": RETIRED_INDEXES.get(cname, [])}
+        for cname in COLLECTION_INDEXES
+    }
+    return hashlib.sha256(_canonical(state).encode()).hexdigest()
 
 # ============================================================================
-# EXISTING COLLECTIONS (maintained for backward compatibility)
+# DIFF
 # ============================================================================
 
-async def setup_users_collection():
-    """Setup users collection with email index"""
-    cname = "users"
-    collection = users_col
-    
-    logger.info(f"Setting up collection: {cname}")
-    
-    try:
-        existing = await db.list_collection_names()
-        
-        if cname not in existing:
-            try:
-                await db.create_collection(
-                    cname,
-                    validator={"$jsonSchema": COLLECTION_SCHEMAS[cname]},
-                    validationLevel="moderate",
-                    validationAction="error"
-                )
-                logger.info(f"[OK] Created '{cname}' with validator.")
-            except Exception as e:
-                await db.create_collection(cname)
-                logger.warning(f"[OK] Created '{cname}' WITHOUT validator. Details: {e}")
-        
-        # Unique index on email
-        await collection.create_index([("email", 1)], unique=True, name="idx_email_unique")
-        logger.info(f"[OK] {cname} indexes ensured.")
-        
-    except Exception as e:
-        logger.error(f"Error setting up {cname}: {e}")
-        raise
+def _key(spec) -> tuple:
+    return tuple((field, int(direction) if isinstance(direction, float) else direction)
+                 for field, direction in spec["key"])
 
-async def setup_expenses_collection():
+def _options(spec) -> Dict[str, Any]:
+    return {opt: spec[opt] for opt in INDEX_OPTIONS if spec.get(opt) not in (None, False)}
+
+def diff_indexes(existing: Dict[str, Dict[str, Any]], desired: List[Dict[str, Any]]):
     """
-    Setup expenses collection with enhanced schema and indexes.
-    Phase 1: Added group_id and split_type fields (optional for backward compatibility)
+    Split desired indexes into (missing, conflicts) given index_information().
+
+    An existing index with the same key and options counts as present
+    whatever its name. Same key or same name with different options is a
+    conflict: creating it would fail, and dropping it is left to an
+    operator or a migration.
     """
-    cname = "expenses"
-    collection = expenses_col
-    
-    logger.info(f"Setting up collection: {cname}")
-    
+    by_key = {_key(spec): (name, spec) for name, spec in existing.items()}
+    missing, conflicts = [], []
+    for spec in desired:
+        found = by_key.get(_key(spec))
+        if found is not None:
+            if _options(found[1]) != _options(spec):
+                conflicts.append((spec["name"], found[0]))
+            continue
+        if spec["name"] in existing:
+            conflicts.append((spec["name"], spec["name"]))
+            continue
+        missing.append(spec)
+    return missing, conflicts
+
+# ============================================================================
+# APPLY
+# ============================================================================
+
+def _already_exists(e: Exception) -> bool:
+    return isinstance(e, CollectionInvalid) or (isinstance(e, OperationFailure) and e.code == NAMESPACE_EXISTS)
+
+async def _create_collection(cname: str):
     try:
-        existing = await db.list_collection_names()
+        await db.create_collection(
+            cname,
+            validator=validator_for(cname),
+            validationLevel="moderate",
+            validationAction="error"
+        )
+        logger.info(f"[OK] Created '{cname}' with validator.")
     except Exception as e:
-        logger.error(f"Failed to list collections: {e}")
-        raise
-
-    if cname not in existing:
+        if _already_exists(e):
+            logger.info(f"[OK] '{cname}' was created concurrently.")
+            return
         try:
-            await db.create_collection(
-                cname,
-                validator={"$jsonSchema": COLLECTION_SCHEMAS[cname]},
-                validationLevel="moderate",
-                validationAction="error"
-            )
-            logger.info(f"[OK] Created '{cname}' with JSON-schema validator.")
-        except Exception as e:
             await db.create_collection(cname)
-            logger.warning(f"[OK] Created '{cname}' WITHOUT validator. Details: {e}")
-    else:
-        try:
-            await db.command({
-                "collMod": cname,
-                "validator": {"$jsonSchema": COLLECTION_SCHEMAS[cname]},
-                "validationLevel": "moderate",
-                "validationAction":"error"
-            })
-            logger.info(f"[OK] Validator updated on '{cname}'.")
-        except OperationFailure:
-            logger.warning(f"[WARN] collMod restricted; continuing without update.")
-        except Exception as e:
-            logger.warning(f"[WARN] collMod error: {e}")
-
-    # Indexes for expenses (backward compatible + new group-based indexes)
+        except Exception as retry_error:
+            if not _already_exists(retry_error):
+                raise
+        logger.warning(f"[OK] Created '{cname}' WITHOUT validator. Details: {e}")
+
+async def _update_validator(cname: str):
     try:
-        # Existing indexes (backward compatibility)
-        await collection.create_index([("user_id", 1), ("date", -1)], name="idx_user_date")
-        await collection.create_index([("user_id", 1), ("category", 1)], name="idx_user_category")
-        await collection.create_index([("date", -1)], name="idx_date_desc")
-        
-        # New indexes (Phase 1: group-based queries)
-        await collection.create_index([("group_id", 1), ("date", -1)], name="idx_group_date")
-        await collection.create_index([("group_id", 1), ("paid_by", 1)], name="idx_group_paidby")
-        await collection.create_index([("paid_by", 1)], name="idx_paidby")
-        
-        logger.info(f"[OK] {cname} indexes ensured.")
+        await db.command({
+            "collMod": cname,
+            "validator": validator_for(cname),
+            "validationLevel": "moderate",
+            "validationAction": "error"
+        })
+        logger.info(f"[OK] Validator updated on '{cname}'.")
+    except OperationFailure:
+        logger.warning(f"[WARN] collMod restricted on '{cname}'; continuing without update.")
     except Exception as e:
-        logger.warning(f"Index creation issue for {cname}: {e}")
+        logger.warning(f"[WARN] collMod error on '{cname}': {e}")
+
+async def _drop_index(cname: str, name: str):
+    try:
+        await db[cname].drop_index(name)
+    except OperationFailure as e:
+        if e.code != INDEX_NOT_FOUND:
+            raise
+        logger.info(f"[OK] {cname}: retired {name} was dropped concurrently")
 
-    # Test write (backward compatible)
+async def _create_indexes(cname: str, specs: List[Dict[str, Any]]) -> bool:
+    models = [IndexModel(spec["key"], **{k: v for k, v in spec.items() if k != "key"}) for spec in specs]
     try:
-        test_doc = {
-            "user_id": "test_user_phase1",
-            "date": "2000-01-01",
-            "amount": 0,
-            "category": "test",
-            "subcategory": "",
-            "note": "phase1-init-test",
-            "created_at": datetime.utcnow()
-        }
-        inserted = await collection.insert_one(test_doc)
-        await collection.delete_one({"_id": inserted.inserted_id})
-        logger.info(f"[OK] {cname} test write OK.")
+        await db[cname].create_indexes(models)
+        logger.info(f"[OK] {cname}: created {', '.join(s['name'] for s in specs)}")
+        return True
     except Exception as e:
-        logger.error(f"Test write failed for {cname}: {e}")
-        raise
+        logger.warning(f"Index creation issue for {cname}: {e}")
+        return False
 
 # ============================================================================
-# NEW COLLECTIONS (Phase 1: Expense Sharing)
+# MAIN SETUP FUNCTION
 # ============================================================================
 
-async def setup_groups_collection():
-    """Setup groups collection with creator index"""
-    cname = "groups"
-    collection = groups_col
-    
-    logger.info(f"Setting up collection: {cname}")
-    
-    try:
-        existing = await db.list_collection_names()
-        
-        if cname not in existing:
-            try:
-                await db.create_collection(
-                    cname,
-                    validator={"$jsonSchema": COLLECTION_SCHEMAS[cname]},
-                    validationLevel="moderate",
-                    validationAction="error"
-                )
-                logger.info(f"[OK] Created '{cname}' with validator.")
-            except Exception as e:
-                await db.create_collection(cname)
-                logger.warning(f"[OK] Created '{cname}' WITHOUT validator. Details: {e}")
-        
-        # Indexes
-        await collection.create_index([("created_by", 1)], name="idx_created_by")
-        await collection.create_index([("is_active", 1)], name="idx_is_active")
-        await collection.create_index(
-            [("created_by", 1), ("is_active", 1)], 
-            name="idx_creator_active"
-        )
-        
-        logger.info(f"[OK] {cname} indexes ensured.")
-        
-    except Exception as e:
-        logger.error(f"Error setting up {cname}: {e}")
-        raise
-
-async def setup_group_members_collection():
-    """Setup group_members collection with compound unique index"""
-    cname = "group_members"
-    collection = group_members_col
-    
-    logger.info(f"Setting up collection: {cname}")
-    
-    try:
-        existing = await db.list_collection_names()
-        
-        if cname not in existing:
-            try:
-                await db.create_collection(
-                    cname,
-                    validator={"$jsonSchema": COLLECTION_SCHEMAS[cname]},
-                    validationLevel="moderate",
-                    validationAction="error"
-                )
-                logger.info(f"[OK] Created '{cname}' with validator.")
-            except Exception as e:
-                await db.create_collection(cname)
-                logger.warning(f"[OK] Created '{cname}' WITHOUT validator. Details: {e}")
-        
-        # Critical: Compound unique index to prevent duplicate memberships
-        await collection.create_index(
-            [("group_id", 1), ("user_id", 1)], 
-            unique=True, 
-            name="idx_group_user_unique"
-        )
-        
-        # Query optimization indexes
-        await collection.create_index([("user_id", 1)], name="idx_user")
-        await collection.create_index([("group_id", 1)], name="idx_group")
-        await collection.create_index(
-            [("group_id", 1), ("is_active", 1)], 
-            name="idx_group_active"
-        )
-        
-        logger.info(f"[OK] {cname} indexes ensured.")
-        
-    except Exception as e:
-        logger.error(f"Error setting up {cname}: {e}")
-        raise
-
-async def setup_expense_participants_collection():
-    """Setup expense_participants collection for split tracking"""
-    cname = "expense_participants"
-    collection = expense_participants_col
-    
-    logger.info(f"Setting up collection: {cname}")
-    
-    try:
-        existing = await db.list_collection_names()
-        
-        if cname not in existing:
-            try:
-                await db.create_collection(
-                    cname,
-                    validator={"$jsonSchema": COLLECTION_SCHEMAS[cname]},
-                    validationLevel="moderate",
-                    validationAction="error"
-                )
-                logger.info(f"[OK] Created '{cname}' with validator.")
-            except Exception as e:
-                await db.create_collection(cname)
-                logger.warning(f"[OK] Created '{cname}' WITHOUT validator. Details: {e}")
-        
-        # Compound unique index to prevent duplicate participants
-        await collection.create_index(
-            [("expense_id", 1), ("user_id", 1)], 
-            unique=True, 
-            name="idx_expense_user_unique"
-        )
-        
-        # Query optimization indexes
-        await collection.create_index([("expense_id", 1)], name="idx_expense")
-        await collection.create_index([("user_id", 1)], name="idx_user")
-        
-        logger.info(f"[OK] {cname} indexes ensured.")
-        
-    except Exception as e:
-        logger.error(f"Error setting up {cname}: {e}")
-        raise
-
-async def setup_balances_collection():
-    """Setup balances collection with compound unique index for balance lookups"""
-    cname = "balances"
-    collection = balances_col
-    
-    logger.info(f"Setting up collection: {cname}")
-    
-    try:
-        existing = await db.list_collection_names()
-        
-        if cname not in existing:
-            try:
-                await db.create_collection(
-                    cname,
-                    validator={"$jsonSchema": COLLECTION_SCHEMAS[cname]},
-                    validationLevel="moderate",
-                    validationAction="error"
-                )
-                logger.info(f"[OK] Created '{cname}' with validator.")
-            except Exception as e:
-                await db.create_collection(cname)
-                logger.warning(f"[OK] Created '{cname}' WITHOUT validator. Details: {e}")
-        
-        # Critical: Compound unique index for fast balance lookups
-        await collection.create_index(
-            [("group_id", 1), ("from_user_id", 1), ("to_user_id", 1)], 
-            unique=True, 
-            name="idx_group_from_to_unique"
-        )
-        
-        # Query optimization indexes
-        await collection.create_index([("group_id", 1)], name="idx_group")
-        await collection.create_index(
-            [("group_id", 1), ("from_user_id", 1)], 
-            name="idx_group_from"
-        )
-        await collection.create_index(
-            [("group_id", 1), ("to_user_id", 1)], 
-            name="idx_group_to"
-        )
-        
-        logger.info(f"[OK] {cname} indexes ensured.")
-        
-    except Exception as e:
-        logger.error(f"Error setting up {cname}: {e}")
-        raise
-
-async def setup_settlements_collection():
-    """Setup settlements collection for payment tracking"""
-    cname = "settlements"
-    collection = settlements_col
-    
-    logger.info(f"Setting up collection: {cname}")
-    
-    try:
-        existing = await db.list_collection_names()
-        
-        if cname not in existing:
-            try:
-                await db.create_collection(
-                    cname,
-                    validator={"$jsonSchema": COLLECTION_SCHEMAS[cname]},
-                    validationLevel="moderate",
-                    validationAction="error"
-                )
-                logger.info(f"[OK] Created '{cname}' with validator.")
-            except Exception as e:
-                await db.create_collection(cname)
-                logger.warning(f"[OK] Created '{cname}' WITHOUT validator. Details: {e}")
-        
-        # Indexes for settlement queries
-        await collection.create_index(
-            [("group_id", 1), ("settled_at", -1)], 
-            name="idx_group_settled"
-        )
-        await collection.create_index([("paid_by", 1)], name="idx_paid_by")
-        await collection.create_index([("paid_to", 1)], name="idx_paid_to")
-        await collection.create_index(
-            [("group_id", 1), ("paid_by", 1), ("paid_to", 1)], 
-            name="idx_group_payer_payee"
+async def setup_collection_hybrid(force: bool = False) -> Dict[str, Any]:
+    """
+    Creates collections if missing, applies schema validators and
+    creates missing indexes. Skipped when the stored fingerprint matches
+    (force=True re-checks anyway).
+
+    Returns a summary: skipped, created collections, created indexes
+    per collection, dropped retired indexes, and index conflicts.
+    """
+    fingerprint = schema_fingerprint()
+    meta = db[META_COLLECTION]
+
+    if not force:
+        stored = await meta.find_one({"_id": META_ID})
+        if stored and stored.get("fingerprint") == fingerprint:
+            logger.info("Database schema up to date; setup skipped")
+            return {"skipped": True, "fingerprint": fingerprint}
+
+    logger.info("=== Starting Database Initialization ===")
+
+    # Current state: collections (with validators), then every collection's indexes at once
+    existing = {info["name"]: info.get("options", {}) async for info in await db.list_collections()}
+    cnames = list(COLLECTION_INDEXES)
+
+    missing_collections = [c for c in cnames if c not in existing]
+    stale_validators = [
+        c for c in cnames
+        if c in existing and _canonical(existing[c].get("validator")) != _canonical(validator_for(c))
+    ]
+    await asyncio.gather(
+        *[_create_collection(c) for c in missing_collections],
+        *[_update_validator(c) for c in stale_validators],
+    )
+
+    infos = await asyncio.gather(*[db[c].index_information() for c in cnames])
+
+    summary = {"skipped": False, "fingerprint": fingerprint, "created_collections": missing_collections,
+               "created_indexes": {}, "conflicts": {}}
+    pending = {}
+    for cname, info in zip(cnames, infos):
+        missing, conflicts = diff_indexes(info, COLLECTION_INDEXES[cname])
+        if conflicts:
+            summary["conflicts"][cname] = conflicts
+            for wanted, found in conflicts:
+                logger.warning(f"[WARN] {cname}: index '{wanted}' conflicts with existing '{found}'; drop it or run its migration")
+        if missing:
+            pending[cname] = missing
+
+    results = await asyncio.gather(*[_create_indexes(c, specs) for c, specs in pending.items()])
+    for (cname, specs), ok in zip(pending.items(), results):
+        if ok:
+            summary["created_indexes"][cname] = [s["name"] for s in specs]
+
+    # Retired indexes go once their replacements are in place
+    complete = [c for c in cnames if c not in summary["conflicts"] and (c not in pending or c in summary["created_indexes"])]
+    retired = [(c, name) for c, info in zip(cnames, infos) if c in complete
+               for name in RETIRED_INDEXES.get(c, []) if name in info]
+    await asyncio.gather(*[_drop_index(c, name) for c, name in retired])
+    for cname, name in retired:
+        logger.info(f"[OK] {cname}: dropped retired {name}")
+    summary["dropped_indexes"] = [f"{c}.{name}" for c, name in retired]
+
+    # Only a complete setup is recorded, so failures are retried next time
+    if all(results) and not summary["conflicts"]:
+        await meta.replace_one(
+            {"_id": META_ID},
+            {"_id": META_ID, "fingerprint": fingerprint, "applied_at": datetime.utcnow()},
+            upsert=True
         )
-        
-        logger.info(f"[OK] {cname} indexes ensured.")
-        
-    except Exception as e:
-        logger.error(f"Error setting up {cname}: {e}")
-        raise
+
+    logger.info("=== Database Initialization Complete ===")
+    return summary
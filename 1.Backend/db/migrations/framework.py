@@ -0,0 +1,323 @@
+# migrations/framework.py
+"""
+Versioned, resumable data migrations
+
+A Migration scans one source collection in _id order and turns each
+batch of documents into bulk writes. The runner:
+
+- reads `concurrency` batches at a time and applies them concurrently
+  (each batch's writes go out as unordered bulk_write calls)
+- checkpoints the last _id of every completed window in the
+  `migrations` collection, so an interrupted run resumes where it
+  stopped; a window may be applied twice, so apply() must be idempotent
+  (upserts, $set on a filter that excludes migrated documents)
+- limits writes per second (token bucket) and pauses while the
+  primary's operation queue is long (serverStatus globalLock.currentQueue)
+- in dry-run mode writes nothing and reports how many documents are
+  pending and which writes would be issued
+
+Run pending migrations (from 1.Backend):
+    python -m db.migrations.framework [--dry-run] [--status] [--target 1]
+        [--concurrency 4] [--batch-size 500] [--max-writes-per-second 2000] [--max-queued 50]
+"""
+
+import sys
+import pathlib
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = "migrations"
+
+# ============================================================================
+# MIGRATION
+# ============================================================================
+
+class Migration:
+    """
+    Subclass and set version, name and source; implement apply().
+
+    query narrows the scan to documents that may need work; projection
+    keeps batches small.
+    """
+
+    version: int = 0
+    name: str = ""
+    source: str = ""
+    query: Dict[str, Any] = {}
+    projection: Optional[Dict[str, Any]] = None
+    batch_size: int = 500
+
+    async def apply(self, batch: List[Dict], ctx: "BatchContext") -> None:
+        """Issue the writes for one batch through ctx.bulk_write (idempotent)"""
+        raise NotImplementedError
+
+    async def verify(self, database) -> bool:
+        """Checked after the last batch; False means the next run rescans"""
+        return True
+
+# ============================================================================
+# THROTTLING
+# ============================================================================
+
+class RateLimiter:
+    """Token bucket: at most `rate` tokens per second, bursts up to one second's worth"""
+
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate
+        self._tokens = rate or 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, n: int = 1) -> None:
+        if not self.rate:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= n
+            if self._tokens < 0:
+                # Batches larger than the bucket wait for their whole deficit
+                await asyncio.sleep(-self._tokens / self.rate)
+
+class LoadGuard:
+    """Waits while the primary has more than max_queued operations queued"""
+
+    def __init__(self, database, max_queued: Optional[int], poll_seconds: float = 1.0):
+        self.database = database
+        self.max_queued = max_queued
+        self.poll_seconds = poll_seconds
+
+    async def queued(self) -> Optional[int]:
+        try:
+            status = await self.database.client.admin.command("serverStatus")
+        except Exception as e:
+            logger.warning(f"serverStatus unavailable, load guard disabled: {e}")
+            self.max_queued = None
+            return None
+        return status.get("globalLock", {}).get("currentQueue", {}).get("total", 0)
+
+    async def wait(self) -> float:
+        """Seconds spent waiting"""
+        waited = 0.0
+        while self.max_queued is not None:
+            queued = await self.queued()
+            if queued is None or queued <= self.max_queued:
+                break
+            logger.info(f"Primary busy ({queued} queued), pausing {self.poll_seconds:.0f}s")
+            await asyncio.sleep(self.poll_seconds)
+            waited += self.poll_seconds
+        return waited
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+class BatchContext:
+    """What apply() writes through; counts per collection"""
+
+    def __init__(self, database, limiter: RateLimiter, dry_run: bool):
+        self.database = database
+        self.limiter = limiter
+        self.dry_run = dry_run
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    def count(self, cname: str, key: str, n: int = 1) -> None:
+        row = self.counts.setdefault(cname, {})
+        row[key] = row.get(key, 0) + n
+
+    async def bulk_write(self, cname: str, ops: List) -> None:
+        if not ops:
+            return
+        for op in ops:
+            self.count(cname, type(op).__name__)
+        if self.dry_run:
+            return
+        await self.limiter.acquire(len(ops))
+        result = await self.database[cname].bulk_write(ops, ordered=False)
+        self.count(cname, "inserted", result.inserted_count)
+        self.count(cname, "upserted", result.upserted_count)
+        self.count(cname, "modified", result.modified_count)
+
+class MigrationRunner:
+    def __init__(
+        self,
+        database,
+        migrations: List[Migration],
+        concurrency: int = 4,
+        batch_size: Optional[int] = None,
+        max_writes_per_second: Optional[float] = None,
+        max_queued: Optional[int] = None,
+        dry_run: bool = False
+    ):
+        self.database = database
+        self.migrations = sorted(migrations, key=lambda m: m.version)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.limiter = RateLimiter(max_writes_per_second)
+        self.guard = LoadGuard(database, max_queued)
+        self.dry_run = dry_run
+        self.state = database[MIGRATIONS_COLLECTION]
+
+    async def status(self) -> List[Dict]:
+        states = {s["_id"]: s async for s in self.state.find({})}
+        return [
+            {"version": m.version, "name": m.name, **{k: v for k, v in states.get(m.version, {"status": "pending"}).items() if k != "_id"}}
+            for m in self.migrations
+        ]
+
+    async def run(self, target: Optional[int] = None) -> List[Dict]:
+        """Run every migration up to target (default: all) that is not completed"""
+        reports = []
+        for migration in self.migrations:
+            if target is not None and migration.version > target:
+                break
+            reports.append(await self.run_one(migration))
+        return reports
+
+    async def _read_window(self, migration: Migration, after) -> List[List[Dict]]:
+        batches = []
+        for _ in range(self.concurrency):
+            query = dict(migration.query)
+            if after is not None:
+                query["_id"] = {"$gt": after}
+            batch = await self.database[migration.source].find(query, migration.projection) \
+                .sort("_id", 1).limit(self.batch_size or migration.batch_size).to_list(None)
+            if not batch:
+                break
+            batches.append(batch)
+            after = batch[-1]["_id"]
+        return batches
+
+    async def run_one(self, migration: Migration, restart: bool = False) -> Dict:
+        """Run or resume one migration; restart=True rescans a completed one"""
+        label = f"{migration.version:04d}_{migration.name}"
+        state = await self.state.find_one({"_id": migration.version}) or {}
+        if state.get("status") == "completed" and not restart:
+            logger.info(f"[{label}] already completed")
+            return {"version": migration.version, "name": migration.name, "status": "completed", "skipped": True}
+
+        resuming = state.get("status") == "running"
+        cursor = state.get("cursor") if resuming else None
+        processed = state.get("processed", 0) if resuming else 0
+        ctx = BatchContext(self.database, self.limiter, self.dry_run)
+        started = time.perf_counter()
+        paused = 0.0
+
+        pending = await self.database[migration.source].count_documents(
+            {**migration.query, **({"_id": {"$gt": cursor}} if cursor is not None else {})}
+        )
+        logger.info(f"[{label}] {'dry run: ' if self.dry_run else ''}{pending:,} {migration.source} documents to scan"
+                    + (f" (resuming after {cursor})" if cursor is not None else ""))
+
+        if not self.dry_run:
+            await self.state.update_one(
+                {"_id": migration.version},
+                {"$set": {"name": migration.name, "status": "running", "cursor": cursor, "processed": processed,
+                          "updated_at": datetime.utcnow()},
+                 "$setOnInsert": {"started_at": datetime.utcnow()}},
+                upsert=True
+            )
+
+        while True:
+            paused += await self.guard.wait()
+            batches = await self._read_window(migration, cursor)
+            if not batches:
+                break
+            await asyncio.gather(*[migration.apply(batch, ctx) for batch in batches])
+
+            cursor = batches[-1][-1]["_id"]
+            processed += sum(len(b) for b in batches)
+            if not self.dry_run:
+                await self.state.update_one(
+                    {"_id": migration.version},
+                    {"$set": {"cursor": cursor, "processed": processed, "counts": ctx.counts,
+                              "updated_at": datetime.utcnow()}}
+                )
+            elapsed = time.perf_counter() - started
+            logger.info(f"[{label}] {processed:,} processed ({processed / max(elapsed, 1e-9):,.0f}/s)")
+
+        report = {
+            "version": migration.version,
+            "name": migration.name,
+            "dry_run": self.dry_run,
+            "pending": pending,
+            "processed": processed,
+            "counts": ctx.counts,
+            "seconds": round(time.perf_counter() - started, 2),
+            "paused_seconds": paused,
+        }
+        if self.dry_run:
+            report["status"] = "dry_run"
+            return report
+
+        verified = await migration.verify(self.database)
+        report["status"] = "completed" if verified else "unverified"
+        await self.state.update_one(
+            {"_id": migration.version},
+            {"$set": {"status": report["status"], "counts": ctx.counts, "updated_at": datetime.utcnow(),
+                      **({"completed_at": datetime.utcnow()} if verified else {})}}
+        )
+        logger.info(f"[{label}] {report['status']}: {ctx.counts}")
+        return report
+
+# ============================================================================
+# COMMAND LINE INTERFACE
+# ============================================================================
+
+def registered_migrations() -> List[Migration]:
+    """Every migration, in version order"""
+    from db.migrations.phase1_migration import Phase1PersonalGroups
+    return [Phase1PersonalGroups()]
+
+def add_runner_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--dry-run", action="store_true", help="Count pending documents and writes; change nothing")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batches applied at once")
+    parser.add_argument("--batch-size", type=int, help="Documents per batch (default: per migration)")
+    parser.add_argument("--max-writes-per-second", type=float, help="Write ops per second across all batches")
+    parser.add_argument("--max-queued", type=int, help="Pause while the primary has more operations queued")
+
+def runner_from_args(database, migrations, args) -> MigrationRunner:
+    return MigrationRunner(
+        database,
+        migrations,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        max_writes_per_second=args.max_writes_per_second,
+        max_queued=args.max_queued,
+        dry_run=args.dry_run
+    )
+
+async def _main(args):
+    from db.client import get_db, close
+    try:
+        runner = runner_from_args(get_db(), registered_migrations(), args)
+        if args.status:
+            for row in await runner.status():
+                print(f"{row['version']:04d} {row['name']:<28} {row['status']:<10} processed={row.get('processed', 0):,}")
+            return
+        for report in await runner.run(args.target):
+            print(report)
+    finally:
+        close()
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Run pending data migrations")
+    parser.add_argument("--status", action="store_true", help="Show migration states and exit")
+    parser.add_argument("--target", type=int, help="Stop after this version")
+    add_runner_arguments(parser)
+    asyncio.run(_main(parser.parse_args(argv)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# migrations/partial_indexes_migration.py
+"""
+Partial Index Migration: index only active groups and memberships
+
+groups and group_members are soft-deleted (is_active: False), and every
+lookup filters on is_active: True. This migration replaces their full
+indexes with the partial ones declared in db/init.py:
+
+groups
+    idx_created_by, idx_is_active, idx_creator_active
+    -> idx_created_by_active {created_by} where is_active
+group_members
+    idx_group_user_unique, idx_user, idx_group, idx_group_active
+    -> idx_group_user_active_unique {group_id, user_id} unique where is_active
+    -> idx_user_active {user_id} where is_active
+
+The unique index now only covers active memberships, so a member who
+left or was removed can be added back.
+
+New indexes are built before the old ones are dropped, so lookups and
+the uniqueness guarantee are never without an index. Servers that refuse
+two indexes on one key pattern get the old index dropped first.
+
+Index sizes are reported before and after.
+
+This migration is SAFE and IDEMPOTENT: already-migrated collections are
+left alone.
+
+Usage (from 1.Backend):
+    python db/migrations/partial_indexes_migration.py [--dry-run]
+"""
+
+import sys
+import pathlib
+import asyncio
+import logging
+
+# Add parent directory to path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+from db.client import db
+from db.init import COLLECTION_INDEXES, RETIRED_INDEXES as DECLARED_RETIRED
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+RETIRED_INDEXES = {cname: DECLARED_RETIRED[cname] for cname in ("groups", "group_members")}
+
+# IndexOptionsConflict, IndexKeySpecsConflict
+CONFLICT_CODES = {85, 86}
+
+# ============================================================================
+# MIGRATION FUNCTIONS
+# ============================================================================
+
+async def index_sizes(cname: str) -> dict:
+    """Index name -> size in bytes"""
+    stats = await db[cname].aggregate([{"$collStats": {"storageStats": {}}}]).to_list(None)
+    return dict(stats[0]["storageStats"].get("indexSizes", {})) if stats else {}
+
+def _model(spec) -> IndexModel:
+    return IndexModel(spec["key"], **{k: v for k, v in spec.items() if k != "key"})
+
+def _same_key(a, b) -> bool:
+    return [(f, int(d)) for f, d in a] == [(f, int(d)) for f, d in b]
+
+async def migrate_collection(cname: str, dry_run: bool = False) -> dict:
+    """Build the partial indexes, then drop the retired ones"""
+    collection = db[cname]
+    existing = await collection.index_information()
+    wanted = [spec for spec in COLLECTION_INDEXES[cname] if spec["name"] not in existing]
+    retired = [name for name in RETIRED_INDEXES[cname] if name in existing]
+
+    for spec in wanted:
+        logger.info(f"{cname}: create {spec['name']}")
+        if dry_run:
+            continue
+        try:
+            await collection.create_indexes([_model(spec)])
+        except OperationFailure as e:
+            if e.code not in CONFLICT_CODES:
+                raise
+            # Old server: one index per key pattern; drop the full index first
+            for name in list(retired):
+                if _same_key(existing[name]["key"], spec["key"]):
+                    logger.info(f"{cname}: drop {name} first (same key pattern)")
+                    await collection.drop_index(name)
+                    retired.remove(name)
+            await collection.create_indexes([_model(spec)])
+
+    for name in retired:
+        logger.info(f"{cname}: drop {name}")
+        if not dry_run:
+            await collection.drop_index(name)
+
+    return {"created": [s["name"] for s in wanted], "dropped": retired}
+
+def _total(sizes: dict) -> int:
+    return sum(size for name, size in sizes.items() if name != "_id_")
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:.2f}MB"
+
+# ============================================================================
+# MAIN MIGRATION SCRIPT
+# ============================================================================
+
+async def run_migration(dry_run: bool = False) -> dict:
+    """
+    Main migration function.
+    Safe to run multiple times - will skip already migrated indexes.
+    """
+    logger.info("="*70)
+    logger.info("PARTIAL INDEX MIGRATION: index only active groups and memberships")
+    logger.info("="*70)
+
+    report = {}
+    try:
+        for cname in RETIRED_INDEXES:
+            before = await index_sizes(cname)
+            changes = await migrate_collection(cname, dry_run)
+            after = before if dry_run else await index_sizes(cname)
+            report[cname] = {**changes, "before": before, "after": after}
+
+        logger.info(f"\n{'='*70}")
+        logger.info("INDEX SIZES (secondary indexes)")
+        logger.info(f"{'='*70}")
+        for cname, row in report.items():
+            saved = _total(row["before"]) - _total(row["after"])
+            logger.info(f"{cname}: {_mb(_total(row['before']))} -> {_mb(_total(row['after']))}  (saved {_mb(saved)})")
+            for name in sorted(set(row["before"]) | set(row["after"])):
+                before = row["before"].get(name)
+                after = row["after"].get(name)
+                logger.info(f"    {name:<32} {_mb(before) if before is not None else '-':>10} -> "
+                            f"{_mb(after) if after is not None else '-':>10}")
+
+        logger.info("\n✓ DRY RUN COMPLETE (no changes made)" if dry_run else "\n✓ MIGRATION COMPLETED SUCCESSFULLY")
+        return report
+
+    except Exception as e:
+        logger.error(f"\n✗ MIGRATION FAILED: {e}")
+        raise
+
+# ============================================================================
+# COMMAND LINE INTERFACE
+# ============================================================================
+
+if __name__ == "__main__":
+    asyncio.run(run_migration(dry_run="--dry-run" in sys.argv[1:]))
@@ -14,19 +14,33 @@ This migration is SAFE and IDEMPOTENT:
 - Does not delete or modify existing data structure
 - Only adds new fields and relationships
 - Preserves backward compatibility
+
+It runs on the migration framework (version 1): users are scanned in
+batches, each batch is a few bulk writes (group upserts, membership
+upserts, one expense update per user), batches run concurrently, and
+progress is checkpointed so a large run can be throttled and resumed.
+
+Usage (from 1.Backend):
+    python db/migrations/phase1_migration.py [--dry-run] [--concurrency 4]
+        [--max-writes-per-second 2000] [--max-queued 50]
+    python db/migrations/phase1_migration.py --rollback
 """
 
 import sys
 import pathlib
+import argparse
 import asyncio
 from datetime import datetime
 import logging
+from typing import Dict, List
 
 # Add parent directory to path
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from pymongo import UpdateMany, UpdateOne
+
 from db.client import (
     db,
     users_col,
@@ -34,6 +48,7 @@ from db.client import (
     groups_col,
     group_members_col
 )
+from db.migrations.framework import BatchContext, Migration, MigrationRunner, add_runner_arguments, runner_from_args
 
 # Configure logging
 logging.basicConfig(
@@ -60,7 +75,8 @@ async def create_personal_group_for_user(user_id: str, user_email: str):
     # Check if personal group already exists for this user
     existing_group = await groups_col.find_one({
         "created_by": user_id,
-        "group_type": "personal"
+        "group_type": "personal",
+        "is_active": True  # matches the partial idx_created_by_active
     })
     
     if existing_group:
@@ -131,6 +147,73 @@ async def migrate_user_expenses(user_id: str, group_id: str, user_email: str):
     logger.info(f"Migrated {result.modified_count} expenses for user {user_email} to group {group_id}")
     return result.modified_count
 
+# ============================================================================
+# BATCHED MIGRATION (framework client)
+# ============================================================================
+
+def personal_group_filter(user_id: str) -> Dict:
+    return {"created_by": user_id, "group_type": "personal", "is_active": True}
+
+class Phase1PersonalGroups(Migration):
+    """Personal group, admin membership and expense backfill per user"""
+
+    version = 1
+    name = "phase1_personal_groups"
+    source = "users"
+    projection = {"_id": 1}
+    batch_size = 500
+
+    async def apply(self, batch: List[Dict], ctx: BatchContext) -> None:
+        user_ids = [str(u["_id"]) for u in batch]
+        now = datetime.utcnow()
+
+        # 1. Personal groups (upsert: existing groups are left untouched)
+        await ctx.bulk_write("groups", [
+            UpdateOne(personal_group_filter(uid), {"$setOnInsert": {
+                "name": "Personal",
+                "description": "Personal expenses (auto-created during migration)",
+                "created_at": now,
+                "updated_at": now
+            }}, upsert=True)
+            for uid in user_ids
+        ])
+        groups = await groups_col.find(
+            {"created_by": {"$in": user_ids}, "group_type": "personal", "is_active": True},
+            {"_id": 1, "created_by": 1}
+        ).to_list(None)
+        group_by_user = {g["created_by"]: str(g["_id"]) for g in groups}
+
+        # 2. Admin membership of the Personal group
+        await ctx.bulk_write("group_members", [
+            UpdateOne(
+                {"group_id": group_by_user[uid], "user_id": uid, "is_active": True},
+                {"$setOnInsert": {"role": "admin", "joined_at": now}},
+                upsert=True
+            )
+            for uid in user_ids if uid in group_by_user
+        ])
+
+        # 3. Expenses without a group move to the Personal group
+        if ctx.dry_run:
+            pending = await expenses_col.count_documents({"user_id": {"$in": user_ids}, "group_id": {"$exists": False}})
+            ctx.count("expenses", "documents", pending)
+            ctx.count("groups", "missing", len(user_ids) - len(group_by_user))
+        await ctx.bulk_write("expenses", [
+            UpdateMany(
+                {"user_id": uid, "group_id": {"$exists": False}},
+                {"$set": {
+                    "group_id": group_by_user.get(uid),
+                    "paid_by": uid,  # User paid for their own expenses
+                    "split_type": "none",  # Personal expenses have no splits
+                    "updated_at": now
+                }}
+            )
+            for uid in user_ids if uid in group_by_user or ctx.dry_run
+        ])
+
+    async def verify(self, database) -> bool:
+        return await verify_migration()
+
 async def verify_migration():
     """Verify that migration completed successfully"""
     logger.info("=== Verifying Migration ===")
@@ -162,52 +245,34 @@ async def verify_migration():
 # MAIN MIGRATION SCRIPT
 # ============================================================================
 
-async def run_migration():
+async def run_migration(dry_run: bool = False, runner: MigrationRunner = None) -> Dict:
     """
     Main migration function.
     Safe to run multiple times - will skip already migrated data.
+    An interrupted run resumes from its checkpoint; a completed one rescans.
     """
     logger.info("="*70)
     logger.info("PHASE 1 MIGRATION: Migrate Expenses to Group-Based Model")
     logger.info("="*70)
     
     try:
-        # Get all users
-        users = await get_all_users()
+        runner = runner or MigrationRunner(db, [Phase1PersonalGroups()], dry_run=dry_run)
+        report = await runner.run_one(Phase1PersonalGroups(), restart=True)
         
-        if not users:
-            logger.warning("No users found in database. Nothing to migrate.")
-            return
-        
-        total_migrated_expenses = 0
-        
-        # For each user, create Personal group and migrate expenses
-        for user in users:
-            user_id = str(user["_id"])
-            user_email = user.get("email", "unknown")
-            
-            logger.info(f"\n--- Processing user: {user_email} ---")
-            
-            # Create or get Personal group
-            group_id = await create_personal_group_for_user(user_id, user_email)
-            
-            # Migrate expenses
-            migrated_count = await migrate_user_expenses(user_id, group_id, user_email)
-            total_migrated_expenses += migrated_count
-        
-        # Verify migration
         logger.info(f"\n{'='*70}")
         logger.info(f"MIGRATION SUMMARY")
         logger.info(f"{'='*70}")
-        logger.info(f"Total users processed: {len(users)}")
-        logger.info(f"Total expenses migrated: {total_migrated_expenses}")
-        
-        success = await verify_migration()
+        logger.info(f"Total users processed: {report['processed']}")
+        for cname, counts in report["counts"].items():
+            logger.info(f"{cname}: {counts}")
         
-        if success:
+        if report["status"] == "dry_run":
+            logger.info("\n✓ DRY RUN COMPLETE (no changes made)")
+        elif report["status"] == "completed":
             logger.info("\n✓ MIGRATION COMPLETED SUCCESSFULLY")
         else:
             logger.error("\n✗ MIGRATION COMPLETED WITH WARNINGS - Please review logs")
+        return report
         
     except Exception as e:
         logger.error(f"\n✗ MIGRATION FAILED: {e}")
@@ -261,9 +326,12 @@ async def rollback_migration():
 # ============================================================================
 
 if __name__ == "__main__":
-    import sys
+    parser = argparse.ArgumentParser(description="Phase 1: Personal groups for existing users")
+    parser.add_argument("--rollback", action="store_true")
+    add_runner_arguments(parser)
+    args = parser.parse_args()
     
-    if len(sys.argv) > 1 and sys.argv[1] == "--rollback":
+    if args.rollback:
         print("\n⚠️  WARNING: You are about to ROLLBACK the migration!")
         print("This will remove all Personal groups and reset expenses to pre-migration state.")
         response = input("Are you sure? Type 'yes' to continue: ")
@@ -273,4 +341,4 @@ if __name__ == "__main__":
         else:
             print("Rollback cancelled.")
     else:
-        asyncio.run(run_migration())
+        asyncio.run(run_migration(runner=runner_from_args(db, [Phase1PersonalGroups()], args)))
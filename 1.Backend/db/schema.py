@@ -272,6 +272,51 @@ settlement_json_schema = {
     "additionalProperties": True
 }
 
+# ============================================================================
+# REQUEST DEDUPLICATION SCHEMA
+# ============================================================================
+
+idempotency_key_json_schema = {
+    "bsonType": "object",
+    "required": ["user_id", "tool", "key", "status", "created_at"],
+    "properties": {
+        "_id": {
+            "bsonType": "string",
+            "description": "Composite '<user_id>:<tool>:<key>' (unique)"
+        },
+        "user_id": {
+            "bsonType": "string",
+            "description": "User who sent the request"
+        },
+        "tool": {
+            "bsonType": "string",
+            "description": "Tool the key was used with"
+        },
+        "key": {
+            "bsonType": "string",
+            "description": "Client-supplied idempotency key"
+        },
+        "status": {
+            "bsonType": "string",
+            "enum": ["pending", "completed"],
+            "description": "pending while the first request runs, completed once its result is stored"
+        },
+        "result": {
+            "bsonType": "object",
+            "description": "Original tool result, replayed for retries"
+        },
+        "created_at": {
+            "bsonType": "date",
+            "description": "First-seen timestamp (TTL index field)"
+        },
+        "completed_at": {
+            "bsonType": "date",
+            "description": "When the result was stored"
+        }
+    },
+    "additionalProperties": True
+}
+
 # ============================================================================
 # SCHEMA REGISTRY (for easy access in init.py)
 # ============================================================================
@@ -283,5 +328,6 @@ COLLECTION_SCHEMAS = {
     "group_members": group_member_json_schema,
     "expense_participants": expense_participant_json_schema,
     "balances": balance_json_schema,
-    "settlements": settlement_json_schema
+    "settlements": settlement_json_schema,
+    "idempotency_keys": idempotency_key_json_schema
 }
@@ -0,0 +1,25 @@
+# gateway/__init__.py
+"""
+Helpers for the FastAPI gateway (main.py)
+"""
+
+from .events import EventBroker, sse_stream
+from .etag import compute_etag, etag_matches, VERSIONED_TOOLS
+from .responses import ORJSONResponse
+from .compression import CompressionMiddleware
+from .rate_limit import RateLimitStore, InMemoryRateLimitStore, RateLimiter, rate_limiter_from_env, retry_after_header
+
+__all__ = [
+    'EventBroker',
+    'sse_stream',
+    'compute_etag',
+    'etag_matches',
+    'VERSIONED_TOOLS',
+    'ORJSONResponse',
+    'CompressionMiddleware',
+    'RateLimitStore',
+    'InMemoryRateLimitStore',
+    'RateLimiter',
+    'rate_limiter_from_env',
+    'retry_after_header'
+]
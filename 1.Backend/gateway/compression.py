@@ -0,0 +1,167 @@
+# gateway/compression.py
+"""
+Response compression
+
+ASGI middleware that compresses complete (single-message) responses above
+a size threshold with the encoding the client ranks highest (q-value);
+brotli wins ties with gzip.
+
+Every complete response of a compressible type, compressed or not (too
+small, no Accept-Encoding, 304), carries Vary: Accept-Encoding so shared
+caches keep the variants apart.
+
+Streaming responses (/events, /export/expenses) pass through untouched:
+SSE must not be buffered, and exports already offer their own gzip.
+
+Brotli is optional; without the brotli (or brotlicffi) package only gzip
+is offered.
+"""
+
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+# Quality 4-5 gives most of brotli's size win at gzip-like speed
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "text/",
+    "application/x-ndjson",
+)
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick 'br' or 'gzip' from an Accept-Encoding header, or None"""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip()] = q
+
+    wildcard = offered.get("*", 0.0)
+    # Server preference order; max() keeps the first of equal q-values
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda name: offered.get(name, wildcard))
+    q = offered.get(best, wildcard)
+    if q <= 0 or q < offered.get("identity", 0.0):
+        return None
+    return best
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+class CompressionMiddleware:
+    """Compress complete responses of at least minimum_size bytes"""
+
+    def __init__(self, app, minimum_size: int = MIN_COMPRESS_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for name, value in scope.get("headers", ()):
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept) if accept else None
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            if start_message is not None:
+                start, start_message = start_message, None
+                body = message.get("body", b"")
+                if message.get("more_body", False):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                if encoding is None or not self._should_compress(start, body):
+                    await send(self._with_vary(start))
+                    await send(message)
+                    return
+
+                compressed = compress(body, encoding)
+                headers = [
+                    (k, v) for k, v in self._with_vary(start)["headers"]
+                    if k not in (b"content-length", b"content-encoding")
+                ]
+                headers += [
+                    (b"content-encoding", encoding.encode("latin-1")),
+                    (b"content-length", str(len(compressed)).encode("latin-1")),
+                ]
+                await send({**start, "headers": headers})
+                await send({"type": "http.response.body", "body": compressed})
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+        # Responses without a body (e.g. 304) never reach the body branch
+        if start_message is not None:
+            await send(self._with_vary(start_message))
+
+    @staticmethod
+    def _negotiable(start) -> bool:
+        """Whether this response could be compressed for some client"""
+        content_type = None
+        for name, value in start["headers"]:
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value.decode("latin-1").lower()
+        if content_type is None:
+            return True  # no body (304, 204): the full response would have one
+        if content_type.startswith("text/event-stream"):
+            return False
+        return any(content_type.startswith(t) for t in COMPRESSIBLE_TYPES)
+
+    def _should_compress(self, start, body: bytes) -> bool:
+        return len(body) >= self.minimum_size and self._negotiable(start)
+
+    def _with_vary(self, start):
+        """start message with Accept-Encoding added to Vary (if negotiable)"""
+        if not self._negotiable(start):
+            return start
+        headers = list(start["headers"])
+        for i, (name, value) in enumerate(headers):
+            if name == b"vary":
+                fields = [f.strip().lower() for f in value.decode("latin-1").split(",")]
+                if "accept-encoding" not in fields and "*" not in fields:
+                    headers[i] = (name, value + b", Accept-Encoding")
+                break
+        else:
+            headers.append((b"vary", b"Accept-Encoding"))
+        return {**start, "headers": headers}
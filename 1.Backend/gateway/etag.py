@@ -0,0 +1,140 @@
+# gateway/etag.py
+"""
+Conditional reads for MCP tools
+
+For read-only tools the gateway derives a version token from the same
+filter the tool uses: a document count (count_documents, answered from
+the filter's index without fetching documents) and the newest _id (a
+top-1 sort that reads one document), or updated_at where documents are
+edited in place. Nothing is fetched when the count is 0. The token is hashed
+with the user, tool and arguments into an ETag, so a client sending
+If-None-Match gets a 304 without the tool running, the result set being
+materialized or the LLM being called.
+
+Count catches deletes and soft-deletes (is_active filter), max _id catches
+inserts. Expenses are never edited in place by the tools, so that is
+enough for them; groups carry updated_at for renames.
+
+In-place updates change neither the count nor the newest _id, so they
+do not change the ETag: a migration or a manual $set on expenses leaves
+clients with their cached (old) bodies until the next insert or delete.
+Bump the data another way (or have clients drop If-None-Match) after
+such a change.
+
+The token is computed before the tool runs. A write landing in between
+makes the ETag older than the body, which only costs one extra 200 on
+the next request; it can never produce a stale 304.
+"""
+
+import hashlib
+import json
+from typing import Awaitable, Callable, Dict, Optional
+
+from bson import ObjectId
+
+# ============================================================================
+# VERSION QUERIES
+# ============================================================================
+
+async def _stats(collection, match: Dict, max_field: str = "_id") -> list:
+    """[count, max(max_field)] for documents matching the filter"""
+    count = await collection.count_documents(match)
+    if not count:
+        return [0, None]
+    newest = await collection.find(match, {max_field: 1}).sort(max_field, -1).limit(1).to_list(1)
+    return [count, newest[0].get(max_field) if newest else None]
+
+def _date_filter(args: Dict) -> Optional[Dict]:
+    start_date, end_date = args.get("start_date"), args.get("end_date")
+    if start_date and end_date:
+        return {"$gte": start_date, "$lte": end_date}
+    if start_date:
+        return {"$gte": start_date}
+    if end_date:
+        return {"$lte": end_date}
+    return None
+
+async def _personal_expenses_version(db, user_id: str, args: Dict):
+    match = {"user_id": user_id}
+    date_filter = _date_filter(args)
+    if date_filter:
+        match["date"] = date_filter
+    if args.get("category"):
+        match["category"] = args["category"]
+    return await _stats(db["expenses"], match)
+
+async def _group_expenses_version(db, user_id: str, args: Dict):
+    group_id = args.get("group_id")
+    if not isinstance(group_id, str):
+        return None
+    member = await db["group_members"].find_one(
+        {"group_id": group_id, "user_id": user_id, "is_active": True},
+        {"_id": 1}
+    )
+    if not member:
+        return None  # let the tool produce its access error
+
+    match = {"group_id": group_id}
+    date_filter = _date_filter(args)
+    if date_filter:
+        match["date"] = date_filter
+    return await _stats(db["expenses"], match)
+
+async def _groups_version(db, user_id: str, args: Dict):
+    memberships = await db["group_members"].find(
+        {"user_id": user_id, "is_active": True},
+        {"_id": 0, "group_id": 1, "role": 1}
+    ).to_list(None)
+    if not memberships:
+        return [0]
+
+    group_ids = sorted(m["group_id"] for m in memberships)
+    object_ids = [ObjectId(g) for g in group_ids if ObjectId.is_valid(g)]
+    groups = await _stats(db["groups"], {"_id": {"$in": object_ids}, "is_active": True}, "updated_at")
+    members = await _stats(db["group_members"], {"group_id": {"$in": group_ids}, "is_active": True})
+    roles = sorted((m["group_id"], m.get("role")) for m in memberships)
+    return [roles, groups, members]
+
+VERSIONED_TOOLS: Dict[str, Callable[..., Awaitable]] = {
+    "list_expenses": _personal_expenses_version,
+    "summarize": _personal_expenses_version,
+    "list_group_expenses": _group_expenses_version,
+    "list_groups": _groups_version,
+}
+
+# ============================================================================
+# ETAGS
+# ============================================================================
+
+def make_etag(user_id: str, tool: str, args: Dict, version) -> str:
+    """Weak ETag over (user, tool, args, version)"""
+    payload = json.dumps([user_id, tool, args, version], sort_keys=True, default=str, separators=(",", ":"))
+    return f'W/"{hashlib.sha1(payload.encode("utf-8")).hexdigest()[:32]}"'
+
+async def compute_etag(db, user_id: str, tool: str, args: Dict) -> Optional[str]:
+    """
+    ETag for a read tool call, or None if the tool is not versioned or the
+    version cannot be determined (in which case the tool just runs).
+    """
+    version_fn = VERSIONED_TOOLS.get(tool)
+    if version_fn is None:
+        return None
+    version = await version_fn(db, user_id, args)
+    if version is None:
+        return None
+    return make_etag(user_id, tool, args, version)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison against an If-None-Match header"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
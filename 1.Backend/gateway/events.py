@@ -0,0 +1,313 @@
+# gateway/events.py
+"""
+Server-sent change events
+
+One MongoDB change stream per gateway process watches expenses,
+expense_participants and group_members. Each change is reduced to a small
+event, serialized once, and pushed onto the queues of the connected
+clients it concerns:
+- Personal expense        -> its owner
+- Group expense           -> every subscriber who is a member of the group
+- Expense participant row -> the participant
+- Group membership change -> the group's subscribers and the affected user
+
+Clients receive what changed (collection, id, group) and re-fetch through
+the existing tools; the payload never carries expense contents.
+
+Deletes can only be routed when the collection has change stream
+pre-images enabled (MongoDB 6.0+; older servers are not asked for them);
+otherwise they are dropped.
+
+If the stream cannot be resumed (the resume token fell off the oplog),
+it restarts from the current time and every client gets a "resync"
+event, since changes in between were missed.
+
+Per-client queues are bounded. A client that falls behind gets a single
+"resync" event instead of an unbounded backlog, so one slow connection
+cannot hold memory for everyone else.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Optional, Set
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+WATCHED_COLLECTIONS = ["expenses", "expense_participants", "group_members"]
+
+SUBSCRIBER_QUEUE_SIZE = 256
+HEARTBEAT_SECONDS = 15.0
+RECONNECT_MIN_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 30.0
+
+# InvalidResumeToken, ChangeStreamFatalError, ChangeStreamHistoryLost
+NON_RESUMABLE_CODES = {260, 280, 286}
+
+# Only the fields needed for routing leave the server
+CHANGE_STREAM_PIPELINE = [
+    {"$match": {"ns.coll": {"$in": WATCHED_COLLECTIONS}}},
+    {"$project": {
+        "operationType": 1,
+        "ns.coll": 1,
+        "documentKey": 1,
+        "fullDocument.user_id": 1,
+        "fullDocument.group_id": 1,
+        "fullDocument.expense_id": 1,
+        "fullDocument.is_active": 1,
+        "fullDocumentBeforeChange.user_id": 1,
+        "fullDocumentBeforeChange.group_id": 1,
+        "fullDocumentBeforeChange.expense_id": 1,
+    }}
+]
+
+RESYNC_EVENT = "event: resync\ndata: {}\n\n"
+
+# ============================================================================
+# SUBSCRIPTIONS
+# ============================================================================
+
+class Subscription:
+    """One connected client"""
+
+    __slots__ = ("user_id", "group_ids", "queue", "lagged")
+
+    def __init__(self, user_id: str, group_ids: Set[str], queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.user_id = user_id
+        self.group_ids = group_ids
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.lagged = False
+
+    def push(self, message: str) -> None:
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Drop the backlog; the client re-fetches everything on resync
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    async def next_message(self, timeout: float) -> Optional[str]:
+        try:
+            message = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if message is RESYNC_EVENT:
+            self.lagged = False
+        return message
+
+# ============================================================================
+# BROKER
+# ============================================================================
+
+def build_event(change: Dict) -> Optional[Dict]:
+    """Reduce a change stream document to the event sent to clients"""
+    collection = change.get("ns", {}).get("coll")
+    if collection not in WATCHED_COLLECTIONS:
+        return None
+
+    doc = change.get("fullDocument") or change.get("fullDocumentBeforeChange") or {}
+    document_key = change.get("documentKey", {}).get("_id")
+
+    return {
+        "collection": collection,
+        "operation": change.get("operationType"),
+        "id": str(document_key) if document_key is not None else None,
+        "user_id": doc.get("user_id"),
+        "group_id": doc.get("group_id"),
+        "expense_id": doc.get("expense_id"),
+        "is_active": doc.get("is_active"),
+    }
+
+def format_sse(event: Dict) -> str:
+    payload = {k: v for k, v in event.items() if v is not None and k != "is_active"}
+    return f"event: {event['collection']}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+class EventBroker:
+    """
+    Shared change stream + fan-out to subscribers.
+
+    The stream starts with the first subscriber and runs until stop().
+    Routing indexes (user -> subscriptions, group -> subscriptions) make
+    each event O(recipients) regardless of how many clients are connected.
+    """
+
+    def __init__(self, db, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.db = db
+        self.queue_size = queue_size
+        self._by_user: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._by_group: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._task: Optional[asyncio.Task] = None
+        self._resume_token = None
+        self._pre_images: Optional[bool] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._by_user.values())
+
+    async def subscribe(self, user_id: str) -> Subscription:
+        memberships = await self.db["group_members"].find(
+            {"user_id": user_id, "is_active": True},
+            {"_id": 0, "group_id": 1}
+        ).to_list(None)
+
+        subscription = Subscription(user_id, {m["group_id"] for m in memberships}, self.queue_size)
+        self.register(subscription)
+        self._ensure_running()
+        return subscription
+
+    def register(self, subscription: Subscription) -> None:
+        """Add a subscription to the routing indexes"""
+        self._by_user[subscription.user_id].add(subscription)
+        for group_id in subscription.group_ids:
+            self._by_group[group_id].add(subscription)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._discard(self._by_user, subscription.user_id, subscription)
+        for group_id in subscription.group_ids:
+            self._discard(self._by_group, group_id, subscription)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[Subscription]], key: str, subscription: Subscription) -> None:
+        subs = index.get(key)
+        if subs is None:
+            return
+        subs.discard(subscription)
+        if not subs:
+            del index[key]
+
+    def resync_all(self) -> None:
+        """Tell every client to re-fetch (events were missed)"""
+        for subs in self._by_user.values():
+            for subscription in subs:
+                subscription.push(RESYNC_EVENT)
+
+    # ------------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------------
+
+    def dispatch(self, event: Dict) -> int:
+        """Deliver one event; returns the number of recipients"""
+        if event["collection"] == "group_members":
+            self._apply_membership(event)
+
+        recipients: Set[Subscription] = set()
+        if event.get("group_id"):
+            recipients.update(self._by_group.get(event["group_id"], ()))
+        if event.get("user_id") and (event["collection"] != "expenses" or not event.get("group_id")):
+            recipients.update(self._by_user.get(event["user_id"], ()))
+
+        if not recipients:
+            return 0
+
+        message = format_sse(event)
+        for subscription in recipients:
+            subscription.push(message)
+        return len(recipients)
+
+    def _apply_membership(self, event: Dict) -> None:
+        """Keep the group index in step with joins and removals"""
+        user_id, group_id = event.get("user_id"), event.get("group_id")
+        if not user_id or not group_id:
+            return
+
+        active = event["operation"] != "delete" and event.get("is_active") is not False
+        for subscription in self._by_user.get(user_id, ()):
+            if active and group_id not in subscription.group_ids:
+                subscription.group_ids.add(group_id)
+                self._by_group[group_id].add(subscription)
+            elif not active and group_id in subscription.group_ids:
+                # The removed user is still notified via the user index
+                subscription.group_ids.discard(group_id)
+                self._discard(self._by_group, group_id, subscription)
+
+    # ------------------------------------------------------------------------
+    # Change stream
+    # ------------------------------------------------------------------------
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch_options(self) -> Dict:
+        """Pre-images are only understood by MongoDB 6.0+"""
+        if self._pre_images is None:
+            try:
+                info = await self.db.command("buildInfo")
+                self._pre_images = info.get("versionArray", [0])[0] >= 6
+            except Exception:
+                return {}  # retried on the next reconnect
+        return {"full_document_before_change": "whenAvailable"} if self._pre_images else {}
+
+    async def _run(self) -> None:
+        delay = RECONNECT_MIN_SECONDS
+        while True:
+            try:
+                async with self.db.watch(
+                    CHANGE_STREAM_PIPELINE,
+                    full_document="updateLookup",
+                    resume_after=self._resume_token,
+                    **(await self._watch_options())
+                ) as stream:
+                    delay = RECONNECT_MIN_SECONDS
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        event = build_event(change)
+                        if event is not None:
+                            self.dispatch(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(e, OperationFailure) and e.code in NON_RESUMABLE_CODES and self._resume_token is not None:
+                    logger.warning("Change stream cannot resume (%s); restarting from now", e)
+                    self._resume_token = None
+                    self.resync_all()
+                    continue
+                logger.warning("Change stream interrupted (%s); reconnecting in %.1fs", e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+# ============================================================================
+# SSE STREAM
+# ============================================================================
+
+async def sse_stream(
+    broker: EventBroker,
+    user_id: str,
+    is_disconnected,
+    heartbeat_seconds: float = HEARTBEAT_SECONDS
+) -> AsyncIterator[str]:
+    """
+    Yield SSE frames for one client until it disconnects.
+
+    The subscription is made inside the generator, so a client that goes
+    away before the response starts never gets registered.
+
+    A comment line is sent when idle so proxies keep the connection open
+    and disconnects are noticed within heartbeat_seconds.
+    """
+    subscription = await broker.subscribe(user_id)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            message = await subscription.next_message(heartbeat_seconds)
+            if await is_disconnected():
+                break
+            yield message if message is not None else ": keepalive\n\n"
+    finally:
+        broker.unsubscribe(subscription)
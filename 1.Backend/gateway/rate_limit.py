@@ -0,0 +1,218 @@
+# gateway/rate_limit.py
+"""
+Per-user and global request budgets for the gateway
+
+Every /mcp/execute call fans out to the LLM and to a small Mongo pool,
+so one noisy client can slow everyone down. Requests are charged against
+token buckets before any of that work starts:
+
+    llm     tool calls that run through LangGraph (model + MCP server)
+    direct  requests served from Mongo alone: ETag revalidation,
+            /export/expenses
+
+Each class has a per-user bucket and one global bucket. A request needs a
+token from both; if either is empty it is rejected with 429 and a
+Retry-After header, and neither bucket is charged. Budgets are checked
+before the request touches Mongo: a read tool is admitted against
+direct before its ETag is computed, and charged to llm only if it then
+runs.
+
+Budgets are "<requests>/<seconds>" (rate = requests/seconds, burst =
+requests); "off" disables a bucket:
+
+    RATE_LIMIT_LLM_USER       default 20/60
+    RATE_LIMIT_LLM_GLOBAL     default 300/60
+    RATE_LIMIT_DIRECT_USER    default 120/60
+    RATE_LIMIT_DIRECT_GLOBAL  default 1200/60
+    RATE_LIMIT_STORE          memory (default) or module:Class
+
+The in-memory store is per process. With WEB_CONCURRENCY workers each
+worker gets 1/WEB_CONCURRENCY of every budget (connections are spread
+across workers, so this approximates the deployment-wide budget). Exact
+shared budgets need a RateLimitStore backed by a shared store (e.g. a
+Redis Lua script implementing acquire()), named in RATE_LIMIT_STORE.
+"""
+
+import importlib
+import math
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+
+from telemetry.metrics import record_rate_limit
+
+DEFAULT_BUDGETS = {
+    ("llm", "user"): "20/60",
+    ("llm", "global"): "300/60",
+    ("direct", "user"): "120/60",
+    ("direct", "global"): "1200/60",
+}
+
+# ============================================================================
+# BUCKETS
+# ============================================================================
+
+class Budget(NamedTuple):
+    rate: float   # tokens per second
+    burst: float  # bucket size
+
+    @classmethod
+    def parse(cls, value: str) -> Optional["Budget"]:
+        """'20/60' -> 20 requests per 60 seconds; 'off' or '0' -> None"""
+        value = value.strip().lower()
+        if value in ("", "off", "none", "0"):
+            return None
+        requests, _, seconds = value.partition("/")
+        requests, seconds = float(requests), float(seconds or 1)
+        if requests <= 0 or seconds <= 0:
+            raise ValueError(f"Invalid rate limit budget: {value!r}")
+        return cls(requests / seconds, requests)
+
+    def share(self, workers: int) -> "Budget":
+        """This worker's part of a budget split across workers"""
+        if workers <= 1:
+            return self
+        return Budget(self.rate / workers, max(1.0, self.burst / workers))
+
+class Limit(NamedTuple):
+    key: str
+    budget: Budget
+
+class Decision(NamedTuple):
+    allowed: bool
+    retry_after: float           # seconds until every bucket has the tokens
+    remaining: Dict[str, float]  # key -> tokens left
+    blocked_by: Optional[str]    # first key that was short
+
+class RateLimitStore:
+    """
+    Token bucket storage. acquire() must be atomic across the given keys:
+    either every bucket is charged or none is.
+    """
+
+    async def acquire(self, limits: Sequence[Limit], cost: float = 1.0) -> Decision:
+        raise NotImplementedError
+
+    def tracked_keys(self) -> Optional[int]:
+        """Number of buckets held, if known (for metrics)"""
+        return None
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Buckets in a dict, for a single process. acquire() never awaits, so it
+    is atomic on the event loop without a lock.
+
+    A bucket that has refilled completely is the same as no bucket, so
+    full buckets are dropped once more than max_keys are held.
+    """
+
+    def __init__(self, max_keys: int = 10_000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: Dict[str, tuple] = {}  # key -> (tokens, updated, budget)
+
+    @staticmethod
+    def _refill(tokens: float, updated: float, budget: Budget, now: float) -> float:
+        return min(budget.burst, tokens + (now - updated) * budget.rate)
+
+    async def acquire(self, limits: Sequence[Limit], cost: float = 1.0) -> Decision:
+        now = self.clock()
+        tokens = {}
+        for limit in limits:
+            bucket = self._buckets.get(limit.key)
+            tokens[limit.key] = self._refill(*bucket[:2], limit.budget, now) if bucket else limit.budget.burst
+
+        retry_after = 0.0
+        blocked_by = None
+        for limit in limits:
+            deficit = cost - tokens[limit.key]
+            if deficit > 0:
+                retry_after = max(retry_after, deficit / limit.budget.rate)
+                blocked_by = blocked_by or limit.key
+
+        if blocked_by is None:
+            for limit in limits:
+                tokens[limit.key] -= cost
+                self._buckets[limit.key] = (tokens[limit.key], now, limit.budget)
+            if len(self._buckets) > self.max_keys:
+                self._evict(now)
+
+        return Decision(blocked_by is None, retry_after, tokens, blocked_by)
+
+    def _evict(self, now: float) -> None:
+        for key, (tokens, updated, budget) in list(self._buckets.items()):
+            if self._refill(tokens, updated, budget, now) >= budget.burst:
+                del self._buckets[key]
+        # Still over: drop the longest idle (they are the closest to full)
+        excess = len(self._buckets) - self.max_keys
+        if excess > 0:
+            for key in sorted(self._buckets, key=lambda k: self._buckets[k][1])[:excess]:
+                del self._buckets[key]
+
+    def tracked_keys(self) -> int:
+        return len(self._buckets)
+
+# ============================================================================
+# LIMITER
+# ============================================================================
+
+class RateLimiter:
+    """Charges a request against its class's per-user and global buckets"""
+
+    def __init__(self, store: RateLimitStore, budgets: Dict[tuple, Optional[Budget]]):
+        self.store = store
+        self.budgets = budgets
+
+    def limits(self, kind: str, user_id: str) -> List[Limit]:
+        limits = []
+        user_budget = self.budgets.get((kind, "user"))
+        if user_budget:
+            limits.append(Limit(f"{kind}:user:{user_id}", user_budget))
+        global_budget = self.budgets.get((kind, "global"))
+        if global_budget:
+            limits.append(Limit(f"{kind}:global", global_budget))
+        return limits
+
+    async def check(self, kinds: Union[str, Sequence[str]], user_id: str, cost: float = 1.0) -> Decision:
+        """
+        Charge one request to each of kinds ("llm" or ("llm", "direct")),
+        all buckets at once or none.
+        """
+        kinds = (kinds,) if isinstance(kinds, str) else tuple(kinds)
+        limits = [limit for kind in kinds for limit in self.limits(kind, user_id)]
+        if not limits:
+            return Decision(True, 0.0, {}, None)
+        decision = await self.store.acquire(limits, cost)
+        for kind in kinds:
+            if decision.allowed:
+                outcome = "allowed"
+            elif decision.blocked_by.startswith(f"{kind}:"):
+                outcome = "rejected_" + decision.blocked_by.split(":")[1]
+            else:
+                continue
+            record_rate_limit(
+                kind,
+                outcome,
+                global_tokens=decision.remaining.get(f"{kind}:global"),
+                tracked_keys=self.store.tracked_keys()
+            )
+        return decision
+
+def retry_after_header(decision: Decision) -> str:
+    """Retry-After is whole seconds; round up so the retry succeeds"""
+    return str(max(1, math.ceil(decision.retry_after)))
+
+def rate_limiter_from_env() -> RateLimiter:
+    budgets = {
+        (kind, scope): Budget.parse(os.getenv(f"RATE_LIMIT_{kind.upper()}_{scope.upper()}", default))
+        for (kind, scope), default in DEFAULT_BUDGETS.items()
+    }
+    kind = os.getenv("RATE_LIMIT_STORE", "memory").strip()
+    if kind == "memory":
+        store = InMemoryRateLimitStore()
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+        budgets = {key: budget and budget.share(workers) for key, budget in budgets.items()}
+    else:
+        module_name, _, class_name = kind.partition(":")
+        store = getattr(importlib.import_module(module_name), class_name)()
+    return RateLimiter(store, budgets)
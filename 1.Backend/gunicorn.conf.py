@@ -0,0 +1,36 @@
+# gunicorn.conf.py - multi-worker gateway and MCP server
+"""
+Run either service with one uvicorn worker per core (pip install gunicorn):
+
+    gunicorn -c gunicorn.conf.py main:app                          # gateway, :8001
+    PORT=8000 gunicorn -c gunicorn.conf.py --chdir server server:app  # MCP server
+
+uvicorn alone does the same without gunicorn's worker supervision:
+
+    WEB_CONCURRENCY=4 uvicorn main:app --port 8001
+
+WEB_CONCURRENCY sets the worker count (default: CPU count). The app is
+imported in each worker, not preloaded in the master, so every worker
+creates its own Mongo, MCP and LLM clients in its startup hooks.
+
+For /metrics across workers, point PROMETHEUS_MULTIPROC_DIR at an empty
+directory; dead workers' live gauges are removed in child_exit.
+"""
+
+import multiprocessing
+import os
+
+workers = int(os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+bind = f"0.0.0.0:{os.getenv('PORT', '8001')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = False
+graceful_timeout = 30
+timeout = 120  # LLM-backed tool calls can take tens of seconds
+
+# Workers read it to split in-memory rate limit budgets (gateway/rate_limit.py)
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
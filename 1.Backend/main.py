@@ -1,32 +1,53 @@
 # fastapi_auth/main.py - Authentication & MCP Gateway
 from fastapi import FastAPI, HTTPException, Depends, Response, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
 from pydantic import BaseModel, EmailStr
-from motor.motor_asyncio import AsyncIOMotorClient
 import bcrypt
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
-import httpx
 import hashlib
-import json
+import time
 from typing import Optional
 from pathlib import Path
+import asyncio
+import importlib
+import logging
 import sys
 
 # Add client directory to Python path
 CLIENT_DIR = Path(__file__).parent / "client"
 if str(CLIENT_DIR) not in sys.path:
     sys.path.insert(0, str(CLIENT_DIR))
-from langgraph_service import process_tool_call
+from server.utils.export import export_expenses, CONTENT_TYPES
+from gateway import EventBroker, sse_stream, compute_etag, etag_matches, VERSIONED_TOOLS
+from gateway import ORJSONResponse, CompressionMiddleware
+from gateway import rate_limiter_from_env, retry_after_header
+from telemetry import MetricsMiddleware, is_error_result, metrics_payload, record_tool_call
+from telemetry import TracingMiddleware, configure_tracing_from_env, shutdown_tracing, span
+from telemetry import current_tool
+from db.client import db, users_col as users_collection, get_client, connect as connect_db, close as close_db
 
 # Load .env from parent directory
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-app = FastAPI(title="Expense Tracker Auth API")
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Expense Tracker Auth API", default_response_class=ORJSONResponse)
+
+# Compress large JSON responses (brotli or gzip)
+app.add_middleware(CompressionMiddleware)
+
+# Per-route latency histogram (outermost, so it includes compression)
+app.add_middleware(MetricsMiddleware)
+
+# Root span per request (TRACE_EXPORTER=console|file|module:Class)
+configure_tracing_from_env("gateway")
+app.add_middleware(TracingMiddleware)
 
 # CORS Configuration - Update for production
 app.add_middleware(
@@ -39,13 +60,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-# MongoDB Connection
-MONGO_URI = os.getenv("MONGODB_URI")
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["expense_tracker"]
-users_collection = db["users"]
+# MongoDB: db and users_collection are lazy (db/client.py); each worker
+# builds its own Motor client at startup, never sharing one across a fork
+
+# Shared change stream for /events (started by the first subscriber, one per worker)
+event_broker = EventBroker(db)
 
 # Security Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
@@ -54,6 +76,9 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
 security = HTTPBearer()
 
+# Per-user and global budgets for LLM-backed and direct calls (RATE_LIMIT_*)
+rate_limiter = rate_limiter_from_env()
+
 # MCP Server Configuration
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8000")
 
@@ -113,7 +138,8 @@ async def get_current_user(request: Request) -> TokenData:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with span("auth.jwt_decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         user_id: str = payload.get("user_id")
         
@@ -225,28 +251,205 @@ async def get_me(current_user: TokenData = Depends(get_current_user)):
         "created_at": user["created_at"]
     }
 
+# Tools that accept an idempotency_key argument
+IDEMPOTENT_TOOLS = {"add_expense", "add_group_expense"}
+
+# ============================================================================
+# LANGGRAPH SERVICE (loaded lazily)
+# ============================================================================
+
+# langgraph_service pulls in langchain, langgraph, the MCP adapters and the
+# model SDK (~1.5s). It is imported off the event loop in the background at
+# startup, so /health and /auth/* are served immediately; the first tool
+# call waits for it if it is not ready yet.
+_langgraph_task: Optional[asyncio.Task] = None
+
+async def _load_langgraph():
+    service = await asyncio.to_thread(importlib.import_module, "langgraph_service")
+    await service.initialize_client()
+    return service
+
+async def get_langgraph_service():
+    global _langgraph_task
+    if _langgraph_task is None or (_langgraph_task.done() and (_langgraph_task.cancelled() or _langgraph_task.exception())):
+        _langgraph_task = asyncio.ensure_future(_load_langgraph())
+    return await asyncio.shield(_langgraph_task)
+
+async def close_langgraph_service():
+    """Release this worker's MCP client and chat model, if they were built"""
+    task = _langgraph_task
+    if task is None or not task.done() or task.cancelled() or task.exception():
+        return
+    await task.result().close_client()
+
+@app.on_event("startup")
+async def open_db():
+    """Build this worker's Mongo client; the ping runs in the background"""
+    get_client()
+
+    async def ping():
+        try:
+            await connect_db()
+        except Exception as e:
+            logger.warning("MongoDB ping failed at startup: %s", e)
+
+    asyncio.ensure_future(ping())
+
+@app.on_event("startup")
+async def warm_langgraph():
+    async def warm():
+        try:
+            await get_langgraph_service()
+        except Exception as e:
+            # Retried on the first tool call (e.g. MCP server not up yet)
+            logger.warning("LangGraph warm-up failed (%s); retrying on first tool call", e)
+
+    asyncio.ensure_future(warm())
+
+def too_many_requests(decision) -> Response:
+    """429 before any LLM or Mongo work; Retry-After is when the budget refills"""
+    return ORJSONResponse(
+        {"detail": "Rate limit exceeded"},
+        status_code=429,
+        headers={"Retry-After": retry_after_header(decision)}
+    )
+
+async def process_tool_call(tool_name: str, args: dict, user_id: str):
+    service = await get_langgraph_service()
+    return await service.process_tool_call(tool_name=tool_name, args=args, user_id=user_id)
+
 @app.post("/mcp/execute")
 async def execute_mcp_tool(
     request: MCPExecuteRequest,
+    http_request: Request,
     current_user: TokenData = Depends(get_current_user)
 ):
     """
     Gateway using LangGraph - processes tool calls through MCP
+    
+    An Idempotency-Key header is forwarded as idempotency_key to the
+    expense-creating tools, so client retries don't create duplicates.
+    
+    Read tools return an ETag; a matching If-None-Match gets 304 without
+    running the tool.
+    
+    Budgets are checked before any Mongo or LLM work: read tools are
+    admitted against the direct budget before their ETag is computed,
+    and running the tool is charged to the LLM budget. An empty bucket
+    gets 429 with Retry-After.
     """
+    current_tool.set(request.tool)
+    if request.tool in VERSIONED_TOOLS:
+        decision = await rate_limiter.check("direct", current_user.user_id)
+        if not decision.allowed:
+            return too_many_requests(decision)
     try:
+        try:
+            etag = await compute_etag(db, current_user.user_id, request.tool, request.args)
+        except Exception:
+            etag = None
+        if etag and etag_matches(http_request.headers.get("If-None-Match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        args = request.args
+        idempotency_key = http_request.headers.get("Idempotency-Key")
+        if idempotency_key and request.tool in IDEMPOTENT_TOOLS and "idempotency_key" not in args:
+            args = {**args, "idempotency_key": idempotency_key}
+
+        decision = await rate_limiter.check("llm", current_user.user_id)
+        if not decision.allowed:
+            return too_many_requests(decision)
+
         # Process with LangGraph (maintains compatibility with Gemini.js parsing)
-        result = await process_tool_call(
-            tool_name=request.tool,
-            args=request.args,
-            user_id=current_user.user_id
-        )
+        start = time.perf_counter()
+        try:
+            result = await process_tool_call(
+                tool_name=request.tool,
+                args=args,
+                user_id=current_user.user_id
+            )
+        except Exception:
+            record_tool_call("gateway", request.tool, time.perf_counter() - start, error=True)
+            raise
+        record_tool_call("gateway", request.tool, time.perf_counter() - start, error=is_error_result(result))
         
-        # Return the result (already in correct format from MCP)
-        return result
+        headers = {}
+        if etag and not (isinstance(result, dict) and result.get("status") == "error"):
+            headers["ETag"] = etag
+
+        # Return the result (already in correct format from MCP); encoded
+        # directly with orjson, skipping jsonable_encoder
+        return ORJSONResponse(result, headers=headers)
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/export/expenses")
+async def export_expenses_route(
+    format: str = "csv",
+    scope: str = "all",
+    group_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    gzip: bool = False,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Stream the user's personal and/or group expenses as CSV, JSONL or Parquet
+    """
+    decision = await rate_limiter.check("direct", current_user.user_id)
+    if not decision.allowed:
+        return too_many_requests(decision)
+    try:
+        stream = await export_expenses(
+            db,
+            current_user.user_id,
+            fmt=format,
+            scope=scope,
+            group_id=group_id,
+            start_date=start_date,
+            end_date=end_date,
+            compress=gzip
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = f"expenses.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else CONTENT_TYPES[format]
+
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/events")
+async def events(
+    request: Request,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """
+    Server-sent events for changes to the user's expenses and groups
+    """
+    return StreamingResponse(
+        sse_stream(event_broker, current_user.user_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.on_event("shutdown")
+async def stop_event_broker():
+    await event_broker.stop()
+    await close_langgraph_service()
+    close_db()
+    shutdown_tracing()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this gateway process"""
+    body, content_type = metrics_payload()
+    return Response(body, media_type=content_type)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
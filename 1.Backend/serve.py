@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# serve.py - multi-worker launcher for the gateway and the MCP server
+"""
+One uvicorn worker process per core, each with its own event loop and its
+own Mongo, MCP and LLM clients (built in the app's startup hooks, never
+inherited from the supervisor).
+
+    python serve.py main:app --port 8001 --workers 4                   # gateway
+    python serve.py server:app --app-dir server --port 8000 --workers 4 # MCP server
+
+Same as `uvicorn --workers N`, except the shared listening socket gets
+TCP_NODELAY. uvicorn binds it without a protocol number, so asyncio does
+not set TCP_NODELAY on accepted connections, and keep-alive requests
+stall ~40ms on Nagle + delayed ACK; accepted sockets inherit the option
+from the listener.
+
+gunicorn.conf.py runs the same apps under gunicorn instead.
+
+WEB_CONCURRENCY is the default worker count and is exported to the
+workers (gateway/rate_limit.py splits in-memory budgets by it). A
+PROMETHEUS_MULTIPROC_DIR is emptied before the workers start.
+"""
+
+import os
+import sys
+import argparse
+import inspect
+import pathlib
+import socket
+
+def prepare_metrics_dir() -> None:
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return
+    directory = pathlib.Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob("*.db"):
+        stale.unlink()
+
+def serve(app: str, host: str = "0.0.0.0", port: int = 8001, workers: int = 1,
+          log_level: str = "info", access_log: bool = True) -> None:
+    import uvicorn
+    from uvicorn.supervisors import Multiprocess
+
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    prepare_metrics_dir()
+    config = uvicorn.Config(app, host=host, port=port, workers=workers, log_level=log_level, access_log=access_log)
+    if workers <= 1:
+        uvicorn.Server(config).run()
+        return
+
+    sock = config.bind_socket()
+    if sock.family in (socket.AF_INET, socket.AF_INET6):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    if "target" in inspect.signature(Multiprocess).parameters:  # uvicorn < 0.30
+        Multiprocess(config, target=uvicorn.Server(config).run, sockets=[sock]).run()
+    else:
+        Multiprocess(config, sockets=[sock]).run()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an app with several uvicorn workers")
+    parser.add_argument("app", help="Import string, e.g. main:app or server:app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8001")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY") or os.cpu_count() or 1))
+    parser.add_argument("--app-dir", default=".", help="Directory to import the app from")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args(argv)
+
+    # Workers are spawned with the supervisor's sys.path
+    sys.path.insert(0, str(pathlib.Path(args.app_dir).resolve()))
+    serve(args.app, args.host, args.port, args.workers, args.log_level, access_log=not args.no_access_log)
+
+if __name__ == "__main__":
+    main()
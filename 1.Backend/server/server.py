@@ -8,8 +8,10 @@ from fastmcp import FastMCP
 from datetime import datetime
 from bson import ObjectId
 
+import os
 import sys
 import pathlib
+import logging
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
@@ -20,7 +22,7 @@ from db.client import (
     group_members_col,
     expense_participants_col,
     users_col,
-    client
+    close as close_db
 )
 from utils.authorization import (
     is_user_in_group,
@@ -36,19 +38,66 @@ from utils.splits import (
     calculate_splits,
     format_split_summary
 )
+from utils.idempotency import run_idempotent
+from utils.write_batcher import batcher_from_env
+from utils.analytics import (
+    build_summary_pipeline,
+    load_group_docs,
+    build_group_frame,
+    compute_group_analytics
+)
 from decimal import Decimal
+from contextlib import asynccontextmanager
+from starlette.responses import Response
+from telemetry import metrics_payload, configure_tracing_from_env, shutdown_tracing
+from telemetry.mcp_middleware import ToolMetricsMiddleware, ToolTracingMiddleware
+
+logger = logging.getLogger(__name__)
+
+# Optional write coalescing for add_expense (EXPENSE_WRITE_BATCH=1)
+expense_writer = batcher_from_env(expenses_col)
+
+@asynccontextmanager
+async def server_lifespan(server):
+    # Schema setup is a fingerprint check once applied (DB_SETUP_ON_BOOT=1)
+    if os.getenv("DB_SETUP_ON_BOOT", "0").lower() in ("1", "true", "yes"):
+        from db.init import setup_collection_hybrid
+        try:
+            await setup_collection_hybrid()
+        except Exception as e:
+            logger.warning(f"Database setup on boot failed: {e}")
+    try:
+        yield
+    finally:
+        # Don't drop buffered expenses on shutdown
+        if expense_writer is not None:
+            await expense_writer.close()
+        close_db()
+        shutdown_tracing()
+
+configure_tracing_from_env("mcp-server")
+
+mcp = FastMCP("ExpenseTracker", lifespan=server_lifespan)
+mcp.add_middleware(ToolMetricsMiddleware())
+mcp.add_middleware(ToolTracingMiddleware())
 
-mcp = FastMCP("ExpenseTracker")
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request):
+    body, content_type = metrics_payload()
+    return Response(body, media_type=content_type)
 
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
 def serialize(doc):
-    """Convert MongoDB document to JSON-serializable dict"""
-    doc = dict(doc)
-    doc["id"] = str(doc["_id"])
-    del doc["_id"]
+    """
+    Convert MongoDB document to JSON-serializable dict.
+    Works in place: documents come fresh from the driver and are not reused,
+    so copying every listing row is wasted work. datetime values are left
+    as-is for the JSON encoder.
+    """
+    doc["id"] = str(doc.pop("_id"))
     return doc
 
 def validate_object_id(id_str: str) -> bool:
@@ -64,14 +113,27 @@ def validate_object_id(id_str: str) -> bool:
 # ============================================================================
 
 @mcp.tool()
-async def add_expense(user_id: str, date: str, amount: float, category: str, subcategory: str = "", note: str = ""):
+async def add_expense(user_id: str, date: str, amount: float, category: str, subcategory: str = "", note: str = "", idempotency_key: str = None):
     """
     Add a new expense document for authenticated user.
     user_id is automatically injected by FastAPI gateway.
     
     Phase 0: Personal expenses
     Phase 1: Enhanced with optional group_id (for migration compatibility)
+    
+    Pass the same idempotency_key and arguments when retrying to get the original result
+    back instead of creating a duplicate expense.
     """
+    if idempotency_key:
+        # The key is marked completed only after the insert is acknowledged
+        return await run_idempotent(
+            user_id, "add_expense", idempotency_key,
+            lambda: _add_expense(user_id, date, amount, category, subcategory, note, durable=True),
+            args={"date": date, "amount": amount, "category": category, "subcategory": subcategory, "note": note}
+        )
+    return await _add_expense(user_id, date, amount, category, subcategory, note)
+
+async def _add_expense(user_id: str, date: str, amount: float, category: str, subcategory: str, note: str, durable: bool = None):
     try:
         doc = {
             "user_id": user_id,
@@ -82,8 +144,11 @@ async def add_expense(user_id: str, date: str, amount: float, category: str, sub
             "note": note or "",
             "created_at": datetime.utcnow()
         }
-        res = await expenses_col.insert_one(doc)
-        return {"status": "success", "id": str(res.inserted_id)}
+        if expense_writer is not None:
+            inserted_id = await expense_writer.submit(doc, durable=durable)
+        else:
+            inserted_id = (await expenses_col.insert_one(doc)).inserted_id
+        return {"status": "success", "id": str(inserted_id)}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -116,22 +181,8 @@ async def summarize(user_id: str, start_date: str, end_date: str, category: str
     user_id is automatically injected by FastAPI gateway.
     """
     try:
-        match = {
-            "user_id": user_id,
-            "date": {"$gte": start_date, "$lte": end_date}
-        }
-        if category:
-            match["category"] = category
-
-        pipeline = [
-            {"$match": match},
-            {"$group": {
-                "_id": "$category",
-                "total_amount": {"$sum": "$amount"},
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"total_amount": -1}}
-        ]
+        # Index-only: see build_summary_pipeline
+        pipeline = build_summary_pipeline(user_id, start_date, end_date, category)
 
         cursor = expenses_col.aggregate(pipeline)
         out = []
@@ -779,7 +830,8 @@ async def add_group_expense(
     user_amounts: dict = None,
     user_percentages: dict = None,
     subcategory: str = "",
-    note: str = ""
+    note: str = "",
+    idempotency_key: str = None
 ):
     """
     Add an expense to a group with automatic splitting among participants.
@@ -788,7 +840,41 @@ async def add_group_expense(
     - "equal": Divide equally among all participants
     - "exact": Specific amounts for each (provide user_amounts)
     - "percentage": Percentage-based (provide user_percentages)
+    
+    Pass the same idempotency_key and arguments when retrying to get the original result
+    back instead of creating a duplicate expense.
     """
+    args = (
+        user_id, group_id, amount, description, category, date, split_type,
+        participants, user_amounts, user_percentages, subcategory, note
+    )
+    if idempotency_key:
+        return await run_idempotent(
+            user_id, "add_group_expense", idempotency_key,
+            lambda: _add_group_expense(*args),
+            args={
+                "group_id": group_id, "amount": amount, "description": description,
+                "category": category, "date": date, "split_type": split_type,
+                "participants": participants, "user_amounts": user_amounts,
+                "user_percentages": user_percentages, "subcategory": subcategory, "note": note
+            }
+        )
+    return await _add_group_expense(*args)
+
+async def _add_group_expense(
+    user_id: str,
+    group_id: str,
+    amount: float,
+    description: str,
+    category: str,
+    date: str,
+    split_type: str,
+    participants: list,
+    user_amounts: dict,
+    user_percentages: dict,
+    subcategory: str,
+    note: str
+):
     try:
         # Validate inputs
         if not validate_object_id(group_id):
@@ -1065,6 +1151,54 @@ async def get_expense_details(user_id: str, expense_id: str):
     except Exception as e:
         return {"status": "error", "message": f"Failed to get expense details: {str(e)}"}
 
+# ============================================================================
+# GROUP ANALYTICS
+# ============================================================================
+
+@mcp.tool()
+async def group_analytics(user_id: str, group_id: str, start_date: str = None, end_date: str = None):
+    """
+    Spending analytics for a group: per-member paid vs owed, daily spend
+    series and category mix by month.
+    
+    Args:
+        user_id: User ID (injected by FastAPI)
+        group_id: Group ID
+        start_date: Optional start date (YYYY-MM-DD)
+        end_date: Optional end date (YYYY-MM-DD)
+        
+    Returns:
+        {"status": "success", "expense_count": ..., "total_spent": ...,
+         "members": [...], "daily": [...], "category_mix": {...}}
+    """
+    try:
+        if not validate_object_id(group_id):
+            return {"status": "error", "message": "Invalid group ID format"}
+        
+        if not await is_user_in_group(user_id, group_id):
+            return {"status": "error", "message": "Access denied: You are not a member of this group"}
+        
+        docs = await load_group_docs(group_id, start_date, end_date)
+        analytics = compute_group_analytics(build_group_frame(docs))
+        
+        # Attach member details
+        member_ids = [m["user_id"] for m in analytics["members"] if validate_object_id(m["user_id"])]
+        users = await users_col.find(
+            {"_id": {"$in": [ObjectId(uid) for uid in member_ids]}},
+            {"email": 1, "full_name": 1}
+        ).to_list(None)
+        user_map = {str(u["_id"]): u for u in users}
+        
+        for member in analytics["members"]:
+            user = user_map.get(member["user_id"], {})
+            member["email"] = user.get("email", "Unknown")
+            member["full_name"] = user.get("full_name", "Unknown")
+        
+        return {"status": "success", "group_id": group_id, **analytics}
+        
+    except Exception as e:
+        return {"status": "error", "message": f"Failed to compute group analytics: {str(e)}"}
+
 # ============================================================================
 # ADMIN TOOLS
 # ============================================================================
@@ -1077,10 +1211,17 @@ async def setup_database():
     """
     from db.init import setup_collection_hybrid
     try:
-        await setup_collection_hybrid()
-        return {"status": "success", "message": "Database initialized successfully"}
+        summary = await setup_collection_hybrid(force=True)
+        return {"status": "success", "message": "Database initialized successfully", **summary}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+# ASGI app for multi-worker deployments (from server/):
+#     uvicorn server:app --port 8000 --workers 4
+# Stateless: a client's requests may land on different workers, so no
+# MCP session state is kept between them. Each worker runs server_lifespan
+# and builds its own Mongo client on first use.
+app = mcp.http_app(stateless_http=True)
+
 if __name__ == "__main__":
     mcp.run(transport="http", host="0.0.0.0", port=8000)
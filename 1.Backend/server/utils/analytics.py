@@ -0,0 +1,274 @@
+# server/utils/analytics.py
+"""
+Group spending analytics
+
+Loads a group's expenses and participant shares into columnar NumPy arrays
+with a single projected aggregation, then computes:
+- Per-member paid vs owed (and net balance)
+- Daily spend series
+- Category mix per month
+
+Amounts are handled as integer cents so totals match the stored splits
+exactly; they are converted back to 2-decimal floats only for output.
+"""
+
+import sys
+import pathlib
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, List, Optional
+import numpy as np
+
+from db.client import expenses_col
+
+# ============================================================================
+# COLUMNAR FRAME
+# ============================================================================
+
+@dataclass
+class GroupExpenseFrame:
+    """Columnar view of a group's expenses and shares"""
+    # One entry per expense
+    dates: np.ndarray          # datetime64[D] (NaT for unparseable dates)
+    amount_cents: np.ndarray   # int64
+    payer_idx: np.ndarray      # int32 index into members
+    category_idx: np.ndarray   # int32 index into categories
+    # One entry per participant share
+    share_expense_idx: np.ndarray  # int32 index into the expense arrays
+    share_member_idx: np.ndarray   # int32 index into members
+    share_cents: np.ndarray        # int64
+    # Lookup tables
+    members: List[str]
+    categories: List[str]
+
+    @property
+    def expense_count(self) -> int:
+        return len(self.amount_cents)
+
+def build_group_pipeline(group_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
+    """
+    Aggregation that returns every expense in the group with only the
+    fields analytics needs, plus its participant shares.
+    """
+    match = {"group_id": group_id}
+    if start_date and end_date:
+        match["date"] = {"$gte": start_date, "$lte": end_date}
+    elif start_date:
+        match["date"] = {"$gte": start_date}
+    elif end_date:
+        match["date"] = {"$lte": end_date}
+
+    return [
+        {"$match": match},
+        {"$lookup": {
+            "from": "expense_participants",
+            "let": {"eid": {"$toString": "$_id"}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$expense_id", "$$eid"]}}},
+                {"$project": {"_id": 0, "user_id": 1, "share_amount": 1}}
+            ],
+            "as": "shares"
+        }},
+        {"$project": {
+            "_id": 0,
+            "d": "$date",
+            "a": "$amount",
+            "c": "$category",
+            "p": {"$ifNull": ["$paid_by", "$user_id"]},
+            "su": "$shares.user_id",
+            "ss": "$shares.share_amount"
+        }}
+    ]
+
+async def load_group_docs(group_id: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict]:
+    """Run the projected aggregation for a group"""
+    cursor = expenses_col.aggregate(build_group_pipeline(group_id, start_date, end_date), batchSize=10000)
+    return await cursor.to_list(None)
+
+def _to_cents(values) -> np.ndarray:
+    return np.rint(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+
+def _parse_dates(raw: List) -> np.ndarray:
+    """Parse 'YYYY-MM-DD' strings to datetime64[D], NaT where invalid"""
+    trimmed = [d[:10] if isinstance(d, str) else "NaT" for d in raw]
+    try:
+        return np.array(trimmed, dtype="datetime64[D]")
+    except ValueError:
+        parsed = np.empty(len(trimmed), dtype="datetime64[D]")
+        for i, d in enumerate(trimmed):
+            try:
+                parsed[i] = np.datetime64(d, "D")
+            except ValueError:
+                parsed[i] = np.datetime64("NaT")
+        return parsed
+
+def _intern(values: List[str]):
+    """Map strings to dense int32 codes (first-seen order)"""
+    labels = list(dict.fromkeys(values))
+    lookup = {label: i for i, label in enumerate(labels)}
+    codes = np.fromiter(map(lookup.__getitem__, values), dtype=np.int32, count=len(values))
+    return labels, codes
+
+def build_group_frame(docs: List[Dict]) -> GroupExpenseFrame:
+    """
+    Convert projected expense documents (see build_group_pipeline) into
+    columnar arrays. Shares arrive pre-flattened per expense ("su"/"ss"),
+    so the only per-row Python work is list building and string interning.
+    """
+    n = len(docs)
+    payer_ids = [doc.get("p") or "" for doc in docs]
+    share_users = [doc.get("su") or [] for doc in docs]
+    share_counts = np.fromiter((len(users) for users in share_users), dtype=np.int64, count=n)
+    share_user_flat = list(chain.from_iterable(share_users))
+    share_amount_flat = list(chain.from_iterable(doc.get("ss") or [] for doc in docs))
+
+    members, member_idx = _intern(payer_ids + share_user_flat)
+    categories, category_idx = _intern([doc.get("c") or "uncategorized" for doc in docs])
+
+    return GroupExpenseFrame(
+        dates=_parse_dates([doc.get("d") for doc in docs]),
+        amount_cents=_to_cents([doc.get("a") or 0.0 for doc in docs]),
+        payer_idx=member_idx[:n],
+        category_idx=category_idx,
+        share_expense_idx=np.repeat(np.arange(n, dtype=np.int32), share_counts),
+        share_member_idx=member_idx[n:],
+        share_cents=_to_cents([amount or 0.0 for amount in share_amount_flat]),
+        members=members,
+        categories=categories,
+    )
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+def _cents_list(values: np.ndarray) -> List[float]:
+    return (values / 100.0).round(2).tolist()
+
+def compute_member_balances(frame: GroupExpenseFrame) -> List[Dict]:
+    """
+    Per-member totals paid and owed.
+    Expenses without participant rows (personal/unsplit) are owed in full
+    by their payer.
+    """
+    n_members = len(frame.members)
+
+    paid = np.bincount(frame.payer_idx, weights=frame.amount_cents, minlength=n_members)
+
+    owed = np.bincount(frame.share_member_idx, weights=frame.share_cents, minlength=n_members)
+    has_shares = np.zeros(frame.expense_count, dtype=bool)
+    has_shares[frame.share_expense_idx] = True
+    unsplit = ~has_shares
+    owed += np.bincount(frame.payer_idx[unsplit], weights=frame.amount_cents[unsplit], minlength=n_members)
+
+    expenses_paid = np.bincount(frame.payer_idx, minlength=n_members)
+
+    paid_out = _cents_list(paid)
+    owed_out = _cents_list(owed)
+    net_out = _cents_list(paid - owed)
+    counts = expenses_paid.tolist()
+
+    balances = [
+        {
+            "user_id": frame.members[i],
+            "paid": paid_out[i],
+            "owed": owed_out[i],
+            "net": net_out[i],
+            "expenses_paid": counts[i],
+        }
+        for i in range(n_members)
+    ]
+    balances.sort(key=lambda b: b["net"], reverse=True)
+    return balances
+
+def compute_daily_series(frame: GroupExpenseFrame) -> List[Dict]:
+    """Total spend and expense count per calendar day, ascending"""
+    valid = ~np.isnat(frame.dates)
+    if not valid.any():
+        return []
+
+    days, inverse = np.unique(frame.dates[valid], return_inverse=True)
+    totals = np.bincount(inverse, weights=frame.amount_cents[valid])
+    counts = np.bincount(inverse)
+
+    day_strings = np.datetime_as_string(days, unit="D").tolist()
+    totals_out = _cents_list(totals)
+    counts_out = counts.tolist()
+
+    return [
+        {"date": day_strings[i], "total": totals_out[i], "count": counts_out[i]}
+        for i in range(len(days))
+    ]
+
+def compute_category_mix(frame: GroupExpenseFrame) -> Dict:
+    """
+    Spend per (month, category) as a dense matrix.
+
+    Returns:
+        {"months": [...], "categories": [...], "totals": [[...], ...]}
+        where totals[m][c] is the spend for months[m] and categories[c]
+    """
+    valid = ~np.isnat(frame.dates)
+    if not valid.any():
+        return {"months": [], "categories": frame.categories, "totals": []}
+
+    months, month_idx = np.unique(frame.dates[valid].astype("datetime64[M]"), return_inverse=True)
+    n_categories = len(frame.categories)
+
+    flat = np.bincount(
+        month_idx * n_categories + frame.category_idx[valid],
+        weights=frame.amount_cents[valid],
+        minlength=len(months) * n_categories
+    )
+    matrix = (flat.reshape(len(months), n_categories) / 100.0).round(2)
+
+    return {
+        "months": np.datetime_as_string(months, unit="M").tolist(),
+        "categories": frame.categories,
+        "totals": matrix.tolist(),
+    }
+
+def compute_group_analytics(frame: GroupExpenseFrame) -> Dict:
+    """Compute all group metrics from a columnar frame"""
+    total = int(frame.amount_cents.sum())
+    return {
+        "expense_count": frame.expense_count,
+        "total_spent": round(total / 100.0, 2),
+        "members": compute_member_balances(frame),
+        "daily": compute_daily_series(frame),
+        "category_mix": compute_category_mix(frame),
+    }
+
+# ============================================================================
+# PERSONAL SUMMARY
+# ============================================================================
+
+def build_summary_pipeline(user_id: str, start_date: str, end_date: str, category: Optional[str] = None) -> List[Dict]:
+    """
+    Spending per category for one user's date range.
+
+    Covered by idx_user_date_category_amount: the $match is on the index
+    prefix (category, when given, is checked on the index keys) and the
+    $project keeps only indexed fields and drops _id, so the plan is
+    IXSCAN -> PROJECTION_COVERED with no FETCH.
+    """
+    match = {
+        "user_id": user_id,
+        "date": {"$gte": start_date, "$lte": end_date}
+    }
+    if category:
+        match["category"] = category
+
+    return [
+        {"$match": match},
+        {"$project": {"_id": 0, "category": 1, "amount": 1}},
+        {"$group": {
+            "_id": "$category",
+            "total_amount": {"$sum": "$amount"},
+            "count": {"$sum": 1}
+        }},
+        {"$sort": {"total_amount": -1}}
+    ]
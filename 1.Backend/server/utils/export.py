@@ -0,0 +1,390 @@
+# server/utils/export.py
+"""
+Streaming bulk export of expenses
+
+Reads expenses from a Motor cursor in fixed-size batches, attaches
+per-participant shares with one query per batch, and encodes the rows
+as CSV, JSONL or Parquet without ever holding the full result set.
+
+Each expense produces one row per participant (group expenses) or a
+single row with empty share columns (personal expenses).
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+# Large enough to amortise round trips, small enough to keep each batch
+# (expenses + their participant rows) at a few MB.
+EXPORT_BATCH_SIZE = 2000
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+EXPORT_SCOPES = ("personal", "group", "all")
+
+EXPORT_COLUMNS = [
+    "expense_id",
+    "date",
+    "amount",
+    "category",
+    "subcategory",
+    "description",
+    "note",
+    "group_id",
+    "user_id",
+    "paid_by",
+    "split_type",
+    "created_at",
+    "participant_user_id",
+    "share_amount",
+    "share_percentage",
+    "exact_amount",
+]
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPENSE_PROJECTION = {
+    "date": 1,
+    "amount": 1,
+    "category": 1,
+    "subcategory": 1,
+    "description": 1,
+    "note": 1,
+    "group_id": 1,
+    "user_id": 1,
+    "paid_by": 1,
+    "split_type": 1,
+    "created_at": 1,
+}
+
+PARTICIPANT_PROJECTION = {
+    "_id": 0,
+    "expense_id": 1,
+    "user_id": 1,
+    "share_amount": 1,
+    "share_percentage": 1,
+    "exact_amount": 1,
+}
+
+# ============================================================================
+# QUERY
+# ============================================================================
+
+async def build_export_query(
+    db,
+    user_id: str,
+    scope: str = "all",
+    group_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> Dict:
+    """
+    Build the expenses filter for an export request.
+
+    Args:
+        db: Motor database handle
+        user_id: Authenticated user
+        scope: 'personal', 'group' or 'all'
+        group_id: Required when scope is 'group'
+        start_date: Optional inclusive lower bound (YYYY-MM-DD)
+        end_date: Optional inclusive upper bound (YYYY-MM-DD)
+
+    Returns:
+        MongoDB filter document
+
+    Raises:
+        ValueError: If scope is invalid or user is not a member of group_id
+    """
+    if scope not in EXPORT_SCOPES:
+        raise ValueError(f"Invalid scope: {scope}. Must be one of {', '.join(EXPORT_SCOPES)}")
+
+    if scope == "personal":
+        # Group expenses carry the payer's user_id too; personal ones have
+        # no group_id, or the user's Personal group once migrated
+        personal_groups = await db["groups"].find(
+            {"created_by": user_id, "group_type": "personal", "is_active": True},
+            {"_id": 1}
+        ).to_list(None)
+        personal_group_ids = [str(g["_id"]) for g in personal_groups]
+        query = {"user_id": user_id, "$or": [{"group_id": None}, {"group_id": {"$in": personal_group_ids}}]}
+    elif scope == "group":
+        if not group_id:
+            raise ValueError("group_id is required for group exports")
+        member = await db["group_members"].find_one(
+            {"group_id": group_id, "user_id": user_id, "is_active": True},
+            {"_id": 1}
+        )
+        if not member:
+            raise ValueError("Access denied: You are not a member of this group")
+        query = {"group_id": group_id}
+    else:
+        memberships = await db["group_members"].find(
+            {"user_id": user_id, "is_active": True},
+            {"_id": 0, "group_id": 1}
+        ).to_list(None)
+        group_ids = [m["group_id"] for m in memberships]
+        query = {"$or": [{"user_id": user_id}, {"group_id": {"$in": group_ids}}]} if group_ids else {"user_id": user_id}
+
+    if start_date and end_date:
+        query["date"] = {"$gte": start_date, "$lte": end_date}
+    elif start_date:
+        query["date"] = {"$gte": start_date}
+    elif end_date:
+        query["date"] = {"$lte": end_date}
+
+    return query
+
+async def iter_expense_batches(
+    db,
+    query: Dict,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[List[Dict]]:
+    """
+    Yield lists of flat export rows, one list per cursor batch.
+
+    Participant shares for each batch are fetched with a single $in query,
+    so memory stays bounded by batch_size regardless of the export size.
+    """
+    cursor = db["expenses"].find(query, EXPENSE_PROJECTION).sort("date", 1).batch_size(batch_size)
+
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield await _rows_for_batch(db, batch)
+            batch = []
+
+    if batch:
+        yield await _rows_for_batch(db, batch)
+
+async def _rows_for_batch(db, expenses: List[Dict]) -> List[Dict]:
+    """Join one batch of expenses with their participant shares"""
+    expense_ids = [str(e["_id"]) for e in expenses if e.get("group_id")]
+
+    shares_by_expense = {}
+    if expense_ids:
+        cursor = db["expense_participants"].find(
+            {"expense_id": {"$in": expense_ids}},
+            PARTICIPANT_PROJECTION
+        )
+        async for p in cursor:
+            shares_by_expense.setdefault(p["expense_id"], []).append(p)
+
+    rows = []
+    for expense in expenses:
+        expense_id = str(expense["_id"])
+        base = {
+            "expense_id": expense_id,
+            "date": expense.get("date"),
+            "amount": expense.get("amount"),
+            "category": expense.get("category"),
+            "subcategory": expense.get("subcategory"),
+            "description": expense.get("description"),
+            "note": expense.get("note"),
+            "group_id": expense.get("group_id"),
+            "user_id": expense.get("user_id"),
+            "paid_by": expense.get("paid_by", expense.get("user_id")),
+            "split_type": expense.get("split_type"),
+            "created_at": expense.get("created_at"),
+        }
+
+        shares = shares_by_expense.get(expense_id)
+        if not shares:
+            rows.append({
+                **base,
+                "participant_user_id": None,
+                "share_amount": None,
+                "share_percentage": None,
+                "exact_amount": None,
+            })
+            continue
+
+        for p in shares:
+            rows.append({
+                **base,
+                "participant_user_id": p["user_id"],
+                "share_amount": p.get("share_amount"),
+                "share_percentage": p.get("share_percentage"),
+                "exact_amount": p.get("exact_amount"),
+            })
+
+    return rows
+
+# ============================================================================
+# ENCODERS
+# ============================================================================
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+async def encode_csv(batches: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    """Encode row batches as CSV (header first, one chunk per batch)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue().encode("utf-8")
+
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            created_at = row.get("created_at")
+            if isinstance(created_at, datetime):
+                row = {**row, "created_at": created_at.isoformat()}
+            writer.writerow(row)
+        yield buffer.getvalue().encode("utf-8")
+
+async def encode_jsonl(batches: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    """Encode row batches as newline-delimited JSON"""
+    async for rows in batches:
+        yield "".join(
+            json.dumps(row, default=_json_default, separators=(",", ":")) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+def parquet_schema():
+    """Arrow schema for exported rows"""
+    import pyarrow as pa
+
+    return pa.schema([
+        ("expense_id", pa.string()),
+        ("date", pa.string()),
+        ("amount", pa.float64()),
+        ("category", pa.string()),
+        ("subcategory", pa.string()),
+        ("description", pa.string()),
+        ("note", pa.string()),
+        ("group_id", pa.string()),
+        ("user_id", pa.string()),
+        ("paid_by", pa.string()),
+        ("split_type", pa.string()),
+        ("created_at", pa.timestamp("ms")),
+        ("participant_user_id", pa.string()),
+        ("share_amount", pa.float64()),
+        ("share_percentage", pa.float64()),
+        ("exact_amount", pa.float64()),
+    ])
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the caller"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+async def encode_parquet(batches: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    """
+    Encode row batches as a Parquet file, one row group per batch.
+
+    Requires pyarrow. Bytes are flushed after every row group, so only the
+    footer is held back until the end of the stream.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export requires pyarrow to be installed")
+
+    schema = parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        async for rows in batches:
+            columns = {name: [row.get(name) for row in rows] for name in schema.names}
+            writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+ENCODERS = {
+    "csv": encode_csv,
+    "jsonl": encode_jsonl,
+    "parquet": encode_parquet,
+}
+
+async def gzip_stream(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Compress a byte stream into a single gzip member"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+# ============================================================================
+# MAIN EXPORT FUNCTION
+# ============================================================================
+
+async def export_expenses(
+    db,
+    user_id: str,
+    fmt: str = "csv",
+    scope: str = "all",
+    group_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    compress: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    Stream a user's expenses in the requested format.
+
+    Authorization and argument validation happen before the first byte is
+    produced, so callers can turn ValueError into an HTTP 4xx response.
+
+    Args:
+        db: Motor database handle
+        user_id: Authenticated user
+        fmt: 'csv', 'jsonl' or 'parquet'
+        scope: 'personal', 'group' or 'all'
+        group_id: Group to export (scope='group')
+        start_date: Optional inclusive lower bound
+        end_date: Optional inclusive upper bound
+        compress: Wrap the output in gzip
+        batch_size: Cursor batch size / rows per encoded chunk
+
+    Returns:
+        Async iterator of encoded bytes
+
+    Raises:
+        ValueError: If arguments are invalid or access is denied
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format: {fmt}. Must be one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export requires pyarrow to be installed")
+
+    query = await build_export_query(db, user_id, scope, group_id, start_date, end_date)
+
+    stream = ENCODERS[fmt](iter_expense_batches(db, query, batch_size))
+    if compress:
+        stream = gzip_stream(stream)
+    return stream
@@ -0,0 +1,255 @@
+# server/utils/idempotency.py
+"""
+Idempotency keys for expense-creating tools
+
+A retried add_expense/add_group_expense carrying the same idempotency_key
+returns the original result instead of inserting a duplicate.
+
+Lookup order:
+1. In-process hot cache (bounded LRU) - O(1), no database round trip
+2. In-flight request in this process - await the same future
+3. idempotency_keys collection - the unique _id claims the key across
+   processes; a concurrent duplicate waits for the first one to finish
+
+Only successful results are stored. If the first attempt fails, its claim
+is released so a retry can run again.
+
+A claim is never taken over once its operation may have run: if the
+worker died (or could not record the result, after retrying), a retry
+gets an error saying the outcome is unknown instead of a second insert.
+The TTL index frees such keys after a day.
+
+A hash of the call's arguments is stored with the key; reusing a key with
+different arguments gets an idempotency_conflict error instead of the
+other call's result.
+"""
+
+import sys
+import pathlib
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from db.client import idempotency_keys_col
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 200
+
+# Hot cache bounds (the collection's TTL index bounds the durable copy)
+HOT_CACHE_SIZE = 2048
+HOT_CACHE_TTL_SECONDS = 15 * 60
+
+# How long a duplicate waits for the original request to complete
+PENDING_WAIT_SECONDS = 30.0
+PENDING_POLL_SECONDS = 0.05
+
+# A pending claim older than this will not finish (crashed worker or lost
+# completion write); its outcome is unknown
+PENDING_STALE_SECONDS = 120
+
+# Attempts at recording a successful result before giving up
+COMPLETE_ATTEMPTS = 3
+COMPLETE_RETRY_SECONDS = 0.1
+
+CONFLICT_MESSAGE = "idempotency_key was already used with different arguments"
+
+# ============================================================================
+# HOT CACHE
+# ============================================================================
+
+class HotCache:
+    """Bounded LRU cache with per-entry expiry"""
+
+    def __init__(self, max_size: int = HOT_CACHE_SIZE, ttl_seconds: float = HOT_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+_hot_cache = HotCache()  # doc_id -> (args_hash, result)
+_in_flight: Dict[str, Tuple[Optional[str], asyncio.Future]] = {}
+
+# ============================================================================
+# MAIN FUNCTION
+# ============================================================================
+
+def make_idempotency_id(user_id: str, tool: str, key: str) -> str:
+    """Keys are scoped per user and per tool"""
+    return f"{user_id}:{tool}:{key}"
+
+def args_fingerprint(args: Optional[Dict]) -> Optional[str]:
+    """SHA-256 of the arguments' canonical JSON (None: not checked)"""
+    if args is None:
+        return None
+    payload = json.dumps(args, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _conflicts(stored: Optional[str], args_hash: Optional[str]) -> bool:
+    return stored is not None and args_hash is not None and stored != args_hash
+
+def _conflict_result() -> Dict:
+    return {"status": "error", "code": "idempotency_conflict", "message": CONFLICT_MESSAGE}
+
+async def run_idempotent(
+    user_id: str,
+    tool: str,
+    key: str,
+    operation: Callable[[], Awaitable[Dict]],
+    args: Optional[Dict] = None
+) -> Dict:
+    """
+    Run operation at most once per (user_id, tool, key).
+
+    Args:
+        user_id: Authenticated user
+        tool: Tool name (keys are not shared between tools)
+        key: Client-supplied idempotency key
+        operation: Zero-argument coroutine factory performing the write;
+            it must return only once the write is acknowledged
+        args: The call's arguments; a retry must send the same ones
+
+    Returns:
+        The operation's result, the stored result of an earlier call
+        with the same key, or an idempotency_conflict error if that call
+        had different args
+    """
+    if not isinstance(key, str) or not key.strip() or len(key) > MAX_KEY_LENGTH:
+        return {"status": "error", "message": f"idempotency_key must be a non-empty string of at most {MAX_KEY_LENGTH} characters"}
+
+    doc_id = make_idempotency_id(user_id, tool, key)
+    args_hash = args_fingerprint(args)
+
+    cached = _hot_cache.get(doc_id)
+    if cached is not None:
+        stored_hash, result = cached
+        return _conflict_result() if _conflicts(stored_hash, args_hash) else result
+
+    in_flight = _in_flight.get(doc_id)
+    if in_flight is not None:
+        stored_hash, in_flight_future = in_flight
+        if _conflicts(stored_hash, args_hash):
+            return _conflict_result()
+        return await asyncio.shield(in_flight_future)
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[doc_id] = (args_hash, future)
+    try:
+        result = await _claim_and_run(doc_id, user_id, tool, key, args_hash, operation)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        # Nobody else may be awaiting; don't warn about an unretrieved exception
+        future.exception()
+        raise
+    finally:
+        _in_flight.pop(doc_id, None)
+
+async def _claim_and_run(doc_id, user_id, tool, key, args_hash, operation) -> Dict:
+    deadline = time.monotonic() + PENDING_WAIT_SECONDS
+
+    while True:
+        try:
+            await idempotency_keys_col.insert_one({
+                "_id": doc_id,
+                "user_id": user_id,
+                "tool": tool,
+                "key": key,
+                "args_hash": args_hash,
+                "status": "pending",
+                "created_at": datetime.utcnow()
+            })
+            break
+        except DuplicateKeyError:
+            pass
+
+        # Another process holds (or held) the key
+        existing = await idempotency_keys_col.find_one({"_id": doc_id})
+        if existing is None:
+            continue  # claim was released after a failure; try to take it
+        if _conflicts(existing.get("args_hash"), args_hash):
+            return _conflict_result()
+        if existing.get("status") == "completed":
+            result = existing.get("result", {})
+            _hot_cache.set(doc_id, (existing.get("args_hash"), result))
+            return result
+        if (datetime.utcnow() - existing["created_at"]).total_seconds() > PENDING_STALE_SECONDS:
+            # The write may have committed; running it again could duplicate it
+            return {
+                "status": "error",
+                "message": "An earlier request with this idempotency_key did not finish and may have been "
+                           "applied; check before retrying with a new idempotency_key"
+            }
+        if time.monotonic() >= deadline:
+            return {"status": "error", "message": "A request with this idempotency_key is still in progress"}
+        await asyncio.sleep(PENDING_POLL_SECONDS)
+
+    try:
+        result = await operation()
+    except Exception:
+        await _release(doc_id)
+        raise
+    # Cancelled: the write may have committed, so the claim stays pending
+
+    if not isinstance(result, dict) or result.get("status") != "success":
+        await _release(doc_id)
+        return result
+
+    _hot_cache.set(doc_id, (args_hash, result))
+    await _complete(doc_id, result)
+    return result
+
+async def _complete(doc_id: str, result: Dict) -> None:
+    """Record the result; if that keeps failing the claim stays pending"""
+    for attempt in range(COMPLETE_ATTEMPTS):
+        try:
+            await idempotency_keys_col.update_one(
+                {"_id": doc_id},
+                {"$set": {"status": "completed", "result": result, "completed_at": datetime.utcnow()}}
+            )
+            return
+        except Exception as e:
+            if attempt + 1 == COMPLETE_ATTEMPTS:
+                logger.error("Could not record idempotency result for %s: %s", doc_id, e)
+                return
+            await asyncio.sleep(COMPLETE_RETRY_SECONDS * (attempt + 1))
+
+async def _release(doc_id: str) -> None:
+    try:
+        await idempotency_keys_col.delete_one({"_id": doc_id, "status": "pending"})
+    except Exception:
+        pass
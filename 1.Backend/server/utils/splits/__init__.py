@@ -13,6 +13,13 @@ from .calculator import (
     format_split_summary
 )
 
+def __getattr__(name):
+    # The batch path needs numpy; load it only when asked for
+    if name == 'calculate_splits_batch':
+        from .batch import calculate_splits_batch
+        return calculate_splits_batch
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = [
     'calculate_equal_split',
     'calculate_exact_split',
@@ -20,5 +27,6 @@ __all__ = [
     'calculate_splits',
     'validate_split_participants',
     'validate_split_data',
-    'format_split_summary'
+    'format_split_summary',
+    'calculate_splits_batch'
 ]
@@ -0,0 +1,244 @@
+# server/utils/splits/batch.py
+"""
+Batch split calculation
+
+Splits many expenses in one call using integer-cent NumPy arithmetic
+instead of per-expense Decimal math. Results are identical to calling
+calculate_splits() once per expense: same Decimal values and exponents,
+same dict ordering, same rounding.
+
+Rows the integer path cannot reproduce exactly (amounts with more than
+two decimal places, non-positive totals, single-participant percentage
+splits, or inputs that fail validation) are delegated to the scalar
+calculate_splits(), so errors and edge cases behave exactly as before.
+"""
+
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+from .calculator import (
+    calculate_splits,
+    validate_split_participants,
+    validate_split_data
+)
+
+# Largest magnitude whose cent value is exactly representable in a float64
+MAX_EXACT_AMOUNT = 2 ** 53 / 100
+
+# Largest total (in cents) for which 2 * total * basis_points fits in int64
+MAX_PERCENTAGE_CENTS = (2 ** 63 - 1) // 20000
+
+# ============================================================================
+# INTEGER-CENT HELPERS
+# ============================================================================
+
+def _exact_cents(values: np.ndarray):
+    """
+    Convert float amounts to int64 cents.
+
+    Returns:
+        (cents, exact) where exact[i] is True if values[i] has at most two
+        decimal places, i.e. Decimal(str(values[i])) == cents[i] / 100
+    """
+    finite = np.isfinite(values) & (np.abs(values) < MAX_EXACT_AMOUNT)
+    safe = np.where(finite, values, 0.0)
+    cents = np.rint(safe * 100)
+    exact = finite & (cents / 100 == safe)
+    return cents.astype(np.int64), exact
+
+def _segment_any(mask: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Per-segment logical OR (segments must be non-empty)"""
+    return np.add.reduceat(mask.astype(np.int64), offsets) > 0
+
+class _DecimalCache(dict):
+    """Memoised cents -> Decimal('x.yy') conversion (index with cents)"""
+
+    def __missing__(self, cents: int) -> Decimal:
+        value = Decimal(cents).scaleb(-2)
+        self[cents] = value
+        return value
+
+# ============================================================================
+# PER-TYPE VECTORIZED KERNELS
+# ============================================================================
+
+def _equal_rows(rows, totals_cents, participants, results, to_decimal):
+    """Equal split: base share rounded down, remainder to first participant"""
+    if not rows:
+        return
+
+    idx = np.asarray(rows, dtype=np.int64)
+    counts = np.fromiter((len(participants[i]) for i in rows), dtype=np.int64, count=len(rows))
+    totals = totals_cents[idx]
+
+    base = totals // counts
+    first = totals - base * (counts - 1)
+
+    for i, base_c, first_c in zip(rows, base.tolist(), first.tolist()):
+        users = participants[i]
+        splits = dict.fromkeys(users, to_decimal[base_c])
+        splits[users[0]] = to_decimal[first_c]
+        results[i] = splits
+
+def _exact_rows(rows, totals_cents, split_data, results, to_decimal, fallback):
+    """Exact split: per-user cents must be exact and sum to the total"""
+    if not rows:
+        return
+
+    user_amounts = [split_data[i]["user_amounts"] for i in rows]
+    counts = np.fromiter((len(a) for a in user_amounts), dtype=np.int64, count=len(rows))
+    values = np.fromiter(
+        (amount for amounts in user_amounts for amount in amounts.values()),
+        dtype=np.float64,
+        count=int(counts.sum())
+    )
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    offsets_list = offsets.tolist()
+
+    cents, exact = _exact_cents(values)
+    bad = _segment_any(~exact | (values < 0), offsets)
+    sums = np.add.reduceat(cents, offsets)
+    ok = (~bad & (sums == totals_cents[np.asarray(rows, dtype=np.int64)])).tolist()
+
+    cents_list = cents.tolist()
+    for k, (i, amounts) in enumerate(zip(rows, user_amounts)):
+        if not ok[k]:
+            fallback.append(i)
+            continue
+        start = offsets_list[k]
+        results[i] = dict(zip(amounts, map(to_decimal.__getitem__, cents_list[start:start + len(amounts)])))
+
+def _percentage_rows(rows, totals_cents, split_data, results, to_decimal, fallback):
+    """
+    Percentage split: half-up rounding in descending-percentage order,
+    last user absorbs the remainder.
+    """
+    fast_rows = []
+    ordered = []
+    for i in rows:
+        user_percentages = split_data[i]["user_percentages"]
+        if len(user_percentages) < 2 or totals_cents[i] > MAX_PERCENTAGE_CENTS:
+            fallback.append(i)
+            continue
+        # Mirror the scalar validation; invalid rows raise from the scalar path
+        if abs(sum(user_percentages.values()) - 100.0) > 0.01:
+            fallback.append(i)
+            continue
+        if any(p < 0 or p > 100 for p in user_percentages.values()):
+            fallback.append(i)
+            continue
+        fast_rows.append(i)
+        ordered.append(sorted(user_percentages.items(), key=lambda x: x[1], reverse=True))
+
+    if not fast_rows:
+        return
+
+    counts = np.fromiter((len(o) for o in ordered), dtype=np.int64, count=len(ordered))
+    values = np.fromiter(
+        (p for items in ordered for _, p in items),
+        dtype=np.float64,
+        count=int(counts.sum())
+    )
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    offsets_list = offsets.tolist()
+    last = offsets + counts - 1
+
+    basis_points, exact = _exact_cents(values)
+    bad = _segment_any(~exact, offsets).tolist()
+
+    totals = np.repeat(totals_cents[np.asarray(fast_rows, dtype=np.int64)], counts)
+    # round_half_up(total * bp / 10000) for non-negative operands
+    shares = (2 * totals * basis_points + 10000) // 20000
+    shares[last] = 0
+    shares[last] = totals[last] - np.add.reduceat(shares, offsets)
+
+    shares_list = shares.tolist()
+    for k, (i, items) in enumerate(zip(fast_rows, ordered)):
+        if bad[k]:
+            fallback.append(i)
+            continue
+        start = offsets_list[k]
+        results[i] = dict(zip(
+            [user_id for user_id, _ in items],
+            map(to_decimal.__getitem__, shares_list[start:start + len(items)])
+        ))
+
+# ============================================================================
+# MAIN BATCH FUNCTION
+# ============================================================================
+
+def calculate_splits_batch(
+    total_amounts: Sequence[float],
+    split_types: Sequence[str],
+    participants: Sequence[List[str]],
+    paid_by: Sequence[str],
+    split_data: Optional[Sequence[Optional[dict]]] = None
+) -> List[Dict[str, Decimal]]:
+    """
+    Calculate splits for many expenses at once.
+
+    Args:
+        total_amounts: Total amount per expense
+        split_types: 'equal', 'exact' or 'percentage' per expense
+        participants: List of user IDs per expense
+        paid_by: Payer user ID per expense
+        split_data: Optional split data per expense (user_amounts or
+            user_percentages), same shape as calculate_splits()
+
+    Returns:
+        List of dicts mapping user_id to share amount, one per expense,
+        identical to what calculate_splits() returns for that expense
+
+    Raises:
+        ValueError: If the input sequences differ in length, or any
+            expense fails validation (message is prefixed with its index)
+    """
+    n = len(total_amounts)
+    if split_data is None:
+        split_data = [None] * n
+    if not (len(split_types) == len(participants) == len(paid_by) == len(split_data) == n):
+        raise ValueError("total_amounts, split_types, participants, paid_by and split_data must have the same length")
+
+    totals = np.asarray(total_amounts, dtype=np.float64)
+    totals_cents, totals_exact = _exact_cents(totals)
+    fast_total = (totals_exact & (totals > 0)).tolist()
+
+    equal_rows, exact_rows, percentage_rows, fallback = [], [], [], []
+    for i in range(n):
+        split_type = split_types[i]
+        try:
+            validate_split_participants(participants[i], paid_by[i])
+            validate_split_data(split_type, participants[i], split_data[i] or {})
+        except ValueError as e:
+            raise ValueError(f"Expense {i}: {e}") from e
+
+        if not fast_total[i]:
+            fallback.append(i)
+        elif split_type == "equal":
+            equal_rows.append(i)
+        elif split_type == "exact":
+            exact_rows.append(i)
+        else:
+            percentage_rows.append(i)
+
+    results: List[Optional[Dict[str, Decimal]]] = [None] * n
+    to_decimal = _DecimalCache()
+
+    _equal_rows(equal_rows, totals_cents, participants, results, to_decimal)
+    _exact_rows(exact_rows, totals_cents, split_data, results, to_decimal, fallback)
+    _percentage_rows(percentage_rows, totals_cents, split_data, results, to_decimal, fallback)
+
+    for i in fallback:
+        try:
+            results[i] = calculate_splits(
+                total_amount=total_amounts[i],
+                split_type=split_types[i],
+                participants=participants[i],
+                paid_by=paid_by[i],
+                split_data=split_data[i]
+            )
+        except ValueError as e:
+            raise ValueError(f"Expense {i}: {e}") from e
+
+    return results
@@ -8,12 +8,58 @@ Implements three split types:
 3. Percentage - Percentage-based distribution
 
 All calculations use Decimal for precision (no float rounding errors).
+Amounts with at most two decimal places take an integer-cents fast path
+that produces the same Decimals without per-step Decimal arithmetic;
+anything else (sub-cent amounts, non-positive totals) uses the original
+Decimal implementation.
 """
 
+import math
 from decimal import Decimal, ROUND_HALF_UP, ROUND_DOWN
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Optional
 from bson import ObjectId
 
+CENT = Decimal('0.01')
+
+# Largest magnitude whose cent value is exactly representable in a float
+MAX_EXACT_AMOUNT = 2 ** 53 / 100
+
+# ============================================================================
+# INTEGER-CENTS ENGINE
+# ============================================================================
+
+def _to_cents(value) -> Optional[int]:
+    """
+    Convert an amount to integer cents if it has at most two decimal places.
+    
+    Returns None when Decimal(str(value)) is not a whole number of cents
+    (or is -0.0), in which case callers fall back to Decimal arithmetic.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        if not (abs(value) < MAX_EXACT_AMOUNT):
+            return None
+        cents = round(value * 100)
+        if cents / 100 != value:
+            return None
+        if cents == 0 and math.copysign(1.0, value) < 0:
+            return None
+        return cents
+    return None
+
+@lru_cache(maxsize=8192)
+def _cents_to_decimal(cents: int) -> Decimal:
+    """Integer cents -> Decimal with exponent -2 (e.g. 3334 -> Decimal('33.34'))"""
+    return Decimal(cents).scaleb(-2)
+
+def _half_up_cents(total_cents: int, basis_points: int) -> int:
+    """round_half_up(total_cents * basis_points / 10000) for non-negative operands"""
+    return (2 * total_cents * basis_points + 10000) // 20000
+
 # ============================================================================
 # SPLIT CALCULATION FUNCTIONS
 # ============================================================================
@@ -37,6 +83,21 @@ def calculate_equal_split(total_amount: float, participants: List[str]) -> Dict[
     if not participants:
         raise ValueError("Cannot split expense with no participants")
     
+    total_cents = _to_cents(total_amount)
+    if total_cents is None or total_cents <= 0:
+        return _decimal_equal_split(total_amount, participants)
+    
+    # Base share rounded down to the cent; first participant gets the remainder
+    base_cents = total_cents // len(participants)
+    base_share = _cents_to_decimal(base_cents)
+    
+    splits = dict.fromkeys(participants, base_share)
+    splits[participants[0]] = _cents_to_decimal(total_cents - base_cents * (len(participants) - 1))
+    
+    return splits
+
+def _decimal_equal_split(total_amount: float, participants: List[str]) -> Dict[str, Decimal]:
+    """Decimal implementation of calculate_equal_split (sub-cent or non-positive totals)"""
     total = Decimal(str(total_amount))
     num_participants = len(participants)
     
@@ -87,6 +148,41 @@ def calculate_exact_split(total_amount: float, user_amounts: Dict[str, float]) -
     if not user_amounts:
         raise ValueError("Cannot split expense with no participants")
     
+    total_cents = _to_cents(total_amount)
+    if total_cents is None:
+        return _decimal_exact_split(total_amount, user_amounts)
+    
+    splits = {}
+    calculated_cents = 0
+    
+    for user_id, amount in user_amounts.items():
+        if amount < 0:
+            raise ValueError(f"Amount for {user_id} cannot be negative: {amount}")
+        
+        cents = _to_cents(amount)
+        if cents is None:
+            decimal_amount = Decimal(str(amount)).quantize(CENT, rounding=ROUND_HALF_UP)
+            cents = int(decimal_amount.scaleb(2))
+        else:
+            decimal_amount = _cents_to_decimal(cents)
+        
+        splits[user_id] = decimal_amount
+        calculated_cents += cents
+    
+    # Verify total matches
+    if calculated_cents != total_cents:
+        total = Decimal(str(total_amount))
+        calculated_total = _cents_to_decimal(calculated_cents)
+        raise ValueError(
+            f"Split amounts ({float(calculated_total)}) don't match "
+            f"total expense ({float(total)}). "
+            f"Difference: {float(total - calculated_total)}"
+        )
+    
+    return splits
+
+def _decimal_exact_split(total_amount: float, user_amounts: Dict[str, float]) -> Dict[str, Decimal]:
+    """Decimal implementation of calculate_exact_split (sub-cent totals)"""
     total = Decimal(str(total_amount))
     
     # Convert to Decimal and sum
@@ -134,19 +230,58 @@ def calculate_percentage_split(total_amount: float, user_percentages: Dict[str,
     if not user_percentages:
         raise ValueError("Cannot split expense with no participants")
     
-    total = Decimal(str(total_amount))
+    total_cents = _to_cents(total_amount)
+    if total_cents is None or total_cents <= 0 or len(user_percentages) == 1:
+        return _decimal_percentage_split(total_amount, user_percentages)
+    
+    _validate_percentages(user_percentages)
+    
+    # Sort by percentage (descending) for better rounding distribution
+    sorted_users = sorted(
+        user_percentages.items(), 
+        key=lambda x: x[1], 
+        reverse=True
+    )
+    
+    # Calculate amounts for all but last user
+    splits = {}
+    running_cents = 0
+    
+    for user_id, percentage in sorted_users[:-1]:
+        basis_points = _to_cents(percentage)
+        if basis_points is None:
+            amount = (Decimal(total_cents) * Decimal(str(percentage)) / Decimal('100')).quantize(
+                Decimal('1'), 
+                rounding=ROUND_HALF_UP
+            )
+            cents = int(amount)
+        else:
+            cents = _half_up_cents(total_cents, basis_points)
+        splits[user_id] = _cents_to_decimal(cents)
+        running_cents += cents
     
-    # Validate percentages
+    # Last user gets remainder to avoid rounding errors
+    splits[sorted_users[-1][0]] = _cents_to_decimal(total_cents - running_cents)
+    
+    return splits
+
+def _validate_percentages(user_percentages: Dict[str, float]) -> None:
+    """Percentages must sum to 100 (within 0.01) and each be within 0-100"""
     total_percentage = sum(user_percentages.values())
     if abs(total_percentage - 100.0) > 0.01:  # Allow small floating point errors
         raise ValueError(
             f"Percentages must sum to 100% (got {total_percentage}%)"
         )
     
-    # Validate individual percentages
     for user_id, percentage in user_percentages.items():
         if percentage < 0 or percentage > 100:
             raise ValueError(f"Invalid percentage for {user_id}: {percentage}%")
+
+def _decimal_percentage_split(total_amount: float, user_percentages: Dict[str, float]) -> Dict[str, Decimal]:
+    """Decimal implementation of calculate_percentage_split (sub-cent or non-positive totals, single user)"""
+    total = Decimal(str(total_amount))
+    
+    _validate_percentages(user_percentages)
     
     # Sort by percentage (descending) for better rounding distribution
     sorted_users = sorted(
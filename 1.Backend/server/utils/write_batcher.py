@@ -0,0 +1,179 @@
+# server/utils/write_batcher.py
+"""
+Write-behind batching for inserts
+
+Bursts of single-document inserts (bulk chat entry, offline sync) each
+hold a pooled connection for a full round trip. WriteBatcher buffers
+documents for at most max_delay_ms and writes them with one unordered
+insert_many, so N concurrent callers cost one round trip instead of N.
+
+Every caller still gets its own inserted _id:
+- durable=True (default): submit() returns after the batch containing the
+  document is acknowledged; a per-document write error is raised to that
+  caller only.
+- durable=False: _id is generated client-side and submit() returns
+  immediately; the insert happens on the next flush. Failures are logged,
+  not reported, so only use this where losing a write on crash is
+  acceptable. submit(doc, durable=True) waits for a single document that
+  must not be lost (e.g. one an idempotency key is about to point at).
+
+close() flushes everything still buffered and must be awaited on shutdown.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 100
+DEFAULT_MAX_DELAY_MS = 5.0
+
+# ============================================================================
+# BATCHER
+# ============================================================================
+
+class WriteBatcher:
+    """Coalesces insert_one calls on a collection into insert_many batches"""
+
+    def __init__(
+        self,
+        collection,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_delay_ms: float = DEFAULT_MAX_DELAY_MS,
+        durable: bool = True
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_delay_ms < 0:
+            raise ValueError("max_delay_ms must be non-negative")
+
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000.0
+        self.durable = durable
+
+        self._pending: List[Tuple[Dict, Optional[asyncio.Future]]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set = set()
+        self._closed = False
+
+    async def submit(self, doc: Dict, durable: Optional[bool] = None) -> ObjectId:
+        """
+        Queue a document for insertion.
+
+        Args:
+            doc: Document to insert (_id is added if missing)
+            durable: Wait for the acknowledged write; defaults to the
+                batcher's mode
+
+        Returns:
+            The document's _id
+
+        Raises:
+            RuntimeError: If the batcher has been closed
+            Exception: The write error for this document (durable)
+        """
+        if self._closed:
+            raise RuntimeError("WriteBatcher is closed")
+
+        if "_id" not in doc:
+            doc["_id"] = ObjectId()
+
+        loop = asyncio.get_running_loop()
+        wait = self.durable if durable is None else durable
+        future = loop.create_future() if wait else None
+        self._pending.append((doc, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._start_flush)
+
+        if future is None:
+            return doc["_id"]
+        return await future
+
+    async def flush(self) -> None:
+        """Write everything buffered so far and wait for in-progress batches"""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    async def close(self) -> None:
+        """Stop accepting documents and flush the remainder"""
+        self._closed = True
+        await self.flush()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    # ------------------------------------------------------------------------
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            task = asyncio.ensure_future(self._write(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: List[Tuple[Dict, Optional[asyncio.Future]]]) -> None:
+        docs = [doc for doc, _ in batch]
+        errors: Dict[int, Exception] = {}
+
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                error_class = DuplicateKeyError if write_error.get("code") == 11000 else WriteError
+                errors[write_error["index"]] = error_class(write_error.get("errmsg"), write_error.get("code"), write_error)
+        except Exception as e:
+            errors = {i: e for i in range(len(batch))}
+
+        unreported = sum(1 for i in errors if batch[i][1] is None)
+        if unreported:
+            logger.error("Write-behind insert failed for %d of %d documents", unreported, len(batch))
+
+        for i, (doc, future) in enumerate(batch):
+            if future is None or future.done():
+                continue
+            if i in errors:
+                future.set_exception(errors[i])
+            else:
+                future.set_result(doc["_id"])
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def batcher_from_env(collection, prefix: str = "EXPENSE_WRITE_BATCH") -> Optional[WriteBatcher]:
+    """
+    Build a WriteBatcher from environment variables, or None if disabled.
+
+    {prefix}=1              enable coalescing (off by default)
+    {prefix}_MAX_SIZE       max documents per insert_many (default 100)
+    {prefix}_MAX_DELAY_MS   max time a document waits in the buffer (default 5)
+    {prefix}_DURABLE        0 to return before the write is acknowledged
+    """
+    if not _env_flag(prefix, False):
+        return None
+    return WriteBatcher(
+        collection,
+        max_batch_size=int(os.getenv(f"{prefix}_MAX_SIZE", DEFAULT_MAX_BATCH_SIZE)),
+        max_delay_ms=float(os.getenv(f"{prefix}_MAX_DELAY_MS", DEFAULT_MAX_DELAY_MS)),
+        durable=_env_flag(f"{prefix}_DURABLE", True)
+    )
@@ -50,7 +50,7 @@ async def run_initialization():
     from db.init import setup_collection_hybrid
     
     try:
-        await setup_collection_hybrid()
+        await setup_collection_hybrid(force=True)
         print("\n✓ Database initialization completed successfully\n")
         return True
     except Exception as e:
@@ -0,0 +1,40 @@
+# telemetry/__init__.py
+"""
+Metrics and tracing shared by the gateway, the MCP server and the
+LangGraph client
+"""
+
+from .metrics import (
+    MetricsMiddleware,
+    is_error_result,
+    metrics_payload,
+    record_llm_call,
+    record_rate_limit,
+    record_tool_call
+)
+from .mongo import command_listener
+from .slow_queries import current_tool, slow_query_monitor_from_env
+from .tracing import (
+    TracingMiddleware,
+    configure_from_env as configure_tracing_from_env,
+    format_traceparent,
+    shutdown_tracing,
+    span
+)
+
+__all__ = [
+    'MetricsMiddleware',
+    'is_error_result',
+    'metrics_payload',
+    'record_llm_call',
+    'record_rate_limit',
+    'record_tool_call',
+    'command_listener',
+    'current_tool',
+    'slow_query_monitor_from_env',
+    'TracingMiddleware',
+    'configure_tracing_from_env',
+    'format_traceparent',
+    'shutdown_tracing',
+    'span'
+]
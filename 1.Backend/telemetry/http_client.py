@@ -0,0 +1,42 @@
+# telemetry/http_client.py
+"""
+Outgoing HTTP tracing
+
+An httpx transport wrapper that, when tracing is on, opens a span per
+request, sends its traceparent header to the server, and ends the span
+when the response headers arrive or the request fails (connect error,
+timeout, cancellation). Use it as the transport of an httpx.AsyncClient:
+
+    httpx.AsyncClient(transport=TracingTransport(httpx.AsyncHTTPTransport()))
+"""
+
+import httpx
+
+from . import tracing
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """Span per request around another transport"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, span_name: str = "http.client"):
+        self.transport = transport
+        self.span_name = span_name
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not tracing.tracing_enabled():
+            return await self.transport.handle_async_request(request)
+
+        http_span = tracing.start_span(self.span_name, {"http.method": request.method, "http.url": str(request.url)})
+        request.headers["traceparent"] = tracing.format_traceparent(http_span)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException as e:
+            http_span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        else:
+            http_span.set_attribute("http.status", response.status_code)
+            return response
+        finally:
+            http_span.end()
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
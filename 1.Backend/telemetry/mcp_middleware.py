@@ -0,0 +1,63 @@
+# telemetry/mcp_middleware.py
+"""
+FastMCP middleware timing and tracing every tool call on the MCP server
+
+Kept out of telemetry/__init__ so the gateway doesn't import fastmcp.
+"""
+
+import time
+
+from fastmcp.server.middleware import Middleware
+
+from .metrics import is_error_result, record_tool_call
+from .slow_queries import current_tool
+from . import tracing
+
+class ToolMetricsMiddleware(Middleware):
+    """
+    Latency + error count per tool (component="server"). Also sets
+    current_tool so slow Mongo commands are attributed to the tool.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        token = current_tool.set(tool)
+        start = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception:
+            record_tool_call("server", tool, time.perf_counter() - start, error=True)
+            raise
+        finally:
+            current_tool.reset(token)
+        record_tool_call("server", tool, time.perf_counter() - start, error=_is_error(result))
+        return result
+
+def _is_error(result) -> bool:
+    if getattr(result, "is_error", False):
+        return True
+    return is_error_result(getattr(result, "structured_content", None))
+
+class ToolTracingMiddleware(Middleware):
+    """
+    Span per tool call, continuing the traceparent the gateway's MCP HTTP
+    client sent. Mongo command spans nest under it.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        if not tracing.tracing_enabled():
+            return await call_next(context)
+
+        with tracing.span(f"mcp.tool {context.message.name}", parent=_remote_parent()) as tool_span:
+            result = await call_next(context)
+            if _is_error(result):
+                tool_span.status = "error"
+            return result
+
+def _remote_parent():
+    try:
+        from fastmcp.server.dependencies import get_http_request
+        request = get_http_request()
+    except Exception:
+        return None  # stdio transport or no active HTTP request
+    return tracing.parse_traceparent(request.headers.get("traceparent"))
@@ -0,0 +1,214 @@
+# telemetry/metrics.py
+"""
+Prometheus metrics
+
+Shared by the gateway (main.py), the MCP server (server/server.py) and the
+LangGraph client. Each process exposes its own registry on /metrics.
+
+With several workers per service, set PROMETHEUS_MULTIPROC_DIR to an
+empty directory shared by the workers (before they start): every worker
+writes its samples there and /metrics on any worker reports all of them.
+
+Hot-path cost is one dict lookup + one histogram observe per event:
+labelled children are cached (ChildCache), so label resolution happens
+once per label combination.
+"""
+
+import os
+import time
+from typing import Any, Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest
+)
+
+# Request and tool latencies span ~1ms (cached reads) to tens of seconds (LLM)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+# Mongo commands are mostly sub-millisecond to tens of milliseconds
+MONGO_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 5.0
+)
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+
+TOOL_CALL_SECONDS = Histogram(
+    "mcp_tool_duration_seconds",
+    "MCP tool latency (component: gateway = end to end, server = tool body)",
+    ["component", "tool", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+
+TOOL_ERRORS = Counter(
+    "mcp_tool_errors_total",
+    "Tool calls that returned {'status': 'error'} or raised",
+    ["component", "tool"]
+)
+
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds",
+    "Chat model call latency",
+    ["model"],
+    buckets=LATENCY_BUCKETS
+)
+
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Chat model tokens",
+    ["model", "kind"]
+)
+
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency as reported by the driver",
+    ["command", "collection", "outcome"],
+    buckets=MONGO_BUCKETS
+)
+
+RATE_LIMIT_DECISIONS = Counter(
+    "rate_limit_decisions_total",
+    "Gateway rate limiter decisions (outcome: allowed, rejected_user, rejected_global)",
+    ["kind", "outcome"]
+)
+
+RATE_LIMIT_GLOBAL_TOKENS = Gauge(
+    "rate_limit_global_tokens",
+    "Tokens left in the global bucket after the last decision",
+    ["kind"],
+    multiprocess_mode="livesum"
+)
+
+RATE_LIMIT_TRACKED_KEYS = Gauge(
+    "rate_limit_tracked_keys",
+    "Buckets held by the in-process rate limit store",
+    multiprocess_mode="livesum"
+)
+
+# ============================================================================
+# RECORDING HELPERS
+# ============================================================================
+
+class ChildCache(dict):
+    """metric.labels(*key) memoised; skips prometheus_client's label validation"""
+
+    def __init__(self, metric):
+        super().__init__()
+        self.metric = metric
+
+    def __missing__(self, key):
+        child = self.metric.labels(*key)
+        self[key] = child
+        return child
+
+_tool_seconds = ChildCache(TOOL_CALL_SECONDS)
+_tool_errors = ChildCache(TOOL_ERRORS)
+
+def is_error_result(result: Any) -> bool:
+    """Tools signal failure by returning {'status': 'error', ...}"""
+    return isinstance(result, dict) and result.get("status") == "error"
+
+# Tool names reach the gateway from clients; cap distinct label values
+MAX_TOOL_LABELS = 200
+_tool_labels = set()
+
+def _tool_label(tool: str) -> str:
+    if tool in _tool_labels:
+        return tool
+    if len(_tool_labels) >= MAX_TOOL_LABELS or not isinstance(tool, str) or not tool.isidentifier():
+        return "other"
+    _tool_labels.add(tool)
+    return tool
+
+def record_tool_call(component: str, tool: str, seconds: float, error: bool) -> None:
+    tool = _tool_label(tool)
+    _tool_seconds[component, tool, "error" if error else "ok"].observe(seconds)
+    if error:
+        _tool_errors[component, tool].inc()
+
+def record_llm_call(model: str, seconds: float, usage: Dict = None) -> None:
+    """usage is LangChain's usage_metadata (input_tokens / output_tokens)"""
+    LLM_CALL_SECONDS.labels(model).observe(seconds)
+    if usage:
+        LLM_TOKENS.labels(model, "input").inc(usage.get("input_tokens", 0) or 0)
+        LLM_TOKENS.labels(model, "output").inc(usage.get("output_tokens", 0) or 0)
+
+def record_rate_limit(kind: str, outcome: str, global_tokens: float = None, tracked_keys: int = None) -> None:
+    RATE_LIMIT_DECISIONS.labels(kind, outcome).inc()
+    if global_tokens is not None:
+        RATE_LIMIT_GLOBAL_TOKENS.labels(kind).set(global_tokens)
+    if tracked_keys is not None:
+        RATE_LIMIT_TRACKED_KEYS.set(tracked_keys)
+
+def metrics_payload() -> Tuple[bytes, str]:
+    """(body, content_type) for a /metrics response"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+# ============================================================================
+# ASGI MIDDLEWARE
+# ============================================================================
+
+class MetricsMiddleware:
+    """
+    Per-route latency histogram.
+
+    Labels use the matched route template (/mcp/execute, not the raw path)
+    so cardinality stays bounded; unmatched paths share one label.
+    Streaming responses are timed until the first body message.
+    """
+
+    def __init__(self, app, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500, "recorded": False}
+
+        def record():
+            if status["recorded"]:
+                return
+            status["recorded"] = True
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(
+                scope.get("method", ""), template, str(status["code"])
+            ).observe(time.perf_counter() - start)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                record()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            record()
@@ -0,0 +1,62 @@
+# telemetry/mongo.py
+"""
+MongoDB command monitoring
+
+A pymongo CommandListener that feeds driver-reported command durations
+into the mongodb_command_duration_seconds histogram and, when tracing is
+on, emits a span per command under the caller's current span. Pass it to
+every client via event_listeners=[command_listener].
+"""
+
+from pymongo import monitoring
+
+from .metrics import MONGO_COMMAND_SECONDS, ChildCache
+from . import tracing
+
+# Commands whose first field names the collection
+COLLECTION_COMMANDS = {
+    "find", "insert", "update", "delete", "aggregate", "count",
+    "distinct", "findAndModify", "createIndexes", "listIndexes"
+}
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Records latency per (command, collection, outcome)"""
+
+    def __init__(self):
+        # request_id -> collection; only the started event carries the command
+        self._collections = {}
+        self._seconds = ChildCache(MONGO_COMMAND_SECONDS)
+        # request_id -> open span (tracing only)
+        self._spans = {}
+
+    def started(self, event):
+        name = event.command_name
+        collection = ""
+        if name in COLLECTION_COMMANDS:
+            collection = event.command.get(name)
+            collection = collection if isinstance(collection, str) else ""
+            self._collections[event.request_id] = collection
+
+        if tracing.tracing_enabled():
+            self._spans[event.request_id] = tracing.start_span(
+                f"mongo.{name}",
+                {"db.collection": collection, "db.name": event.database_name}
+            )
+
+    def succeeded(self, event):
+        self._observe(event, "ok")
+
+    def failed(self, event):
+        self._observe(event, "error")
+
+    def _observe(self, event, outcome):
+        span = self._spans.pop(event.request_id, None)
+        if span is not None:
+            if outcome == "error":
+                span.set_error(str(getattr(event, "failure", "")))
+            span.end()
+
+        collection = self._collections.pop(event.request_id, "")
+        self._seconds[event.command_name, collection, outcome].observe(event.duration_micros / 1e6)
+
+command_listener = MongoCommandListener()
@@ -0,0 +1,360 @@
+# telemetry/slow_queries.py
+"""
+Slow-query log
+
+A pymongo CommandListener that watches read/write commands and, for any
+taking longer than a threshold, queues the command for
+explain("executionStats") on a background thread with its own small
+client. The hot path only keeps a reference to the command document
+between the started and succeeded events.
+
+Each slow command becomes one JSON line in a size-rotated log:
+tool name (from the MCP middleware), command, collection, query shape
+(values replaced by types), duration, and a plan summary (stages,
+index used, keys/docs examined, returned). A shape is explained at most
+once per EXPLAIN_INTERVAL_SECONDS; repeats reuse the cached plan.
+
+Enabled by SLOW_QUERY_MS (threshold in ms). SLOW_QUERY_LOG sets the file
+(default slow_queries.jsonl); with several workers use a {pid} placeholder
+(slow_queries.{pid}.jsonl), since rotation is not safe across processes.
+
+Per-shape counters and cached plans are capped at MAX_SHAPES, so a
+long-running worker's memory stays bounded; shapes past the cap are still
+logged, just not aggregated in summary().
+
+db/client.py creates one monitor per process and attaches it to every
+Motor client it builds; close() stops the explain thread and closes the
+explain client (both start again on the next slow command).
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, Callable, Dict, Optional
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD_MS = 100.0
+DEFAULT_LOG_PATH = "slow_queries.jsonl"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+EXPLAIN_INTERVAL_SECONDS = 300
+QUEUE_SIZE = 256
+MAX_SHAPES = 1000
+
+EXPLAINABLE_COMMANDS = {
+    "find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"
+}
+
+# Session / cluster fields the driver adds that explain rejects
+_DRIVER_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "$clusterTime", "$db", "$readPreference"}
+
+# Name of the tool whose work is running; set by the MCP middleware.
+# Motor copies the context into its executor threads, so the listener sees it.
+current_tool: ContextVar[Optional[str]] = ContextVar("current_tool", default=None)
+
+# ============================================================================
+# QUERY SHAPES AND PLANS
+# ============================================================================
+
+def query_shape(value: Any) -> Any:
+    """Replace literal values with their type names, keep operators/fields"""
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return []
+        # $in lists etc. collapse to one element
+        shapes = [query_shape(v) for v in value]
+        if all(s == shapes[0] for s in shapes):
+            return [shapes[0]]
+        return shapes
+    return type(value).__name__
+
+def command_shape(command_name: str, command: Dict) -> Dict:
+    """The parts of a command that determine its plan"""
+    shape = {"command": command_name, "collection": command.get(command_name)}
+    for key in ("filter", "query", "sort", "projection", "pipeline", "key", "hint"):
+        if key in command:
+            shape[key] = query_shape(command[key])
+    # Sort directions are part of the plan, not data
+    if isinstance(command.get("sort"), dict):
+        shape["sort"] = dict(command["sort"])
+    for key in ("updates", "deletes"):
+        if key in command:
+            shape[key] = [query_shape(op.get("q")) for op in command[key][:1]]
+    return shape
+
+def explain_command(command: Dict) -> Dict:
+    """The command as explain expects it (driver bookkeeping removed)"""
+    return {k: v for k, v in command.items() if k not in _DRIVER_FIELDS}
+
+def summarize_plan(explain: Dict) -> Dict:
+    """Winning plan stages and execution stats from an explain result"""
+    stats = explain.get("executionStats")
+    planner = explain.get("queryPlanner")
+
+    # aggregate explains nest the query stage under $cursor / stages
+    if planner is None and explain.get("stages"):
+        cursor_stage = explain["stages"][0].get("$cursor", {})
+        planner = cursor_stage.get("queryPlanner")
+        stats = stats or cursor_stage.get("executionStats")
+    planner = planner or {}
+    stats = stats or {}
+
+    stages, indexes = [], []
+    node = planner.get("winningPlan", {})
+    node = node.get("queryPlan", node)  # SBE plans wrap the classic tree
+    while node:
+        stages.append(node.get("stage"))
+        if node.get("indexName"):
+            indexes.append(node["indexName"])
+        node = node.get("inputStage") or (node.get("inputStages") or [None])[0]
+
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collscan": "COLLSCAN" in stages,
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+# ============================================================================
+# MONITOR
+# ============================================================================
+
+class SlowQueryMonitor(monitoring.CommandListener):
+    """
+    Records commands slower than threshold_ms.
+
+    client_factory builds the synchronous pymongo client used for explain;
+    it is called lazily on the worker thread. Pass None to log slow
+    commands without plans.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = DEFAULT_THRESHOLD_MS,
+        log_path: str = DEFAULT_LOG_PATH,
+        client_factory: Optional[Callable[[], Any]] = None,
+        sink: Optional[Callable[[Dict], None]] = None
+    ):
+        self.threshold_micros = threshold_ms * 1000
+        self.client_factory = client_factory
+        self._sink = sink or _rotating_sink(log_path)
+        self._started: Dict[int, tuple] = {}
+        self._queue: "queue.Queue" = queue.Queue(maxsize=QUEUE_SIZE)
+        self._plans: Dict[str, tuple] = {}  # shape key -> (explained_at, summary)
+        self._counts: Dict[str, list] = {}  # shape key -> [count, total_ms, max_ms, tool, shape]
+        self._worker: Optional[threading.Thread] = None
+        self._client = None
+        self._lock = threading.Lock()
+
+    # -- listener (hot path) -------------------------------------------------
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE_COMMANDS:
+            self._started[event.request_id] = (event.command, event.database_name, current_tool.get())
+
+    def succeeded(self, event):
+        entry = self._started.pop(event.request_id, None)
+        if entry is not None and event.duration_micros >= self.threshold_micros:
+            self._enqueue(event, entry, "ok")
+
+    def failed(self, event):
+        entry = self._started.pop(event.request_id, None)
+        if entry is not None and event.duration_micros >= self.threshold_micros:
+            self._enqueue(event, entry, "error")
+
+    def _enqueue(self, event, entry, outcome):
+        command, database, tool = entry
+        try:
+            self._queue.put_nowait((event.command_name, command, database, tool, event.duration_micros / 1000, outcome))
+        except queue.Full:
+            return  # never block the driver; the report is best-effort
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="slow-query-explain", daemon=True)
+                    self._worker.start()
+
+    # -- worker --------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self.process(*item)
+            except Exception as e:
+                logger.warning("Slow-query processing failed: %s", e)
+            finally:
+                self._queue.task_done()
+
+    def process(self, command_name, command, database, tool, duration_ms, outcome="ok") -> Dict:
+        """Build, explain (if due) and write one slow-query record"""
+        shape = command_shape(command_name, command)
+        key = json.dumps(shape, sort_keys=True)
+
+        with self._lock:
+            stats = self._counts.get(key)
+            if stats is None and len(self._counts) < MAX_SHAPES:
+                stats = self._counts[key] = [0, 0.0, 0.0, tool, shape]
+            if stats is not None:
+                stats[0] += 1
+                stats[1] += duration_ms
+                stats[2] = max(stats[2], duration_ms)
+
+        cached = self._plans.get(key)
+        if cached is None or time.monotonic() - cached[0] > EXPLAIN_INTERVAL_SECONDS:
+            plan = self._explain(command, database)
+            if plan is not None:
+                if key not in self._plans and len(self._plans) >= MAX_SHAPES:
+                    # Evict the oldest explained shape
+                    del self._plans[next(iter(self._plans))]
+                self._plans[key] = (time.monotonic(), plan)
+        else:
+            plan = cached[1]
+
+        record = {
+            "ts": datetime.utcnow().isoformat(),
+            "tool": tool,
+            "command": command_name,
+            "collection": shape["collection"],
+            "database": database,
+            "duration_ms": round(duration_ms, 3),
+            "outcome": outcome,
+            "shape": shape,
+            "plan": plan,
+        }
+        self._sink(record)
+        return record
+
+    def _explain(self, command, database) -> Optional[Dict]:
+        if self.client_factory is None:
+            return None
+        try:
+            if self._client is None:
+                self._client = self.client_factory()
+            result = self._client[database].command({
+                "explain": explain_command(command),
+                "verbosity": "executionStats"
+            })
+            return summarize_plan(result)
+        except Exception as e:
+            return {"error": str(e)}
+
+    # -- reporting -----------------------------------------------------------
+
+    def summary(self, top: int = 20) -> list:
+        """Slow shapes ordered by total time"""
+        with self._lock:
+            rows = [
+                {
+                    "tool": tool,
+                    "shape": shape,
+                    "count": count,
+                    "total_ms": round(total, 3),
+                    "max_ms": round(max_ms, 3),
+                    "plan": (self._plans.get(key) or (None, None))[1],
+                }
+                for key, (count, total, max_ms, tool, shape) in self._counts.items()
+            ]
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows[:top]
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the explain thread and close the explain client"""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._queue.put(None)
+            worker.join(timeout)
+        client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def drain(self, timeout: float = 5.0) -> None:
+        """Wait for queued commands to be processed (tests, shutdown)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+def _rotating_sink(path: str) -> Callable[[Dict], None]:
+    slow_logger = logging.getLogger(f"{__name__}.{path}")
+    if not slow_logger.handlers:  # one handler per file, however many monitors
+        handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        slow_logger.setLevel(logging.INFO)
+        slow_logger.propagate = False
+        slow_logger.addHandler(handler)
+
+    def sink(record: Dict) -> None:
+        slow_logger.info(json.dumps(record, default=str, separators=(",", ":")))
+
+    return sink
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+def slow_query_monitor_from_env(client_factory: Optional[Callable[[], Any]] = None) -> Optional[SlowQueryMonitor]:
+    """SlowQueryMonitor if SLOW_QUERY_MS is set, else None"""
+    threshold = os.getenv("SLOW_QUERY_MS")
+    if not threshold:
+        return None
+    return SlowQueryMonitor(
+        threshold_ms=float(threshold),
+        log_path=os.getenv("SLOW_QUERY_LOG", DEFAULT_LOG_PATH).replace("{pid}", str(os.getpid())),
+        client_factory=client_factory
+    )
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def main():
+    """Aggregate a slow-query log (and its rotated files) by tool and shape"""
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Summarize a slow-query log")
+    parser.add_argument("path", nargs="?", default=DEFAULT_LOG_PATH)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    groups: Dict[str, Dict] = {}
+    for path in sorted(glob.glob(args.path + "*")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                key = json.dumps([record["tool"], record["shape"]], sort_keys=True)
+                group = groups.setdefault(key, {"tool": record["tool"], "shape": record["shape"],
+                                                "count": 0, "total_ms": 0.0, "max_ms": 0.0, "plan": None})
+                group["count"] += 1
+                group["total_ms"] += record["duration_ms"]
+                group["max_ms"] = max(group["max_ms"], record["duration_ms"])
+                group["plan"] = record.get("plan") or group["plan"]
+
+    ranked = sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)
+    for group in ranked[:args.top]:
+        plan = group["plan"] or {}
+        print(f"{group['tool'] or '-'}  {group['shape']['command']} {group['shape']['collection']}  "
+              f"n={group['count']} total={group['total_ms']:.1f}ms max={group['max_ms']:.1f}ms")
+        print(f"    stages={plan.get('stages')} indexes={plan.get('indexes')} "
+              f"keys={plan.get('keys_examined')} docs={plan.get('docs_examined')} returned={plan.get('returned')}")
+        print(f"    shape={json.dumps({k: v for k, v in group['shape'].items() if k not in ('command', 'collection')})}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# telemetry/trace_report.py
+"""
+Offline analysis of a JSONL trace file (TRACE_EXPORTER=file)
+
+Merges spans from the gateway and MCP server files, groups them by trace
+and prints the slowest traces as indented span trees.
+
+Usage:
+    python -m telemetry.trace_report traces.jsonl [server_traces.jsonl ...] [--top 5]
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from typing import Dict, List
+
+def load_spans(paths: List[str]) -> List[Dict]:
+    spans = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            spans.extend(json.loads(line) for line in f if line.strip())
+    return spans
+
+def build_traces(spans: List[Dict]) -> Dict[str, List[Dict]]:
+    traces = defaultdict(list)
+    for s in spans:
+        traces[s["trace_id"]].append(s)
+    return traces
+
+def format_trace(spans: List[Dict]) -> List[str]:
+    """Indented tree, children ordered by start time"""
+    by_id = {s["span_id"]: s for s in spans}
+    children = defaultdict(list)
+    roots = []
+    for s in sorted(spans, key=lambda s: s["start_ns"]):
+        if s["parent_id"] in by_id:
+            children[s["parent_id"]].append(s)
+        else:
+            roots.append(s)
+
+    lines = []
+    t0 = min(s["start_ns"] for s in spans)
+
+    def walk(s, depth):
+        offset = (s["start_ns"] - t0) / 1e6
+        flag = " !" if s["status"] == "error" else ""
+        label = "  " * depth + s["name"]
+        lines.append(f"{label:<48} +{offset:8.2f}ms {s['duration_ms']:9.2f}ms  [{s['service']}]{flag}")
+        for child in children[s["span_id"]]:
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+    return lines
+
+def trace_duration(spans: List[Dict]) -> float:
+    start = min(s["start_ns"] for s in spans)
+    end = max(s["start_ns"] + s["duration_ms"] * 1e6 for s in spans)
+    return (end - start) / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the slowest traces from JSONL span files")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    traces = build_traces(load_spans(args.paths))
+    ranked = sorted(traces.items(), key=lambda item: trace_duration(item[1]), reverse=True)
+
+    print(f"{len(traces)} traces")
+    for trace_id, spans in ranked[:args.top]:
+        print(f"\ntrace {trace_id}  {trace_duration(spans):.2f}ms  {len(spans)} spans")
+        for line in format_trace(spans):
+            print("  " + line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+# telemetry/tracing.py
+"""
+Lightweight request tracing
+
+Spans follow the W3C trace-context model (128-bit trace id, 64-bit span
+id, traceparent header) so traces stitch together across the gateway and
+the MCP server, and an OpenTelemetry/OTLP exporter can be plugged in
+without touching the instrumentation.
+
+The current span lives in a ContextVar, so it follows asyncio tasks and
+Motor's executor threads (Motor copies the context), which is how Mongo
+command spans find their parent tool span.
+
+Tracing is off unless an exporter is configured; span() then returns a
+shared no-op and costs one global check.
+
+Configuration (configure_from_env):
+    TRACE_EXPORTER=console        one line per span on stderr
+    TRACE_EXPORTER=file           JSON lines appended to TRACE_FILE
+    TRACE_EXPORTER=pkg.mod:Class  any SpanExporter subclass
+    TRACE_FILE=traces.jsonl
+"""
+
+import importlib
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# ============================================================================
+# SPANS
+# ============================================================================
+
+class SpanContext:
+    """Identifies a span; used as the parent of remote (propagated) spans"""
+
+    __slots__ = ("trace_id", "span_id")
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+class Span(SpanContext):
+    """A timed operation; use as a context manager to make it current"""
+
+    __slots__ = ("parent_id", "name", "service", "start_ns", "end_ns", "attributes", "status", "_token")
+
+    def __init__(self, name: str, parent: Optional[SpanContext], attributes: Optional[Dict] = None):
+        super().__init__(
+            parent.trace_id if parent else secrets.token_hex(16),
+            secrets.token_hex(8)
+        )
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.service = _service_name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.status = "ok"
+        self._token = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = "error"
+        self.attributes["error"] = message
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": self.service,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.set_error(f"{exc_type.__name__}: {exc}")
+        _current_span.reset(self._token)
+        self.end()
+        return False
+
+class _NoopSpan:
+    """Returned when tracing is disabled"""
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, message):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[SpanContext]] = ContextVar("current_span", default=None)
+
+def current_span() -> Optional[SpanContext]:
+    return _current_span.get()
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+def span(name: str, attributes: Optional[Dict] = None, parent: Optional[SpanContext] = None):
+    """
+    Start a span as a child of parent (default: the current span).
+
+        with span("graph.chat_node", {"model": LLM_MODEL}):
+            ...
+    """
+    if _exporter is None:
+        return NOOP_SPAN
+    return Span(name, parent or _current_span.get(), attributes)
+
+def start_span(name: str, attributes: Optional[Dict] = None, parent: Optional[SpanContext] = None):
+    """Start a span without making it current (end it with span.end())"""
+    return span(name, attributes, parent)
+
+# ============================================================================
+# PROPAGATION (W3C traceparent)
+# ============================================================================
+
+def format_traceparent(context: Optional[SpanContext] = None) -> Optional[str]:
+    context = context or _current_span.get()
+    if context is None:
+        return None
+    return f"00-{context.trace_id}-{context.span_id}-01"
+
+def parse_traceparent(header: Optional[str]) -> Optional[SpanContext]:
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    return SpanContext(parts[1], parts[2])
+
+# ============================================================================
+# EXPORTERS
+# ============================================================================
+
+class SpanExporter:
+    """Receives every finished span. Must be thread-safe."""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+class ConsoleSpanExporter(SpanExporter):
+    """One human-readable line per span"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = (
+            f"[trace {span.trace_id[:8]}] {span.service}:{span.name} "
+            f"{span.duration_ms:.2f}ms {span.status} {span.attributes}\n"
+        )
+        with self._lock:
+            self.stream.write(line)
+
+class JsonlFileSpanExporter(SpanExporter):
+    """Appends spans as JSON lines for offline analysis"""
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._file.flush()
+                self._pending = 0
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.flush()
+            self._file.close()
+
+class InMemorySpanExporter(SpanExporter):
+    """Collects spans in a list (tests, benchmarks)"""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+_exporter: Optional[SpanExporter] = None
+_service_name = "expense-tracker"
+
+def configure_tracing(exporter: Optional[SpanExporter], service_name: Optional[str] = None) -> None:
+    """Install an exporter (None disables tracing)"""
+    global _exporter, _service_name
+    previous = _exporter
+    if service_name:
+        _service_name = service_name
+    _exporter = exporter
+    if previous is not None and previous is not exporter:
+        previous.shutdown()
+
+def configure_from_env(service_name: str) -> Optional[SpanExporter]:
+    """Configure tracing from TRACE_EXPORTER / TRACE_FILE"""
+    kind = os.getenv("TRACE_EXPORTER", "").strip()
+    if not kind or kind == "none":
+        configure_tracing(None, service_name)
+        return None
+
+    if kind == "console":
+        exporter = ConsoleSpanExporter()
+    elif kind == "file":
+        exporter = JsonlFileSpanExporter(os.getenv("TRACE_FILE", "traces.jsonl"))
+    else:
+        module_name, _, class_name = kind.partition(":")
+        exporter = getattr(importlib.import_module(module_name), class_name)()
+
+    configure_tracing(exporter, service_name)
+    return exporter
+
+def shutdown_tracing() -> None:
+    configure_tracing(None)
+
+# ============================================================================
+# ASGI MIDDLEWARE
+# ============================================================================
+
+class TracingMiddleware:
+    """
+    Root span per HTTP request, continuing an incoming traceparent.
+    Named after the matched route template once routing has run.
+    """
+
+    def __init__(self, app, exclude_paths=("/metrics", "/health")):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if _exporter is None or scope["type"] != "http" or scope.get("path") in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for name, value in scope.get("headers", ()):
+            if name == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+
+        method = scope.get("method", "")
+        with Span(f"HTTP {method}", parent, {"http.path": scope.get("path")}) as request_span:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status", message["status"])
+                    if message["status"] >= 500:
+                        request_span.status = "error"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    request_span.name = f"HTTP {method} {route}"
@@ -166,7 +166,7 @@ async def run_quick_smoke_test():
         # Test 4: Indexes exist
         try:
             indexes = await group_members_col.index_information()
-            if "idx_group_user_unique" in indexes:
+            if "idx_group_user_active_unique" in indexes:
                 print_success("Critical indexes exist")
             else:
                 print_warning("Some indexes missing - run setup_phase1.py")
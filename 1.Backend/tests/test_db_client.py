@@ -0,0 +1,147 @@
+# tests/test_db_client.py
+"""
+DB Client Tests: import-safe, lazily connected client
+
+Tests for:
+1. Importing the server utils needs no MONGODB_URI and loads no driver
+2. One client per event loop; clients of closed loops are released;
+   all clients share one slow-query monitor
+3. use_database() routes the collection proxies to another backend
+4. A forked worker does not inherit its parent's clients
+"""
+
+import asyncio
+import os
+import pytest
+import subprocess
+import sys
+import pathlib
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from db import client as db_client
+
+# ============================================================================
+# TEST: Import is side-effect free
+# ============================================================================
+
+def test_import_needs_no_settings():
+    """Test server utils import without MONGODB_URI, Motor or numpy"""
+    env = {k: v for k, v in os.environ.items() if not k.startswith("MONGODB_")}
+    result = subprocess.run(
+        [sys.executable, "-c",
+         "import sys\n"
+         "import server.utils.splits, server.utils.authorization\n"
+         "print([m for m in ('motor', 'telemetry', 'numpy') if m in sys.modules])"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+    print("✓ Import is cheap and needs no settings")
+
+# ============================================================================
+# TEST: Per-loop clients
+# ============================================================================
+
+def test_client_per_event_loop():
+    """Test each event loop gets its own client, reused within the loop"""
+    db_client.configure(uri="mongodb://localhost:27017", db_name="expense_tracker_test", tls=False)
+
+    async def clients():
+        return db_client.get_client(), db_client.get_client(), db_client.db.name
+
+    try:
+        first, again, name = asyncio.run(clients())
+        second, _, _ = asyncio.run(clients())
+
+        assert first is again
+        assert first is not second
+        assert name == "expense_tracker_test"
+        assert db_client.expenses_col.name == "expenses"
+    finally:
+        db_client.close()
+        db_client._settings.clear()
+    print("✓ One client per event loop")
+
+def test_closed_loop_clients_are_released():
+    """Test repeated asyncio.run() calls don't accumulate clients"""
+    db_client.configure(uri="mongodb://localhost:27017", db_name="expense_tracker_test", tls=False)
+
+    async def build():
+        return db_client.get_client()
+
+    try:
+        for _ in range(5):
+            asyncio.run(build())
+        assert len(db_client._handles) == 1  # only the last loop's client
+    finally:
+        db_client.close()
+        db_client._settings.clear()
+    print("✓ Closed loops release their clients")
+
+def test_slow_query_monitor_shared_across_clients(monkeypatch, tmp_path):
+    """Test rebuilt clients reuse the process's slow-query monitor"""
+    monkeypatch.setenv("SLOW_QUERY_MS", "100")
+    monkeypatch.setenv("SLOW_QUERY_LOG", str(tmp_path / "slow.jsonl"))
+    db_client.configure(uri="mongodb://localhost:27017", db_name="expense_tracker_test", tls=False)
+
+    async def build():
+        return db_client.get_client()
+
+    try:
+        asyncio.run(build())
+        monitor = db_client._slow_query_monitor
+        db_client.close()
+        asyncio.run(build())
+        assert monitor is not None
+        assert db_client._slow_query_monitor is monitor
+    finally:
+        db_client.close()
+        db_client._settings.clear()
+        db_client._slow_query_monitor = None
+    print("✓ Slow-query monitor shared across clients")
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_fork_drops_parent_clients():
+    """Test a forked child builds its own client instead of reusing the parent's"""
+    db_client.configure(uri="mongodb://localhost:27017", db_name="expense_tracker_test", tls=False)
+    try:
+        parent = db_client.get_client()
+        pid = os.fork()
+        if pid == 0:
+            inherited = db_client._sync_handle is not None or len(db_client._handles) > 0
+            rebuilt = db_client.get_client() is not parent
+            os._exit(0 if not inherited and rebuilt else 1)
+        _, status = os.waitpid(pid, 0)
+
+        assert os.WEXITSTATUS(status) == 0
+        assert db_client.get_client() is parent
+    finally:
+        db_client.close()
+        db_client._settings.clear()
+    print("✓ Forked workers build their own clients")
+
+# ============================================================================
+# TEST: Override
+# ============================================================================
+
+class FakeDatabase:
+    name = "fake"
+
+    def __getitem__(self, name):
+        return ("collection", name)
+
+def test_use_database_override():
+    """Test proxies resolve to the override and revert afterwards"""
+    fake = FakeDatabase()
+
+    with db_client.use_database(fake):
+        assert db_client.get_db() is fake
+        assert db_client.db.name == "fake"
+        assert db_client.get_collection("groups") == ("collection", "groups")
+
+    assert db_client._override is None
+    print("✓ use_database overrides and restores")
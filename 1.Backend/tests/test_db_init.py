@@ -0,0 +1,176 @@
+# tests/test_db_init.py
+"""
+Database Setup Tests: diff-based, fingerprinted setup
+
+Tests for:
+1. Fingerprint is stable and tracks index changes
+2. Index diff matches by key, reports conflicts
+3. Setup creates only what is missing, then skips on a matching fingerprint
+4. Concurrent setup by another worker is not an error
+"""
+
+import pytest
+import sys
+import pathlib
+from pymongo.errors import OperationFailure
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from db import init
+from db.client import use_database
+from db.init import COLLECTION_INDEXES, diff_indexes, index, schema_fingerprint, setup_collection_hybrid
+
+# ============================================================================
+# FAKE DATABASE
+# ============================================================================
+
+class FakeCursor:
+    def __init__(self, items):
+        self.items = items
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for item in self.items:
+            yield item
+
+class FakeCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.indexes = {"_id_": {"key": [("_id", 1)], "v": 2}}
+        self.docs = {}
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def create_indexes(self, models):
+        self.database.calls.append(("create_indexes", self.name))
+        for model in models:
+            doc = dict(model.document)
+            self.indexes[doc.pop("name")] = {**doc, "key": list(doc["key"].items())}
+
+    async def drop_index(self, name):
+        self.database.calls.append(("drop_index", self.name, name))
+        if name not in self.indexes:
+            raise OperationFailure("index not found", 27)
+        del self.indexes[name]
+
+    async def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs[query["_id"]] = doc
+
+class FakeDatabase:
+    name = "fake"
+
+    def __init__(self):
+        self.collections = {}
+        self.calls = []
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
+
+    async def list_collections(self):
+        self.calls.append(("list_collections",))
+        return FakeCursor([{"name": n, "options": {}} for n in self.collections])
+
+    async def create_collection(self, name, **options):
+        self.calls.append(("create_collection", name))
+        self[name]
+
+    async def command(self, command):
+        self.calls.append(("command", next(iter(command))))
+
+# ============================================================================
+# TEST: Fingerprint and diff
+# ============================================================================
+
+def test_fingerprint_tracks_indexes(monkeypatch):
+    """Test the fingerprint is deterministic and changes with the desired indexes"""
+    before = schema_fingerprint()
+    assert schema_fingerprint() == before
+
+    changed = dict(COLLECTION_INDEXES, users=COLLECTION_INDEXES["users"] + [index([("full_name", 1)], "idx_name")])
+    monkeypatch.setattr(init, "COLLECTION_INDEXES", changed)
+
+    assert schema_fingerprint() != before
+    print("✓ Fingerprint tracks desired indexes")
+
+def test_diff_indexes():
+    """Test indexes match by key and option mismatches are conflicts"""
+    existing = {
+        "_id_": {"key": [("_id", 1)], "v": 2},
+        "email_1": {"key": [("email", 1.0)], "unique": True, "v": 2},
+        "idx_user": {"key": [("user_id", 1)], "v": 2},
+    }
+    desired = [
+        index([("email", 1)], "idx_email_unique", unique=True),   # same key, other name: present
+        index([("user_id", 1)], "idx_user", unique=True),         # same key, other options: conflict
+        index([("group_id", 1)], "idx_group"),                    # missing
+    ]
+
+    missing, conflicts = diff_indexes(existing, desired)
+
+    assert [s["name"] for s in missing] == ["idx_group"]
+    assert conflicts == [("idx_user", "idx_user")]
+    print("✓ Index diff by key")
+
+# ============================================================================
+# TEST: Setup
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_setup_applies_diff_then_skips():
+    """Test setup creates missing pieces once and skips on the next run"""
+    fake = FakeDatabase()
+    fake["users"].indexes["idx_email_unique"] = {"key": [("email", 1)], "unique": True, "v": 2}
+
+    with use_database(fake):
+        summary = await setup_collection_hybrid()
+
+        assert summary["skipped"] is False
+        assert "users" not in summary["created_indexes"]
+        assert set(summary["created_indexes"]) == set(COLLECTION_INDEXES) - {"users"}
+        assert set(fake["expenses"].indexes) == {"_id_"} | {s["name"] for s in COLLECTION_INDEXES["expenses"]}
+        # One createIndexes batch per collection
+        assert sum(1 for c in fake.calls if c[0] == "create_indexes") == len(COLLECTION_INDEXES) - 1
+
+        fake.calls.clear()
+        again = await setup_collection_hybrid()
+
+    assert again["skipped"] is True
+    assert fake.calls == []
+    print("✓ Setup applies the diff once, then skips")
+
+@pytest.mark.asyncio
+async def test_setup_tolerates_concurrent_worker():
+    """Test collections and drops another worker got to first count as done"""
+    class RacedDatabase(FakeDatabase):
+        async def create_collection(self, name, **options):
+            await super().create_collection(name, **options)
+            raise OperationFailure("collection already exists", 48)
+
+    class RacedExpenses(FakeCollection):
+        async def drop_index(self, name):
+            self.indexes.pop(name, None)  # the other worker's drop
+            await super().drop_index(name)
+
+    fake = RacedDatabase()
+    fake.collections["expenses"] = RacedExpenses(fake, "expenses")
+    fake["expenses"].indexes["idx_user_date"] = {"key": [("user_id", 1), ("date", 1)], "v": 2}
+
+    with use_database(fake):
+        summary = await setup_collection_hybrid()
+        again = await setup_collection_hybrid()
+
+    assert summary["dropped_indexes"] == ["expenses.idx_user_date"]
+    assert "idx_user_date" not in fake["expenses"].indexes
+    assert again["skipped"] is True  # recorded as complete
+    print("✓ Setup tolerates a concurrent worker")
@@ -0,0 +1,157 @@
+# tests/test_etag.py
+"""
+ETag Tests: Conditional reads for MCP tools
+
+Tests for:
+1. ETag construction and If-None-Match comparison
+2. Version tokens come from a count and a top-1 lookup, never a scan
+3. Version tokens change when the underlying data changes
+"""
+
+import pytest
+import sys
+import pathlib
+import uuid
+from datetime import datetime
+
+# Add parent directory to path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from bson import ObjectId
+
+from gateway.etag import compute_etag, etag_matches, make_etag
+
+# ============================================================================
+# TEST: ETag helpers
+# ============================================================================
+
+def test_etag_depends_on_all_inputs():
+    """Test user, tool, args and version all change the ETag"""
+    args = {"start_date": "2025-01-01", "end_date": "2025-01-31"}
+    base = make_etag("u1", "list_expenses", args, [3, "abc"])
+
+    assert base == make_etag("u1", "list_expenses", dict(reversed(list(args.items()))), [3, "abc"])
+    assert base != make_etag("u2", "list_expenses", args, [3, "abc"])
+    assert base != make_etag("u1", "summarize", args, [3, "abc"])
+    assert base != make_etag("u1", "list_expenses", {**args, "category": "food"}, [3, "abc"])
+    assert base != make_etag("u1", "list_expenses", args, [2, "abc"])
+    assert base.startswith('W/"')
+    print("✓ ETag covers user, tool, args and version")
+
+def test_if_none_match_comparison():
+    """Test weak comparison, lists and wildcard"""
+    etag = 'W/"abc"'
+
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"x", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"abd"', etag)
+    assert not etag_matches(None, etag)
+    print("✓ If-None-Match comparison works")
+
+@pytest.mark.asyncio
+async def test_unversioned_tool_has_no_etag():
+    """Test write tools never get an ETag"""
+    assert await compute_etag(None, "u1", "add_expense", {}) is None
+    print("✓ Write tools not versioned")
+
+# ============================================================================
+# TEST: Version queries
+# ============================================================================
+
+class RecordingCursor:
+    def __init__(self, collection, docs):
+        self.collection = collection
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.collection.calls.append(("sort", field, direction))
+        return self
+
+    def limit(self, n):
+        self.collection.calls.append(("limit", n))
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+class RecordingCollection:
+    """Expenses double that records which queries the version token uses"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    async def count_documents(self, match):
+        self.calls.append(("count_documents", match))
+        return len(self.docs)
+
+    def find(self, match, projection=None):
+        self.calls.append(("find", projection))
+        return RecordingCursor(self, sorted(self.docs, key=lambda d: d["_id"], reverse=True))
+
+    def aggregate(self, pipeline):
+        raise AssertionError("version token must not aggregate over every document")
+
+class RecordingDatabase:
+    def __init__(self, expenses):
+        self.expenses = expenses
+
+    def __getitem__(self, name):
+        return self.expenses
+
+@pytest.mark.asyncio
+async def test_version_uses_count_and_top_one():
+    """Test the token is a count plus one _id lookup, skipped when empty"""
+    args = {"start_date": "2025-01-01", "end_date": "2025-12-31"}
+    ids = [ObjectId() for _ in range(3)]
+    expenses = RecordingCollection([{"_id": i} for i in ids])
+
+    etag = await compute_etag(RecordingDatabase(expenses), "u1", "list_expenses", args)
+
+    assert etag == make_etag("u1", "list_expenses", args, [3, ids[-1]])
+    assert expenses.calls == [
+        ("count_documents", {"user_id": "u1", "date": {"$gte": "2025-01-01", "$lte": "2025-12-31"}}),
+        ("find", {"_id": 1}),
+        ("sort", "_id", -1),
+        ("limit", 1),
+    ]
+
+    empty = RecordingCollection([])
+    await compute_etag(RecordingDatabase(empty), "u1", "list_expenses", args)
+    assert [c[0] for c in empty.calls] == ["count_documents"]
+    print("✓ Version token is a count plus a top-1 lookup")
+
+# ============================================================================
+# TEST: Version tokens (database)
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_version_changes_with_data():
+    """Test inserting and deleting an expense changes the ETag"""
+    from db.client import db
+
+    user_id = f"etag-{uuid.uuid4().hex}"
+    args = {"start_date": "2025-01-01", "end_date": "2025-12-31"}
+    expenses = db["expenses"]
+
+    try:
+        empty = await compute_etag(db, user_id, "list_expenses", args)
+        res = await expenses.insert_one({
+            "user_id": user_id, "date": "2025-03-01", "amount": 10.0,
+            "category": "food", "created_at": datetime.utcnow()
+        })
+        inserted = await compute_etag(db, user_id, "list_expenses", args)
+        unchanged = await compute_etag(db, user_id, "list_expenses", args)
+        await expenses.delete_one({"_id": res.inserted_id})
+        deleted = await compute_etag(db, user_id, "list_expenses", args)
+
+        assert inserted != empty
+        assert inserted == unchanged
+        assert deleted != inserted
+        print("✓ Version token tracks inserts and deletes")
+    finally:
+        await expenses.delete_many({"user_id": user_id})
@@ -0,0 +1,236 @@
+# tests/test_events.py
+"""
+Event Tests: Change stream fan-out for /events
+
+Tests for:
+1. Routing by owner, group membership and participant
+2. Membership changes update the group index
+3. Slow clients get a single resync instead of a backlog
+4. Lost resume tokens restart the stream and resync every client
+5. SSE streams subscribe only once they start
+"""
+
+import asyncio
+import json
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+from gateway.events import EventBroker, Subscription, build_event, sse_stream, RESYNC_EVENT
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def make_change(collection, operation="insert", **doc):
+    return {
+        "operationType": operation,
+        "ns": {"db": "expense_tracker", "coll": collection},
+        "documentKey": {"_id": ObjectId()},
+        "fullDocument": doc,
+    }
+
+def make_broker(*subscriptions):
+    broker = EventBroker(db=None)
+    for subscription in subscriptions:
+        broker.register(subscription)
+    return broker
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs
+
+class FakeStream:
+    def __init__(self, error):
+        self.error = error
+        self.resume_token = None
+
+    async def __aenter__(self):
+        raise self.error
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeDb:
+    """watch() fails with each of `errors` in turn; records its options"""
+
+    def __init__(self, errors=(), version=(5, 0, 0)):
+        self.errors = list(errors)
+        self.version = list(version)
+        self.watches = []
+
+    def __getitem__(self, name):
+        return self
+
+    def find(self, *args):
+        return FakeCursor([{"group_id": "g1"}])
+
+    async def command(self, name):
+        return {"versionArray": self.version}
+
+    def watch(self, pipeline, **options):
+        self.watches.append(options)
+        return FakeStream(self.errors.pop(0))
+
+def drain(subscription):
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return messages
+
+# ============================================================================
+# TEST: Routing
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_personal_expense_goes_to_owner():
+    """Test a personal expense reaches only its owner"""
+    alice = Subscription("alice", set())
+    bob = Subscription("bob", set())
+    broker = make_broker(alice, bob)
+
+    assert broker.dispatch(build_event(make_change("expenses", user_id="alice"))) == 1
+
+    messages = drain(alice)
+    assert len(messages) == 1
+    assert messages[0].startswith("event: expenses\n")
+    assert json.loads(messages[0].split("data: ")[1])["operation"] == "insert"
+    assert drain(bob) == []
+    print("✓ Personal expense routed to owner")
+
+@pytest.mark.asyncio
+async def test_group_expense_goes_to_members():
+    """Test a group expense reaches every subscribed member once"""
+    alice = Subscription("alice", {"g1"})
+    alice_tab2 = Subscription("alice", {"g1"})
+    bob = Subscription("bob", {"g1"})
+    carol = Subscription("carol", {"g2"})
+    broker = make_broker(alice, alice_tab2, bob, carol)
+
+    recipients = broker.dispatch(build_event(make_change("expenses", user_id="alice", group_id="g1")))
+
+    assert recipients == 3
+    assert len(drain(alice)) == 1
+    assert len(drain(alice_tab2)) == 1
+    assert len(drain(bob)) == 1
+    assert drain(carol) == []
+    print("✓ Group expense routed to members")
+
+@pytest.mark.asyncio
+async def test_participant_row_goes_to_participant():
+    """Test a split row reaches the participant"""
+    bob = Subscription("bob", set())
+    broker = make_broker(bob)
+
+    broker.dispatch(build_event(make_change("expense_participants", user_id="bob", expense_id="e1")))
+
+    assert len(drain(bob)) == 1
+    print("✓ Participant row routed")
+
+# ============================================================================
+# TEST: Membership and back-pressure
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_membership_changes_update_routing():
+    """Test joining and leaving a group changes which events a user gets"""
+    bob = Subscription("bob", set())
+    broker = make_broker(bob)
+
+    broker.dispatch(build_event(make_change("group_members", user_id="bob", group_id="g1", is_active=True)))
+    assert "g1" in bob.group_ids
+    drain(bob)
+
+    broker.dispatch(build_event(make_change("expenses", user_id="alice", group_id="g1")))
+    assert len(drain(bob)) == 1
+
+    broker.dispatch(build_event(make_change("group_members", "update", user_id="bob", group_id="g1", is_active=False)))
+    assert len(drain(bob)) == 1
+    assert "g1" not in bob.group_ids
+
+    broker.dispatch(build_event(make_change("expenses", user_id="alice", group_id="g1")))
+    assert drain(bob) == []
+    print("✓ Membership changes update routing")
+
+@pytest.mark.asyncio
+async def test_slow_client_gets_resync():
+    """Test a full queue collapses into a single resync event"""
+    slow = Subscription("alice", set(), queue_size=2)
+    broker = make_broker(slow)
+
+    for _ in range(5):
+        broker.dispatch(build_event(make_change("expenses", user_id="alice")))
+
+    assert drain(slow) == [RESYNC_EVENT]
+    print("✓ Slow client resyncs")
+
+@pytest.mark.asyncio
+async def test_unsubscribe_cleans_indexes():
+    """Test disconnected clients leave no routing entries"""
+    alice = Subscription("alice", {"g1", "g2"})
+    broker = make_broker(alice)
+    broker.unsubscribe(alice)
+
+    assert broker.subscriber_count == 0
+    assert broker.dispatch(build_event(make_change("expenses", user_id="alice", group_id="g1"))) == 0
+    print("✓ Unsubscribe cleans up")
+
+# ============================================================================
+# TEST: Change stream recovery
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_lost_resume_token_restarts_and_resyncs():
+    """Test history lost drops the token and tells every client to re-fetch"""
+    db = FakeDb([OperationFailure("history lost", code=286), asyncio.CancelledError()])
+    alice = Subscription("alice", set())
+    bob = Subscription("bob", {"g1"})
+    broker = EventBroker(db=db)
+    broker.register(alice)
+    broker.register(bob)
+    broker._resume_token = {"_data": "stale"}
+
+    with pytest.raises(asyncio.CancelledError):
+        await broker._run()
+
+    assert [w["resume_after"] for w in db.watches] == [{"_data": "stale"}, None]
+    assert drain(alice) == [RESYNC_EVENT]
+    assert drain(bob) == [RESYNC_EVENT]
+    print("✓ Lost resume token resyncs")
+
+@pytest.mark.asyncio
+async def test_pre_images_requested_on_6_0_only():
+    """Test servers before 6.0 are not asked for pre-images"""
+    for version, expected in [((5, 0, 9), False), ((6, 0, 0), True)]:
+        db = FakeDb([asyncio.CancelledError()], version=version)
+        with pytest.raises(asyncio.CancelledError):
+            await EventBroker(db=db)._run()
+        assert ("full_document_before_change" in db.watches[0]) == expected
+    print("✓ Pre-images gated on server version")
+
+# ============================================================================
+# TEST: SSE stream
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_sse_stream_subscribes_when_started():
+    """Test a response that never starts leaves no subscription behind"""
+    broker = EventBroker(db=FakeDb())
+    broker._ensure_running = lambda: None
+
+    async def connected():
+        return False
+
+    never_started = sse_stream(broker, "alice", connected)
+    assert broker.subscriber_count == 0
+    await never_started.aclose()
+
+    stream = sse_stream(broker, "alice", connected)
+    assert await stream.__anext__() == "retry: 3000\n\n"
+    assert broker.subscriber_count == 1
+    await stream.aclose()
+    assert broker.subscriber_count == 0
+    print("✓ SSE stream owns its subscription")
@@ -0,0 +1,168 @@
+# tests/test_export.py
+"""Export Tests: Streaming encoders for bulk expense export"""
+
+import csv
+import gzip
+import io
+import json
+import pytest
+from datetime import datetime
+from server.utils.export import (
+    EXPORT_COLUMNS,
+    build_export_query,
+    encode_csv,
+    encode_jsonl,
+    encode_parquet,
+    gzip_stream
+)
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def make_row(expense_id, participant=None, share=None):
+    return {
+        "expense_id": expense_id,
+        "date": "2025-01-15",
+        "amount": 90.0,
+        "category": "food",
+        "subcategory": "",
+        "description": "Dinner",
+        "note": "",
+        "group_id": "g1" if participant else None,
+        "user_id": "user1",
+        "paid_by": "user1",
+        "split_type": "equal" if participant else None,
+        "created_at": datetime(2025, 1, 15, 20, 30),
+        "participant_user_id": participant,
+        "share_amount": share,
+        "share_percentage": None,
+        "exact_amount": None,
+    }
+
+async def make_batches():
+    yield [make_row("e1", "user1", 30.0), make_row("e1", "user2", 30.0), make_row("e1", "user3", 30.0)]
+    yield [make_row("e2")]
+
+async def collect(stream):
+    return b"".join([chunk async for chunk in stream])
+
+def matches(doc, query):
+    """Enough of MongoDB's query language for the export filters"""
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(doc, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(field)
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$gte" in condition and not value >= condition["$gte"]:
+                return False
+            if "$lte" in condition and not value <= condition["$lte"]:
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return FakeCursor([d for d in self.docs if matches(d, query)])
+
+    async def find_one(self, query, projection=None):
+        return next((d for d in self.docs if matches(d, query)), None)
+
+class FakeDatabase:
+    def __init__(self, **collections):
+        self.collections = collections
+
+    def __getitem__(self, name):
+        return FakeCollection(self.collections.get(name, []))
+
+# ============================================================================
+# TEST: Encoders
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_csv_export():
+    """Test CSV export writes header and one line per participant row"""
+    data = (await collect(encode_csv(make_batches()))).decode("utf-8")
+    rows = list(csv.DictReader(io.StringIO(data)))
+
+    assert list(rows[0].keys()) == EXPORT_COLUMNS
+    assert len(rows) == 4
+    assert rows[1]["participant_user_id"] == "user2"
+    assert rows[3]["participant_user_id"] == ""
+    assert rows[0]["created_at"] == "2025-01-15T20:30:00"
+    print("✓ CSV export works")
+
+@pytest.mark.asyncio
+async def test_jsonl_export():
+    """Test JSONL export produces one JSON object per line"""
+    data = (await collect(encode_jsonl(make_batches()))).decode("utf-8")
+    lines = data.strip().split("\n")
+
+    assert len(lines) == 4
+    first = json.loads(lines[0])
+    assert first["share_amount"] == 30.0
+    assert first["created_at"] == "2025-01-15T20:30:00"
+    print("✓ JSONL export works")
+
+@pytest.mark.asyncio
+async def test_parquet_export():
+    """Test Parquet export writes one row group per batch"""
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    data = await collect(encode_parquet(make_batches()))
+    parquet_file = pq.ParquetFile(io.BytesIO(data))
+
+    assert parquet_file.metadata.num_rows == 4
+    assert parquet_file.num_row_groups == 2
+    table = parquet_file.read()
+    assert table.column("share_amount").to_pylist() == [30.0, 30.0, 30.0, None]
+    print("✓ Parquet export works")
+
+@pytest.mark.asyncio
+async def test_gzip_export():
+    """Test gzip wrapper round-trips the encoded stream"""
+    plain = await collect(encode_jsonl(make_batches()))
+    compressed = await collect(gzip_stream(encode_jsonl(make_batches())))
+
+    assert gzip.decompress(compressed) == plain
+    print("✓ Gzip export works")
+
+# ============================================================================
+# TEST: Query
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_personal_scope_excludes_paid_group_expenses():
+    """Test a group expense the user paid is not a personal expense"""
+    expenses = [
+        {"_id": "new", "user_id": "user1", "date": "2025-01-10"},                          # no group_id
+        {"_id": "migrated", "user_id": "user1", "group_id": "p1", "date": "2025-01-11"},   # Personal group
+        {"_id": "paid", "user_id": "user1", "group_id": "g1", "date": "2025-01-12"},       # group, paid by user1
+        {"_id": "other", "user_id": "user2", "date": "2025-01-13"},
+    ]
+    db = FakeDatabase(
+        expenses=expenses,
+        groups=[{"_id": "p1", "created_by": "user1", "group_type": "personal", "is_active": True}],
+        group_members=[{"group_id": "g1", "user_id": "user1", "is_active": True}]
+    )
+
+    personal = await build_export_query(db, "user1", scope="personal")
+    assert [e["_id"] for e in expenses if matches(e, personal)] == ["new", "migrated"]
+
+    everything = await build_export_query(db, "user1", scope="all", start_date="2025-01-11")
+    assert [e["_id"] for e in expenses if matches(e, everything)] == ["migrated", "paid"]
+    print("✓ Personal export excludes group expenses")
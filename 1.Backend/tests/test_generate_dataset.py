@@ -0,0 +1,102 @@
+# tests/test_generate_dataset.py
+"""
+Dataset Generator Tests: Synthetic data for scale testing
+
+Tests for:
+1. Same seed, same documents (independent of chunking order)
+2. Group size distribution bounds and skew
+3. Documents match the shapes the tools and migration write
+"""
+
+import sys
+import pathlib
+
+# Add parent directory to path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from db.generate_dataset import Plan, generate_chunk, parse_args
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def small_plan(**overrides):
+    argv = ["--users", "500", "--expenses", "2000", "--groups", "100", "--max-group-size", "60"]
+    for key, value in overrides.items():
+        argv += [f"--{key.replace('_', '-')}", str(value)]
+    return Plan(parse_args(argv))
+
+# ============================================================================
+# TEST: Reproducibility
+# ============================================================================
+
+def test_same_seed_same_documents():
+    """Test plans and chunks are deterministic for a seed"""
+    first, second = small_plan(), small_plan()
+    assert first.user_ids == second.user_ids
+    assert [m.tolist() for m in first.group_members] == [m.tolist() for m in second.group_members]
+
+    # Chunk 3 does not depend on whether chunks 0-2 were generated
+    generate_chunk(first, 0, 500)
+    assert generate_chunk(first, 3, 500) == generate_chunk(second, 3, 500)
+    assert generate_chunk(small_plan(seed=7), 3, 500) != generate_chunk(second, 3, 500)
+    print("✓ Same seed, same documents")
+
+def test_ids_unique_across_chunks():
+    """Test ObjectIds never collide between chunks or collections"""
+    plan = small_plan()
+    ids = set(plan.user_ids) | set(plan.personal_group_ids) | set(plan.group_ids)
+    for chunk in range(3):
+        expenses, participants = generate_chunk(plan, chunk, 500)
+        ids_before = len(ids)
+        ids.update(str(d["_id"]) for d in expenses + participants)
+        assert len(ids) == ids_before + len(expenses) + len(participants)
+    print("✓ Ids unique")
+
+# ============================================================================
+# TEST: Distributions
+# ============================================================================
+
+def test_group_sizes_skewed_and_bounded():
+    """Test most groups are small but some reach the tail"""
+    plan = small_plan(group_size_alpha=1.1)
+    sizes = plan.sizes
+
+    assert sizes.min() >= 2 and sizes.max() <= 60
+    assert (sizes <= 4).mean() > 0.5
+    assert sizes.max() > 10
+    print("✓ Group sizes skewed and bounded")
+
+# ============================================================================
+# TEST: Document shapes
+# ============================================================================
+
+def test_documents_match_schema():
+    """Test personal and group expenses link up like the real writes"""
+    plan = small_plan(group_ratio=0.5, max_participants=5)
+    expenses, participants = generate_chunk(plan, 0, 1000)
+    members_by_group = {gid: set(ids) for gid, ids in zip(plan.group_ids, plan.member_ids)}
+    personal_by_user = dict(zip(plan.user_ids, plan.personal_group_ids))
+    participants_by_expense = {}
+    for p in participants:
+        participants_by_expense.setdefault(p["expense_id"], []).append(p)
+
+    personal = [e for e in expenses if e["split_type"] == "none"]
+    shared = [e for e in expenses if e["split_type"] == "equal"]
+    assert personal and shared
+
+    for expense in personal:
+        assert expense["group_id"] == personal_by_user[expense["user_id"]]
+        assert expense["paid_by"] == expense["user_id"]
+        assert str(expense["_id"]) not in participants_by_expense
+
+    for expense in shared:
+        rows = participants_by_expense[str(expense["_id"])]
+        users = {r["user_id"] for r in rows}
+        assert 1 <= len(rows) <= 5
+        assert expense["paid_by"] in users
+        assert users <= members_by_group[expense["group_id"]]
+        assert abs(sum(r["share_amount"] for r in rows) - expense["amount"]) <= 0.01 * len(rows)
+    print("✓ Documents match schema")
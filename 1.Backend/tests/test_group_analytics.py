@@ -0,0 +1,92 @@
+# tests/test_group_analytics.py
+"""Analytics Tests: Columnar group spending metrics"""
+
+import pytest
+from server.utils.analytics import (
+    build_group_frame,
+    build_summary_pipeline,
+    compute_member_balances,
+    compute_daily_series,
+    compute_category_mix,
+    compute_group_analytics
+)
+
+# ============================================================================
+# TEST DATA
+# ============================================================================
+
+DOCS = [
+    # Equal split of 90 between alice, bob and carol, paid by alice
+    {"d": "2025-01-10", "a": 90.0, "c": "food", "p": "alice",
+     "su": ["alice", "bob", "carol"], "ss": [30.0, 30.0, 30.0]},
+    # Exact split of 50, paid by bob
+    {"d": "2025-01-10", "a": 50.0, "c": "travel", "p": "bob",
+     "su": ["alice", "bob"], "ss": [20.0, 30.0]},
+    # Unsplit expense, owed in full by its payer
+    {"d": "2025-02-01", "a": 10.5, "c": "food", "p": "carol", "su": [], "ss": []},
+]
+
+# ============================================================================
+# TEST: Metrics
+# ============================================================================
+
+def test_member_balances():
+    """Test paid vs owed per member"""
+    balances = {b["user_id"]: b for b in compute_member_balances(build_group_frame(DOCS))}
+
+    assert balances["alice"]["paid"] == 90.0
+    assert balances["alice"]["owed"] == 50.0
+    assert balances["alice"]["net"] == 40.0
+    assert balances["bob"]["net"] == -10.0
+    assert balances["carol"]["owed"] == 40.5
+    assert sum(b["net"] for b in balances.values()) == 0
+    print("✓ Member balances work")
+
+def test_daily_series():
+    """Test daily totals are grouped and sorted by date"""
+    daily = compute_daily_series(build_group_frame(DOCS))
+
+    assert daily == [
+        {"date": "2025-01-10", "total": 140.0, "count": 2},
+        {"date": "2025-02-01", "total": 10.5, "count": 1},
+    ]
+    print("✓ Daily series works")
+
+def test_category_mix():
+    """Test month x category matrix"""
+    mix = compute_category_mix(build_group_frame(DOCS))
+
+    assert mix["months"] == ["2025-01", "2025-02"]
+    food = mix["categories"].index("food")
+    travel = mix["categories"].index("travel")
+    assert mix["totals"][0][food] == 90.0
+    assert mix["totals"][0][travel] == 50.0
+    assert mix["totals"][1][food] == 10.5
+    print("✓ Category mix works")
+
+def test_empty_group():
+    """Test analytics on a group with no expenses"""
+    result = compute_group_analytics(build_group_frame([]))
+
+    assert result["expense_count"] == 0
+    assert result["total_spent"] == 0
+    assert result["members"] == []
+    assert result["daily"] == []
+    print("✓ Empty group analytics works")
+
+# ============================================================================
+# TEST: Personal summary
+# ============================================================================
+
+def test_summary_pipeline_uses_only_indexed_fields():
+    """Test the summary reads nothing outside idx_user_date_category_amount"""
+    from db.init import COLLECTION_INDEXES
+
+    index = next(i for i in COLLECTION_INDEXES["expenses"] if i["name"] == "idx_user_date_category_amount")
+    indexed = {field for field, _ in index["key"]}
+    pipeline = build_summary_pipeline("u1", "2025-01-01", "2025-01-31", category="food")
+
+    assert set(pipeline[0]["$match"]) <= indexed
+    assert pipeline[1]["$project"] == {"_id": 0, "category": 1, "amount": 1}
+    assert {"category", "amount"} <= indexed
+    print("✓ Summary pipeline stays on the index")
@@ -0,0 +1,275 @@
+# tests/test_idempotency.py
+"""
+Idempotency Tests: Retried expense writes
+
+Tests for:
+1. Hot cache bounds (LRU eviction, expiry)
+2. Duplicate and concurrent submissions run the write once
+3. Failed attempts release the key so a retry can run
+4. Reusing a key with different arguments is a conflict
+5. A claim whose write may have committed is never run again
+"""
+
+import asyncio
+import pytest
+import sys
+import pathlib
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from pymongo.errors import AutoReconnect, DuplicateKeyError
+
+# Add parent directory to path
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from db.client import idempotency_keys_col
+from server.utils import idempotency
+from server.utils.idempotency import HotCache, args_fingerprint, run_idempotent, make_idempotency_id
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def make_counter(result=None):
+    """Operation factory that counts how many times it actually ran"""
+    calls = {"count": 0}
+
+    async def operation():
+        calls["count"] += 1
+        await asyncio.sleep(0.05)
+        return result or {"status": "success", "expense_id": f"e{calls['count']}"}
+
+    return calls, operation
+
+class FlakyKeys:
+    """idempotency_keys double whose first update_one calls fail"""
+
+    def __init__(self, failing_updates=0):
+        self.docs = {}
+        self.failing_updates = failing_updates
+
+    async def insert_one(self, doc):
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("duplicate key")
+        self.docs[doc["_id"]] = dict(doc)
+
+    async def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    async def update_one(self, query, update):
+        if self.failing_updates:
+            self.failing_updates -= 1
+            raise AutoReconnect("connection reset")
+        self.docs[query["_id"]].update(update["$set"])
+        return SimpleNamespace(modified_count=1)
+
+    async def delete_one(self, query):
+        self.docs.pop(query["_id"], None)
+
+@pytest.fixture(scope="function")
+async def idempotency_user():
+    """Unique user per test; cleans up its keys"""
+    user_id = f"idem-{uuid.uuid4().hex}"
+    idempotency._hot_cache.clear()
+    yield user_id
+    await idempotency_keys_col.delete_many({"user_id": user_id})
+    idempotency._hot_cache.clear()
+
+# ============================================================================
+# TEST: Hot cache
+# ============================================================================
+
+def test_hot_cache_evicts_least_recently_used():
+    """Test cache stays bounded and evicts the oldest entry"""
+    cache = HotCache(max_size=2, ttl_seconds=60)
+    cache.set("a", {"n": 1})
+    cache.set("b", {"n": 2})
+    cache.get("a")
+    cache.set("c", {"n": 3})
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("c") == {"n": 3}
+    print("✓ Hot cache LRU eviction works")
+
+def test_hot_cache_expiry():
+    """Test expired entries are not returned"""
+    cache = HotCache(max_size=10, ttl_seconds=-1)
+    cache.set("a", {"n": 1})
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    print("✓ Hot cache expiry works")
+
+@pytest.mark.asyncio
+async def test_invalid_key_rejected():
+    """Test empty and oversized keys return an error without running"""
+    calls, operation = make_counter()
+
+    for key in ["", "   ", "x" * (idempotency.MAX_KEY_LENGTH + 1)]:
+        result = await run_idempotent("user1", "add_expense", key, operation)
+        assert result["status"] == "error"
+
+    assert calls["count"] == 0
+    print("✓ Invalid idempotency keys rejected")
+
+# ============================================================================
+# TEST: Deduplication
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_retry_returns_original_result(idempotency_user):
+    """Test a sequential retry returns the stored result"""
+    calls, operation = make_counter()
+
+    first = await run_idempotent(idempotency_user, "add_expense", "k1", operation)
+    second = await run_idempotent(idempotency_user, "add_expense", "k1", operation)
+
+    assert calls["count"] == 1
+    assert first == second
+
+    # Durable copy survives a cold cache (another process / restart)
+    idempotency._hot_cache.clear()
+    third = await run_idempotent(idempotency_user, "add_expense", "k1", operation)
+    assert third == first
+    assert calls["count"] == 1
+
+    stored = await idempotency_keys_col.find_one(
+        {"_id": make_idempotency_id(idempotency_user, "add_expense", "k1")}
+    )
+    assert stored["status"] == "completed"
+    print("✓ Retry returns original result")
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_run_once(idempotency_user):
+    """Test concurrent submissions with the same key write exactly once"""
+    calls, operation = make_counter()
+
+    results = await asyncio.gather(*[
+        run_idempotent(idempotency_user, "add_expense", "k2", operation)
+        for _ in range(20)
+    ])
+
+    assert calls["count"] == 1
+    assert all(r == results[0] for r in results)
+    print("✓ Concurrent duplicates run once")
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_cold_process(idempotency_user):
+    """Test the database claim dedupes even without the in-process future"""
+    calls, operation = make_counter()
+    doc_id = make_idempotency_id(idempotency_user, "add_expense", "k3")
+
+    results = await asyncio.gather(*[
+        idempotency._claim_and_run(doc_id, idempotency_user, "add_expense", "k3", None, operation)
+        for _ in range(5)
+    ])
+
+    assert calls["count"] == 1
+    assert all(r == results[0] for r in results)
+    print("✓ Database claim dedupes across processes")
+
+@pytest.mark.asyncio
+async def test_keys_scoped_per_tool(idempotency_user):
+    """Test the same key on different tools runs both"""
+    calls, operation = make_counter()
+
+    await run_idempotent(idempotency_user, "add_expense", "k4", operation)
+    await run_idempotent(idempotency_user, "add_group_expense", "k4", operation)
+
+    assert calls["count"] == 2
+    print("✓ Keys scoped per tool")
+
+@pytest.mark.asyncio
+async def test_failed_attempt_releases_key(idempotency_user):
+    """Test an error result is not stored and the retry runs again"""
+    failed_calls, failing = make_counter({"status": "error", "message": "boom"})
+    calls, operation = make_counter()
+
+    first = await run_idempotent(idempotency_user, "add_expense", "k5", failing)
+    second = await run_idempotent(idempotency_user, "add_expense", "k5", operation)
+
+    assert first["status"] == "error"
+    assert second["status"] == "success"
+    assert failed_calls["count"] == 1
+    assert calls["count"] == 1
+    print("✓ Failed attempt releases key")
+
+# ============================================================================
+# TEST: Argument conflicts
+# ============================================================================
+
+def test_args_fingerprint_is_canonical():
+    """Test key order does not change the fingerprint, values do"""
+    assert args_fingerprint({"a": 1, "b": [1, 2]}) == args_fingerprint({"b": [1, 2], "a": 1})
+    assert args_fingerprint({"a": 1}) != args_fingerprint({"a": 2})
+    assert args_fingerprint(None) is None
+    print("✓ Fingerprint is canonical")
+
+@pytest.mark.asyncio
+async def test_reused_key_with_other_args_conflicts(idempotency_user):
+    """Test a key reused for a different expense is rejected, not replayed"""
+    calls, operation = make_counter()
+    args = {"amount": 10.0, "category": "food"}
+
+    concurrent = await asyncio.gather(
+        run_idempotent(idempotency_user, "add_expense", "k6", operation, args=args),
+        run_idempotent(idempotency_user, "add_expense", "k6", operation, args={**args, "amount": 99.0})
+    )
+    assert concurrent[0]["status"] == "success"
+    assert concurrent[1]["code"] == "idempotency_conflict"
+
+    # Same answer from the hot cache and from the durable copy
+    for clear in (False, True):
+        if clear:
+            idempotency._hot_cache.clear()
+        retry = await run_idempotent(idempotency_user, "add_expense", "k6", operation, args={**args, "amount": 99.0})
+        assert retry["code"] == "idempotency_conflict"
+        same = await run_idempotent(idempotency_user, "add_expense", "k6", operation, args=dict(reversed(args.items())))
+        assert same == concurrent[0]
+
+    assert calls["count"] == 1
+    print("✓ Reused key with other arguments conflicts")
+
+# ============================================================================
+# TEST: Unknown outcomes
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_completion_write_is_retried(monkeypatch):
+    """Test a failed completion update is retried, not left pending"""
+    keys = FlakyKeys(failing_updates=2)
+    monkeypatch.setattr(idempotency, "idempotency_keys_col", keys)
+    monkeypatch.setattr(idempotency, "COMPLETE_RETRY_SECONDS", 0)
+    idempotency._hot_cache.clear()
+    calls, operation = make_counter()
+
+    result = await run_idempotent("u1", "add_expense", "k7", operation)
+
+    assert result["status"] == "success"
+    assert keys.docs[make_idempotency_id("u1", "add_expense", "k7")]["status"] == "completed"
+    print("✓ Completion write retried")
+
+@pytest.mark.asyncio
+async def test_stale_claim_is_not_taken_over(monkeypatch):
+    """Test an old pending claim reports an unknown outcome instead of rerunning"""
+    keys = FlakyKeys()
+    monkeypatch.setattr(idempotency, "idempotency_keys_col", keys)
+    idempotency._hot_cache.clear()
+    doc_id = make_idempotency_id("u1", "add_expense", "k8")
+    keys.docs[doc_id] = {
+        "_id": doc_id, "status": "pending", "args_hash": None,
+        "created_at": datetime.utcnow() - timedelta(seconds=idempotency.PENDING_STALE_SECONDS + 1)
+    }
+    calls, operation = make_counter()
+
+    result = await run_idempotent("u1", "add_expense", "k8", operation)
+
+    assert result["status"] == "error"
+    assert "may have been applied" in result["message"]
+    assert calls["count"] == 0
+    assert keys.docs[doc_id]["status"] == "pending"
+    print("✓ Stale claim not rerun")
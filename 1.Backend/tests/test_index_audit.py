@@ -0,0 +1,105 @@
+# tests/test_index_audit.py
+"""
+Index Audit Tests
+
+Tests for:
+1. Prefix-redundant indexes; none left in the declared set
+2. Equality-sort-range suggestions from query shapes
+3. Missing and unused indexes, projected savings
+"""
+
+import json
+import sys
+import pathlib
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from db.index_audit import audit, load_shapes, redundant_indexes, suggest_index
+from db.init import COLLECTION_INDEXES, RETIRED_INDEXES, index
+
+# ============================================================================
+# TEST: Redundant indexes
+# ============================================================================
+
+def test_redundant_prefix_indexes():
+    """Test prefix indexes are found; unique and partial ones are kept"""
+    indexes = {
+        "balances": [
+            index([("group_id", 1), ("from_user_id", 1), ("to_user_id", 1)], "idx_group_from_to_unique", unique=True),
+            index([("group_id", 1)], "idx_group"),
+            index([("group_id", 1), ("from_user_id", 1)], "idx_group_from"),
+        ],
+        "group_members": [
+            index([("user_id", 1), ("group_id", 1)], "idx_user_group"),
+            index([("user_id", 1)], "idx_user_active", partialFilterExpression={"is_active": True}),
+        ],
+    }
+    found = {(r["collection"], r["index"]): r["covered_by"] for r in redundant_indexes(indexes)}
+
+    assert found[("balances", "idx_group")] == "idx_group_from_to_unique"
+    assert found[("balances", "idx_group_from")] == "idx_group_from_to_unique"
+    assert ("balances", "idx_group_from_to_unique") not in found
+    assert ("group_members", "idx_user_active") not in found
+    print("✓ Redundant prefix indexes found")
+
+def test_declared_indexes_not_redundant():
+    """Test the repo's own schema passes the redundancy check"""
+    assert redundant_indexes(COLLECTION_INDEXES) == []
+
+    retired = {(cname, name) for cname, names in RETIRED_INDEXES.items() for name in names}
+    declared = {(cname, spec["name"]) for cname, specs in COLLECTION_INDEXES.items() for spec in specs}
+    assert not retired & declared
+    print("✓ Declared indexes not redundant")
+
+# ============================================================================
+# TEST: Suggestions
+# ============================================================================
+
+def test_suggest_index_esr():
+    """Test equality fields first, then sort, then range"""
+    shape = {
+        "command": "find", "collection": "expenses",
+        "filter": {"date": {"$gte": "str", "$lte": "str"}, "group_id": "str"},
+        "sort": {"date": -1, "_id": -1},
+    }
+
+    assert suggest_index(shape) == [("group_id", 1), ("date", -1), ("_id", -1)]
+
+    aggregate = {"command": "aggregate", "collection": "expenses",
+                 "pipeline": [{"$match": {"user_id": "str", "category": {"$in": ["str"]}}}, {"$group": {}}]}
+    assert suggest_index(aggregate) == [("user_id", 1), ("category", 1)]
+    print("✓ ESR suggestions")
+
+# ============================================================================
+# TEST: Audit
+# ============================================================================
+
+def test_audit_missing_unused_and_savings(tmp_path):
+    """Test collscan shapes become suggestions and unused sizes add up"""
+    log = tmp_path / "shapes.jsonl"
+    records = [
+        {"tool": "list_settlements", "duration_ms": 3.0, "plan": {"stages": ["COLLSCAN"], "indexes": [], "collscan": True},
+         "shape": {"command": "find", "collection": "settlements", "filter": {"paid_to": "str", "group_id": "str"}}},
+        {"tool": "list_expenses", "duration_ms": 1.0, "plan": {"stages": ["FETCH", "IXSCAN"], "indexes": ["idx_a"], "collscan": False},
+         "shape": {"command": "find", "collection": "expenses", "filter": {"a": "str"}}},
+    ]
+    log.write_text("".join(json.dumps(r) + "\n" for r in records))
+    shapes = load_shapes(str(log))
+
+    indexes = {
+        "expenses": [index([("a", 1)], "idx_a"), index([("b", 1)], "idx_b"), index([("c", 1)], "idx_c_unique", unique=True)],
+        "settlements": [index([("group_id", 1), ("settled_at", -1)], "idx_group_settled")],
+    }
+    stats = {"expenses": {"idx_a": {"ops": 10, "size": 100}, "idx_b": {"ops": 0, "size": 400},
+                          "idx_c_unique": {"ops": 0, "size": 50}}}
+
+    report = audit(indexes, shapes, stats)
+
+    assert report["missing"] == [{"collection": "settlements", "suggested_key": [("paid_to", 1), ("group_id", 1)],
+                                  "tools": ["list_settlements"], "count": 1}]
+    unused = {r["index"]: r["droppable"] for r in report["unused"] if r["collection"] == "expenses"}
+    assert unused == {"idx_b": True, "idx_c_unique": False}
+    assert report["projected_savings_bytes"] == 400
+    print("✓ Audit reports missing, unused and savings")
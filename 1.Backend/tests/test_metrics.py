@@ -0,0 +1,91 @@
+# tests/test_metrics.py
+"""
+Metrics Tests: Prometheus instrumentation
+
+Tests for:
+1. Route template labels from the ASGI middleware
+2. Tool latency and error counters
+3. Mongo command listener
+"""
+
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from telemetry import MetricsMiddleware, record_tool_call, record_llm_call
+from telemetry.metrics import MAX_TOOL_LABELS, _tool_labels
+from telemetry.mongo import MongoCommandListener
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+# ============================================================================
+# TEST: HTTP and tools
+# ============================================================================
+
+def test_route_template_label():
+    """Test requests are labelled by route template, not raw path"""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = sample("http_request_duration_seconds_count", **labels)
+
+    client = TestClient(app)
+    client.get("/items/a")
+    client.get("/items/b")
+
+    assert sample("http_request_duration_seconds_count", **labels) == before + 2
+    print("✓ Route template labels work")
+
+def test_tool_error_counter():
+    """Test error results increment the error counter"""
+    before = sample("mcp_tool_errors_total", component="server", tool="metrics_test_tool")
+
+    record_tool_call("server", "metrics_test_tool", 0.01, error=False)
+    record_tool_call("server", "metrics_test_tool", 0.02, error=True)
+
+    assert sample("mcp_tool_errors_total", component="server", tool="metrics_test_tool") == before + 1
+    assert sample("mcp_tool_duration_seconds_count", component="server", tool="metrics_test_tool", outcome="ok") >= 1
+    print("✓ Tool error counter works")
+
+def test_tool_label_cardinality_capped():
+    """Test client-supplied tool names can't create unbounded series"""
+    record_tool_call("gateway", "not a tool!", 0.01, error=False)
+    assert sample("mcp_tool_duration_seconds_count", component="gateway", tool="other", outcome="ok") >= 1
+    assert len(_tool_labels) <= MAX_TOOL_LABELS
+    print("✓ Tool labels capped")
+
+def test_llm_tokens():
+    """Test LLM usage metadata feeds the token counter"""
+    before = sample("llm_tokens_total", model="test-model", kind="output")
+    record_llm_call("test-model", 0.5, {"input_tokens": 120, "output_tokens": 30})
+
+    assert sample("llm_tokens_total", model="test-model", kind="output") == before + 30
+    print("✓ LLM token counter works")
+
+# ============================================================================
+# TEST: Mongo listener
+# ============================================================================
+
+def test_mongo_command_listener():
+    """Test command latency is recorded with its collection"""
+    listener = MongoCommandListener()
+    labels = {"command": "find", "collection": "expenses", "outcome": "ok"}
+    before = sample("mongodb_command_duration_seconds_count", **labels)
+
+    listener.started(SimpleNamespace(command_name="find", request_id=7, command={"find": "expenses"}))
+    listener.succeeded(SimpleNamespace(command_name="find", request_id=7, duration_micros=1500))
+
+    assert sample("mongodb_command_duration_seconds_count", **labels) == before + 1
+    assert listener._collections == {}
+    print("✓ Mongo command listener works")
@@ -88,7 +88,7 @@ async def test_expenses_indexes(setup_database):
     indexes = await expenses_col.index_information()
     
     # Existing indexes (backward compatibility)
-    assert "idx_user_date" in indexes
+    assert "idx_user_date_category_amount" in indexes  # replaces idx_user_date
     assert "idx_user_category" in indexes
     assert "idx_date_desc" in indexes
     
@@ -104,9 +104,9 @@ async def test_groups_indexes(setup_database):
     """Test groups collection indexes"""
     indexes = await groups_col.index_information()
     
-    assert "idx_created_by" in indexes
-    assert "idx_is_active" in indexes
-    assert "idx_creator_active" in indexes
+    # Partial: only active groups are indexed
+    assert "idx_created_by_active" in indexes
+    assert indexes["idx_created_by_active"]["partialFilterExpression"] == {"is_active": True}
     
     print("✓ Groups indexes verified")
 
@@ -115,14 +115,13 @@ async def test_group_members_indexes(setup_database):
     """Test group_members collection indexes"""
     indexes = await group_members_col.index_information()
     
-    # Critical: compound unique index
-    assert "idx_group_user_unique" in indexes
-    assert indexes["idx_group_user_unique"]["unique"] == True
+    # Critical: compound unique index over active memberships
+    assert "idx_group_user_active_unique" in indexes
+    assert indexes["idx_group_user_active_unique"]["unique"] == True
+    assert indexes["idx_group_user_active_unique"]["partialFilterExpression"] == {"is_active": True}
     
     # Query optimization indexes
-    assert "idx_user" in indexes
-    assert "idx_group" in indexes
-    assert "idx_group_active" in indexes
+    assert "idx_user_active" in indexes
     
     print("✓ Group members indexes verified")
 
@@ -135,8 +134,9 @@ async def test_expense_participants_indexes(setup_database):
     assert "idx_expense_user_unique" in indexes
     assert indexes["idx_expense_user_unique"]["unique"] == True
     
-    assert "idx_expense" in indexes
     assert "idx_user" in indexes
+    # Retired: prefix of idx_expense_user_unique
+    assert "idx_expense" not in indexes
     
     print("✓ Expense participants indexes verified")
 
@@ -150,9 +150,10 @@ async def test_balances_indexes(setup_database):
     assert indexes["idx_group_from_to_unique"]["unique"] == True
     
     # Query optimization indexes
-    assert "idx_group" in indexes
-    assert "idx_group_from" in indexes
     assert "idx_group_to" in indexes
+    # Retired: prefixes of idx_group_from_to_unique
+    assert "idx_group" not in indexes
+    assert "idx_group_from" not in indexes
     
     print("✓ Balances indexes verified")
 
@@ -292,6 +293,32 @@ async def test_group_member_unique_constraint(setup_database):
         await group_members_col.delete_many({"group_id": group_id})
         await groups_col.delete_one({"_id": group_result.inserted_id})
 
+@pytest.mark.asyncio
+async def test_removed_member_can_rejoin(setup_database):
+    """Test the unique constraint only covers active memberships"""
+    group_id = "test_group_rejoin"
+    member_doc = {
+        "group_id": group_id,
+        "user_id": "test_user_rejoin",
+        "role": "member",
+        "is_active": False,
+        "joined_at": datetime.utcnow(),
+        "left_at": datetime.utcnow()
+    }
+    
+    try:
+        await group_members_col.insert_one(dict(member_doc))
+        
+        # Rejoining inserts a new active membership next to the old one
+        active_doc = {k: v for k, v in member_doc.items() if k != "left_at"}
+        rejoined = await group_members_col.insert_one({**active_doc, "is_active": True})
+        assert rejoined.inserted_id is not None
+        
+        print("✓ Removed member can rejoin")
+        
+    finally:
+        await group_members_col.delete_many({"group_id": group_id})
+
 @pytest.mark.asyncio
 async def test_balance_unique_constraint(setup_database):
     """Test that duplicate balance records are prevented"""
@@ -2,6 +2,7 @@
 """Phase 3 Tests: Split Calculations"""
 
 import pytest
+import random
 from decimal import Decimal
 from server.utils.splits import (
     calculate_equal_split,
@@ -9,6 +10,11 @@ from server.utils.splits import (
     calculate_percentage_split,
     calculate_splits
 )
+from server.utils.splits.calculator import (
+    _decimal_equal_split,
+    _decimal_exact_split,
+    _decimal_percentage_split
+)
 
 # ============================================================================
 # TEST: Equal Split
@@ -140,6 +146,62 @@ def test_calculate_splits_percentage():
     assert float(splits["user2"]) == 40.00
     print("✓ calculate_splits percentage works")
 
+# ============================================================================
+# TEST: Integer-cents engine matches Decimal engine
+# ============================================================================
+
+def assert_identical(fast, reference):
+    """Same keys, order, values and Decimal exponents"""
+    assert list(fast.items()) == list(reference.items())
+    assert [v.as_tuple() for v in fast.values()] == [v.as_tuple() for v in reference.values()]
+
+def test_equal_split_matches_decimal_engine():
+    """Test integer-cents equal split is identical to the Decimal version"""
+    rng = random.Random(1)
+    for n in [1, 2, 3, 7, 100, 1000]:
+        users = [f"user{i}" for i in range(n)]
+        for total in [0.01, 10.00, 100, 33.33, round(rng.uniform(1, 10000), 2), 10.005, 0.1 + 0.2]:
+            assert_identical(calculate_equal_split(total, users), _decimal_equal_split(total, users))
+    print("✓ Equal split engines agree")
+
+def test_exact_split_matches_decimal_engine():
+    """Test integer-cents exact split is identical to the Decimal version"""
+    rng = random.Random(2)
+    for n in [1, 2, 10, 1000]:
+        cents = [rng.randint(0, 10000) for _ in range(n)]
+        amounts = {f"user{i}": c / 100 for i, c in enumerate(cents)}
+        total = sum(cents) / 100
+        assert_identical(calculate_exact_split(total, amounts), _decimal_exact_split(total, amounts))
+
+    # Sub-cent amounts are rounded half-up before summing
+    amounts = {"user1": 10.005, "user2": 9.994}
+    assert_identical(calculate_exact_split(20.00, amounts), _decimal_exact_split(20.00, amounts))
+    print("✓ Exact split engines agree")
+
+def test_percentage_split_matches_decimal_engine():
+    """Test integer-cents percentage split is identical to the Decimal version"""
+    rng = random.Random(3)
+    for n in [1, 2, 3, 10, 1000]:
+        bps = sorted(rng.randint(0, 10000) for _ in range(n - 1))
+        percentages = {f"user{i}": (b - a) / 100 for i, (a, b) in enumerate(zip([0] + bps, bps + [10000]))}
+        for total in [0.01, 99.99, 100, round(rng.uniform(1, 10000), 2), 10.005]:
+            assert_identical(
+                calculate_percentage_split(total, percentages),
+                _decimal_percentage_split(total, percentages)
+            )
+
+    thirds = {"user1": 100 / 3, "user2": 100 / 3, "user3": 100 / 3}
+    assert_identical(calculate_percentage_split(100.00, thirds), _decimal_percentage_split(100.00, thirds))
+    print("✓ Percentage split engines agree")
+
+def test_sub_cent_total_keeps_decimal_semantics():
+    """Test totals with more than two decimals still give the remainder to the first participant"""
+    splits = calculate_equal_split(10.005, ["user1", "user2"])
+
+    assert splits["user1"] == Decimal("5.005")
+    assert splits["user2"] == Decimal("5.00")
+    print("✓ Sub-cent totals keep Decimal semantics")
+
 # ============================================================================
 # RUN TESTS
 # ============================================================================
@@ -166,6 +228,12 @@ if __name__ == "__main__":
     test_calculate_splits_exact()
     test_calculate_splits_percentage()
     
+    # Integer-cents engine tests
+    test_equal_split_matches_decimal_engine()
+    test_exact_split_matches_decimal_engine()
+    test_percentage_split_matches_decimal_engine()
+    test_sub_cent_total_keeps_decimal_semantics()
+    
     print("\n" + "="*70)
     print("✓ ALL PHASE 3 TESTS PASSED")
     print("="*70)
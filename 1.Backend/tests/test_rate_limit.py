@@ -0,0 +1,207 @@
+# tests/test_rate_limit.py
+"""
+Rate Limit Tests: gateway token buckets
+
+Tests for:
+1. Budget parsing and per-worker shares
+2. Per-user buckets, refill and Retry-After
+3. Global bucket shared by all users; rejected requests charge nothing
+4. Charging two classes at once
+5. Idle bucket eviction and metrics
+6. /mcp/execute rejects before touching Mongo
+"""
+
+import asyncio
+import pytest
+import sys
+import pathlib
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from db.client import use_database
+
+from gateway.rate_limit import (
+    Budget,
+    InMemoryRateLimitStore,
+    Limit,
+    RateLimiter,
+    rate_limiter_from_env,
+    retry_after_header
+)
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_limiter(user="2/10", global_="5/10", kind="llm"):
+    clock = FakeClock()
+    budgets = {(kind, "user"): Budget.parse(user), (kind, "global"): Budget.parse(global_)}
+    return RateLimiter(InMemoryRateLimitStore(clock=clock), budgets), clock
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+class RecordingDatabase:
+    """Database double that records every collection or command used"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getitem__(self, name):
+        self.calls.append(name)
+        raise AssertionError(f"Mongo used: {name}")
+
+    async def command(self, *args, **kwargs):
+        self.calls.append("command")
+        raise AssertionError("Mongo used: command")
+
+# ============================================================================
+# TEST: Configuration
+# ============================================================================
+
+def test_budget_parse(monkeypatch):
+    """Test '<requests>/<seconds>' budgets and disabling"""
+    assert Budget.parse("20/60") == Budget(20 / 60, 20)
+    assert Budget.parse("5") == Budget(5.0, 5.0)
+    assert Budget.parse("off") is None
+    with pytest.raises(ValueError):
+        Budget.parse("-1/60")
+
+    monkeypatch.setenv("RATE_LIMIT_DIRECT_USER", "off")
+    limiter = rate_limiter_from_env()
+    assert [l.key for l in limiter.limits("direct", "u1")] == ["direct:global"]
+    assert len(limiter.limits("llm", "u1")) == 2
+    print("✓ Budgets parse")
+
+def test_budgets_split_across_workers(monkeypatch):
+    """Test each of WEB_CONCURRENCY workers gets its share of the in-memory budget"""
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.setenv("RATE_LIMIT_LLM_GLOBAL", "400/60")
+    monkeypatch.setenv("RATE_LIMIT_LLM_USER", "2/60")
+
+    limiter = rate_limiter_from_env()
+
+    assert limiter.budgets["llm", "global"] == Budget(100 / 60, 100)
+    assert limiter.budgets["llm", "user"].burst == 1  # never below one request
+    print("✓ Budgets split across workers")
+
+# ============================================================================
+# TEST: Buckets
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_user_bucket_and_retry_after():
+    """Test a user's burst passes, the next request waits for the refill"""
+    limiter, clock = make_limiter(user="2/10")
+
+    assert (await limiter.check("llm", "u1")).allowed
+    assert (await limiter.check("llm", "u1")).allowed
+
+    rejected = await limiter.check("llm", "u1")
+    assert not rejected.allowed
+    assert rejected.blocked_by == "llm:user:u1"
+    assert rejected.retry_after == pytest.approx(5.0)
+    assert retry_after_header(rejected) == "5"
+
+    # Other users and the other class are unaffected
+    assert (await limiter.check("llm", "u2")).allowed
+    assert (await limiter.check("direct", "u1")).allowed
+
+    clock.now += 5
+    assert (await limiter.check("llm", "u1")).allowed
+    print("✓ Per-user bucket refills")
+
+@pytest.mark.asyncio
+async def test_global_bucket_charges_all_or_nothing():
+    """Test the global budget caps all users; rejections consume no tokens"""
+    limiter, clock = make_limiter(user="2/10", global_="3/10")
+
+    assert (await limiter.check("llm", "u1")).allowed
+    assert (await limiter.check("llm", "u2")).allowed
+    assert (await limiter.check("llm", "u3")).allowed
+
+    rejected = await limiter.check("llm", "u4")
+    assert rejected.blocked_by == "llm:global"
+    assert rejected.remaining["llm:user:u4"] == 2  # not charged
+
+    before = sample("rate_limit_decisions_total", kind="llm", outcome="rejected_global")
+    await limiter.check("llm", "u4")
+    assert sample("rate_limit_decisions_total", kind="llm", outcome="rejected_global") == before + 1
+    assert sample("rate_limit_global_tokens", kind="llm") == pytest.approx(0.0)
+    print("✓ Global bucket is shared")
+
+@pytest.mark.asyncio
+async def test_two_classes_charged_atomically():
+    """Test a read that runs pays llm and direct together, or neither"""
+    clock = FakeClock()
+    budgets = {
+        ("llm", "user"): Budget.parse("1/10"),
+        ("direct", "user"): Budget.parse("5/10"),
+    }
+    limiter = RateLimiter(InMemoryRateLimitStore(clock=clock), budgets)
+
+    assert (await limiter.check(("llm", "direct"), "u1")).allowed
+
+    before = sample("rate_limit_decisions_total", kind="direct", outcome="rejected_user")
+    rejected = await limiter.check(("llm", "direct"), "u1")
+    assert rejected.blocked_by == "llm:user:u1"
+    assert rejected.remaining["direct:user:u1"] == 4  # not charged for the llm rejection
+    assert sample("rate_limit_decisions_total", kind="direct", outcome="rejected_user") == before
+    print("✓ Two classes charged atomically")
+
+@pytest.mark.asyncio
+async def test_full_buckets_are_evicted():
+    """Test refilled buckets are dropped once the store is over max_keys"""
+    clock = FakeClock()
+    store = InMemoryRateLimitStore(max_keys=3, clock=clock)
+    budget = Budget(1.0, 1.0)
+
+    for i in range(3):
+        await store.acquire([Limit(f"u{i}", budget)])
+    clock.now += 10
+    await store.acquire([Limit("u3", budget)])
+
+    assert store.tracked_keys() == 1
+    print("✓ Idle buckets are evicted")
+
+# ============================================================================
+# TEST: Gateway
+# ============================================================================
+
+def test_rejected_tool_call_skips_mongo(monkeypatch):
+    """Test a 429 from /mcp/execute is decided before any ETag query"""
+    monkeypatch.setenv("MONGODB_URI", "mongodb://localhost:27017")
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-secret")
+    import main
+
+    limiter, clock = make_limiter(kind="direct", user="1/60")
+    assert asyncio.run(limiter.check("direct", "u1")).allowed  # bucket now empty
+    monkeypatch.setattr(main, "rate_limiter", limiter)
+    main.app.dependency_overrides[main.get_current_user] = lambda: main.TokenData(email="a@example.com", user_id="u1")
+    fake = RecordingDatabase()
+
+    try:
+        with use_database(fake):
+            response = TestClient(main.app).post(
+                "/mcp/execute",
+                json={"tool": "list_expenses", "args": {"start_date": "2024-01-01", "end_date": "2024-01-31"}}
+            )
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"]
+    assert fake.calls == []
+    print("✓ 429 before any Mongo work")
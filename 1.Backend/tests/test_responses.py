@@ -0,0 +1,148 @@
+# tests/test_responses.py
+"""
+Response Tests: orjson encoding and compression middleware
+
+Tests for:
+1. ORJSONResponse handles Mongo types natively
+2. Large JSON is compressed (brotli preferred, gzip fallback)
+3. Small and streaming responses are left alone
+"""
+
+import gzip
+import json
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from gateway import compression
+from gateway.compression import CompressionMiddleware, choose_encoding
+from gateway.responses import ORJSONResponse
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def make_app():
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=512)
+
+    @app.get("/large")
+    async def large():
+        return ORJSONResponse([{"category": "food", "amount": 12.5, "n": i} for i in range(200)])
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(3):
+                yield "data: x\n\n" * 100
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return app
+
+# ============================================================================
+# TEST: orjson
+# ============================================================================
+
+def test_orjson_handles_mongo_types():
+    """Test ObjectId, datetime and Decimal encode without a copy pass"""
+    oid = ObjectId()
+    response = ORJSONResponse({
+        "_id": oid,
+        "created_at": datetime(2025, 1, 15, 20, 30),
+        "share": Decimal("33.34"),
+    })
+    body = json.loads(response.body)
+
+    assert body == {"_id": str(oid), "created_at": "2025-01-15T20:30:00", "share": 33.34}
+    print("✓ orjson encodes Mongo types")
+
+# ============================================================================
+# TEST: Compression
+# ============================================================================
+
+def test_choose_encoding():
+    """Test Accept-Encoding negotiation"""
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip;q=0") is None
+    if compression.brotli is not None:
+        assert choose_encoding("gzip, br") == "br"
+        assert choose_encoding("br;q=0, gzip") == "gzip"
+        assert choose_encoding("br;q=0.1, gzip;q=1") == "gzip"
+        assert choose_encoding("gzip;q=0.5, br;q=0.5") == "br"
+        assert choose_encoding("*") == "br"
+    assert choose_encoding("gzip;q=0.2, identity;q=1") is None
+    assert choose_encoding("*;q=0.5") in ("br", "gzip")
+    print("✓ Encoding negotiation works")
+
+def test_large_response_gzip():
+    """Test large JSON is gzip-compressed when only gzip is accepted"""
+    client = TestClient(make_app())
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert len(response.json()) == 200
+    print("✓ Gzip compression works")
+
+@pytest.mark.asyncio
+async def test_large_response_brotli():
+    """Test brotli is preferred when available and accepted"""
+    if compression.brotli is None:
+        pytest.skip("brotli not installed")
+
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/large", "raw_path": b"/large",
+        "query_string": b"", "root_path": "", "scheme": "http", "http_version": "1.1",
+        "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"accept-encoding", b"br, gzip")],
+    }
+    await make_app()(scope, receive, send)
+
+    start = next(m for m in sent if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+
+    assert (b"content-encoding", b"br") in start["headers"]
+    assert len(json.loads(compression.brotli.decompress(body))) == 200
+    print("✓ Brotli compression works")
+
+def test_small_and_streaming_untouched():
+    """Test small bodies and SSE streams are not compressed"""
+    client = TestClient(make_app())
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.headers["vary"] == "Accept-Encoding"
+
+    stream = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in stream.headers
+    assert stream.text.startswith("data: x")
+    print("✓ Small and streaming responses untouched")
+
+def test_vary_on_uncompressed_responses():
+    """Test Vary: Accept-Encoding is sent whether or not the body was compressed"""
+    client = TestClient(make_app())
+
+    plain = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    missing = client.get("/large", headers={"Accept-Encoding": ""})
+    assert missing.headers["vary"] == "Accept-Encoding"
+    print("✓ Vary sent on uncompressed responses")
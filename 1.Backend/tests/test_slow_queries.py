@@ -0,0 +1,181 @@
+# tests/test_slow_queries.py
+"""
+Slow-Query Tests: Command monitor, explain capture and report
+
+Tests for:
+1. Query shapes hide literal values
+2. Plan summaries from find and aggregate explains
+3. Threshold, tool attribution and explain de-duplication
+4. Bounded per-shape state
+5. One log handler per file; close() stops the explain thread
+"""
+
+import logging
+from types import SimpleNamespace
+
+from telemetry import slow_queries
+from telemetry.slow_queries import (
+    SlowQueryMonitor,
+    command_shape,
+    current_tool,
+    explain_command,
+    query_shape,
+    summarize_plan
+)
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+FIND_EXPLAIN = {
+    "queryPlanner": {"winningPlan": {
+        "stage": "FETCH",
+        "inputStage": {"stage": "IXSCAN", "indexName": "idx_group_date"}
+    }},
+    "executionStats": {"totalKeysExamined": 120, "totalDocsExamined": 120, "nReturned": 120, "executionTimeMillis": 4},
+}
+
+class FakeExplainClient:
+    """Stands in for the explain client: db[name].command(...)"""
+
+    def __init__(self):
+        self.calls = []
+        self.closed = False
+
+    def __getitem__(self, database):
+        return self
+
+    def command(self, cmd):
+        self.calls.append(cmd)
+        return FIND_EXPLAIN
+
+    def close(self):
+        self.closed = True
+
+def run_command(monitor, request_id, duration_ms, command=None, tool=None):
+    command = command or {"find": "expenses", "filter": {"group_id": "g1"}, "lsid": {"id": 1}}
+    token = current_tool.set(tool)
+    try:
+        monitor.started(SimpleNamespace(command_name="find", request_id=request_id, command=command,
+                                        database_name="expense_tracker"))
+    finally:
+        current_tool.reset(token)
+    monitor.succeeded(SimpleNamespace(command_name="find", request_id=request_id,
+                                      duration_micros=int(duration_ms * 1000)))
+
+# ============================================================================
+# TEST: Shapes and plans
+# ============================================================================
+
+def test_query_shape_hides_values():
+    """Test literals become type names and $in lists collapse"""
+    shape = query_shape({"group_id": "g1", "date": {"$gte": "2025-01-01"}, "expense_id": {"$in": ["a", "b", "c"]}})
+
+    assert shape == {"group_id": "str", "date": {"$gte": "str"}, "expense_id": {"$in": ["str"]}}
+    print("✓ Query shape hides values")
+
+def test_command_shape_and_explain_command():
+    """Test shapes keep plan-relevant fields; explain drops driver fields"""
+    command = {"find": "expenses", "filter": {"user_id": "u1"}, "sort": {"date": -1}, "lsid": {"id": 1}, "$db": "x"}
+
+    assert command_shape("find", command) == {
+        "command": "find", "collection": "expenses", "filter": {"user_id": "str"}, "sort": {"date": -1}
+    }
+    assert "lsid" not in explain_command(command)
+    assert "$db" not in explain_command(command)
+    print("✓ Command shape and explain command work")
+
+def test_summarize_plans():
+    """Test plan summary for find and aggregate explains"""
+    summary = summarize_plan(FIND_EXPLAIN)
+    assert summary["stages"] == ["FETCH", "IXSCAN"]
+    assert summary["indexes"] == ["idx_group_date"]
+    assert summary["collscan"] is False
+
+    aggregate = {"stages": [{"$cursor": {
+        "queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}},
+        "executionStats": {"totalDocsExamined": 5000, "nReturned": 3}
+    }}]}
+    summary = summarize_plan(aggregate)
+    assert summary["collscan"] is True
+    assert summary["docs_examined"] == 5000
+    print("✓ Plan summaries work")
+
+# ============================================================================
+# TEST: Monitor
+# ============================================================================
+
+def test_monitor_threshold_and_tool():
+    """Test only slow commands are recorded, with their tool name"""
+    records = []
+    explain_client = FakeExplainClient()
+    monitor = SlowQueryMonitor(threshold_ms=50, client_factory=lambda: explain_client, sink=records.append)
+
+    run_command(monitor, 1, 10, tool="list_group_expenses")
+    run_command(monitor, 2, 80, tool="list_group_expenses")
+    monitor.drain()
+
+    assert len(records) == 1
+    assert records[0]["tool"] == "list_group_expenses"
+    assert records[0]["plan"]["indexes"] == ["idx_group_date"]
+    assert "lsid" not in explain_client.calls[0]["explain"]
+    assert monitor._started == {}
+    print("✓ Threshold and tool attribution work")
+
+def test_monitor_explains_shape_once():
+    """Test repeated slow shapes reuse the cached plan"""
+    records = []
+    explain_client = FakeExplainClient()
+    monitor = SlowQueryMonitor(threshold_ms=1, client_factory=lambda: explain_client, sink=records.append)
+
+    for i in range(3):
+        run_command(monitor, i, 5, command={"find": "expenses", "filter": {"group_id": f"g{i}"}})
+    monitor.drain()
+
+    assert len(records) == 3
+    assert len(explain_client.calls) == 1
+    assert monitor.summary()[0]["count"] == 3
+    print("✓ Shapes explained once")
+
+def test_monitor_shape_state_is_bounded(monkeypatch):
+    """Test shapes past MAX_SHAPES are logged but not aggregated"""
+    monkeypatch.setattr(slow_queries, "MAX_SHAPES", 2)
+    records = []
+    monitor = SlowQueryMonitor(threshold_ms=1, client_factory=FakeExplainClient, sink=records.append)
+
+    for i, field in enumerate(["group_id", "user_id", "category", "date"]):
+        run_command(monitor, i, 5, command={"find": "expenses", "filter": {field: "x"}})
+    monitor.drain()
+
+    assert len(records) == 4
+    assert len(monitor.summary()) == 2
+    assert len(monitor._plans) == 2
+    print("✓ Shape state is bounded")
+
+# ============================================================================
+# TEST: Lifecycle
+# ============================================================================
+
+def test_monitors_share_one_handler_per_file(tmp_path):
+    """Test rebuilding monitors for the same log adds no extra handler"""
+    path = str(tmp_path / "slow.jsonl")
+    for _ in range(3):
+        SlowQueryMonitor(threshold_ms=1, log_path=path)
+
+    assert len(logging.getLogger(f"{slow_queries.__name__}.{path}").handlers) == 1
+    print("✓ One handler per log file")
+
+def test_close_stops_explain_thread():
+    """Test close() ends the worker and closes the explain client"""
+    explain_client = FakeExplainClient()
+    monitor = SlowQueryMonitor(threshold_ms=1, client_factory=lambda: explain_client, sink=lambda record: None)
+
+    run_command(monitor, 1, 5)
+    monitor.drain()
+    worker = monitor._worker
+    monitor.close()
+
+    assert not worker.is_alive()
+    assert explain_client.closed
+    assert monitor._worker is None and monitor._client is None
+    print("✓ close() stops the explain thread")
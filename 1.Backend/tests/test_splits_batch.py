@@ -0,0 +1,97 @@
+# tests/test_splits_batch.py
+"""Batch Split Tests: calculate_splits_batch matches the scalar path"""
+
+import random
+import pytest
+from server.utils.splits import calculate_splits, calculate_splits_batch
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def random_expenses(count, seed=7):
+    """Mixed equal/exact/percentage expenses, including awkward amounts"""
+    rng = random.Random(seed)
+    totals, types, participants, payers, data = [], [], [], [], []
+
+    for i in range(count):
+        users = [f"user{j}" for j in rng.sample(range(50), rng.randint(1, 8))]
+        total = rng.choice([round(rng.uniform(0.01, 1000), 2), 10.0, 100, 0.1 + 0.2, 33.333])
+        split_type = rng.choice(["equal", "exact", "percentage"])
+        split_data = None
+
+        if split_type == "exact":
+            cents = round(total * 100)
+            cuts = sorted(rng.randint(0, cents) for _ in users[1:])
+            parts = [b - a for a, b in zip([0] + cuts, cuts + [cents])]
+            split_data = {"user_amounts": {u: c / 100 for u, c in zip(users, parts)}}
+        elif split_type == "percentage":
+            if len(users) == 3 and rng.random() < 0.5:
+                percentages = [100 / 3] * 3
+            else:
+                bps = sorted(rng.randint(0, 10000) for _ in users[1:])
+                percentages = [(b - a) / 100 for a, b in zip([0] + bps, bps + [10000])]
+            split_data = {"user_percentages": dict(zip(users, percentages))}
+
+        totals.append(total)
+        types.append(split_type)
+        participants.append(users)
+        payers.append(users[0])
+        data.append(split_data)
+
+    return totals, types, participants, payers, data
+
+def scalar_or_error(total, split_type, users, payer, split_data):
+    try:
+        return calculate_splits(total, split_type, users, payer, split_data)
+    except ValueError as e:
+        return e
+
+# ============================================================================
+# TEST: Equivalence
+# ============================================================================
+
+def test_batch_matches_scalar():
+    """Test batch results are bit-identical to per-expense calculate_splits"""
+    totals, types, participants, payers, data = random_expenses(2000)
+
+    expected = [scalar_or_error(*row) for row in zip(totals, types, participants, payers, data)]
+    valid = [i for i, e in enumerate(expected) if not isinstance(e, ValueError)]
+
+    batch = calculate_splits_batch(
+        [totals[i] for i in valid],
+        [types[i] for i in valid],
+        [participants[i] for i in valid],
+        [payers[i] for i in valid],
+        [data[i] for i in valid]
+    )
+
+    for result, i in zip(batch, valid):
+        assert list(result.items()) == list(expected[i].items())
+        assert [v.as_tuple() for v in result.values()] == [v.as_tuple() for v in expected[i].values()]
+    print("✓ Batch splits match scalar path")
+
+def test_batch_equal_rounding():
+    """Test remainder goes to first participant like the scalar path"""
+    result = calculate_splits_batch([10.00], ["equal"], [["a", "b", "c"]], ["a"])
+
+    assert [str(v) for v in result[0].values()] == ["3.34", "3.33", "3.33"]
+    print("✓ Batch equal rounding works")
+
+def test_batch_reports_failing_index():
+    """Test validation errors name the failing expense"""
+    with pytest.raises(ValueError, match="Expense 1"):
+        calculate_splits_batch(
+            [50.00, 100.00],
+            ["equal", "exact"],
+            [["a", "b"], ["a", "b"]],
+            ["a", "a"],
+            [None, {"user_amounts": {"a": 60.00, "b": 30.00}}]
+        )
+    print("✓ Batch error reporting works")
+
+def test_batch_length_mismatch():
+    """Test mismatched input lengths are rejected"""
+    with pytest.raises(ValueError):
+        calculate_splits_batch([10.0, 20.0], ["equal"], [["a"]], ["a"])
+    print("✓ Batch length validation works")
@@ -0,0 +1,82 @@
+# tests/test_startup.py
+"""
+Startup Tests: Gateway imports stay light
+
+Tests for:
+1. Importing main does not load LangGraph, LangChain or the model SDK
+2. Importing langgraph_service does not construct a chat model
+3. Worker shutdown closes the MCP client and chat model
+"""
+
+import os
+import subprocess
+import sys
+import pathlib
+
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ["langgraph_service", "langgraph", "langchain_core", "langchain_google_genai", "langchain_mcp_adapters"]
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def run_python(code: str) -> subprocess.CompletedProcess:
+    """Fresh interpreter, so earlier tests' imports don't leak in"""
+    env = {
+        **os.environ,
+        "MONGODB_URI": "mongodb://localhost:27017",
+        "JWT_SECRET_KEY": "test-secret",
+        "GEMINI_API_KEY": "test-key",
+    }
+    return subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+
+# ============================================================================
+# TEST: Lazy imports
+# ============================================================================
+
+def test_main_import_skips_langgraph():
+    """Test the gateway module loads without the LangGraph stack"""
+    result = run_python(
+        "import sys, main\n"
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+    print("✓ main imports without LangGraph")
+
+def test_langgraph_service_builds_model_lazily():
+    """Test importing the service does not construct the chat model"""
+    result = run_python(
+        "import sys; sys.path.insert(0, 'client')\n"
+        "import langgraph_service\n"
+        "print(langgraph_service.llm is None, 'langchain_google_genai' in sys.modules)"
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "True False"
+    print("✓ Chat model built on first use")
+
+# ============================================================================
+# TEST: Shutdown
+# ============================================================================
+
+def test_close_client_closes_resources():
+    """Test close_client awaits aclose/close before dropping the clients"""
+    result = run_python(
+        "import sys, asyncio; sys.path.insert(0, 'client')\n"
+        "import langgraph_service as service\n"
+        "closed = []\n"
+        "class MCPClient:\n"
+        "    async def aclose(self): closed.append('mcp')\n"
+        "class Model:\n"
+        "    def close(self): closed.append('model')\n"
+        "service._mcp_client, service.llm, service._chatbot = MCPClient(), Model(), object()\n"
+        "asyncio.run(service.close_client())\n"
+        "print(closed, service._mcp_client, service.llm, service._chatbot)"
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "['mcp', 'model'] None None None"
+    print("✓ Shutdown closes the clients")
@@ -0,0 +1,92 @@
+# tests/test_stub_llm.py
+"""
+Stub LLM Tests: Offline stand-in for the Gemini model
+
+Tests for:
+1. Tool and arguments recovered from the gateway prompt
+2. Full LangGraph tool round trip with the stub model
+"""
+
+import json
+import pytest
+import sys
+import pathlib
+from typing import Annotated, TypedDict
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+from langgraph.graph import StateGraph, START
+from langgraph.graph.message import add_messages
+from langgraph.prebuilt import ToolNode, tools_condition
+
+# Add client directory to path
+CLIENT_DIR = pathlib.Path(__file__).resolve().parents[1] / "client"
+if str(CLIENT_DIR) not in sys.path:
+    sys.path.insert(0, str(CLIENT_DIR))
+
+from stub_llm import StubChatModel, parse_tool_request
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def gateway_prompt(task: str, args: dict) -> str:
+    """Same layout as _process_tool_call in langgraph_service"""
+    return f"""User ID: u1
+Task: {task}
+
+CRITICAL: When calling MCP tools, use these EXACT parameters:
+{json.dumps({"user_id": "u1", **args}, indent=2)}
+
+Dates must be in YYYY-MM-DD format (no timestamps).
+"""
+
+class ChatState(TypedDict):
+    messages: Annotated[list, add_messages]
+
+@tool
+def list_expenses(user_id: str, start_date: str, end_date: str) -> str:
+    """List expenses"""
+    return json.dumps({"status": "success", "user_id": user_id, "range": [start_date, end_date]})
+
+# ============================================================================
+# TEST: Prompt parsing
+# ============================================================================
+
+def test_parse_tool_request():
+    """Test tool names and args come back out of the prompt"""
+    args = {"start_date": "2025-01-01", "end_date": "2025-01-31"}
+
+    assert parse_tool_request(gateway_prompt("List expenses from 2025-01-01 to 2025-01-31", args)) == (
+        "list_expenses", {"user_id": "u1", **args}
+    )
+    assert parse_tool_request(gateway_prompt("Call tool list_groups with args: {}", {}))[0] == "list_groups"
+    assert parse_tool_request("hello") is None
+    print("✓ Prompt parsing works")
+
+# ============================================================================
+# TEST: Graph round trip
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_stub_drives_tool_node():
+    """Test the stub calls the tool and answers with its result"""
+    model = StubChatModel().bind_tools([list_expenses])
+
+    async def chat_node(state):
+        return {"messages": [await model.ainvoke(state["messages"])]}
+
+    graph = StateGraph(ChatState)
+    graph.add_node("chat_node", chat_node)
+    graph.add_node("tools", ToolNode([list_expenses]))
+    graph.add_edge(START, "chat_node")
+    graph.add_conditional_edges("chat_node", tools_condition)
+    graph.add_edge("tools", "chat_node")
+
+    prompt = gateway_prompt("List expenses from 2025-01-01 to 2025-01-31", {"start_date": "2025-01-01", "end_date": "2025-01-31"})
+    result = await graph.compile().ainvoke({"messages": [HumanMessage(content=prompt)]})
+
+    tool_message = next(m for m in result["messages"] if m.type == "tool")
+    assert json.loads(tool_message.content)["user_id"] == "u1"
+    assert result["messages"][-1].content == tool_message.content
+    assert result["messages"][1].usage_metadata["input_tokens"] > 0
+    print("✓ Stub drives the tool node")
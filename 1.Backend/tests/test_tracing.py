@@ -0,0 +1,189 @@
+# tests/test_tracing.py
+"""
+Tracing Tests: Span nesting, propagation and exporters
+
+Tests for:
+1. Nested spans share a trace and link to their parent
+2. traceparent round trip and HTTP middleware continuation
+3. Mongo command and outgoing HTTP spans nest under the current span
+4. File exporter and the disabled (no-op) path
+"""
+
+import asyncio
+import httpx
+import json
+import pytest
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from telemetry import tracing
+from telemetry.http_client import TracingTransport
+from telemetry.mongo import MongoCommandListener
+from telemetry.tracing import (
+    InMemorySpanExporter,
+    JsonlFileSpanExporter,
+    TracingMiddleware,
+    configure_tracing,
+    format_traceparent,
+    parse_traceparent,
+    span
+)
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def exporter():
+    """Enable tracing with an in-memory exporter for one test"""
+    memory = InMemorySpanExporter()
+    configure_tracing(memory, "test")
+    yield memory
+    configure_tracing(None)
+
+# ============================================================================
+# TEST: Spans
+# ============================================================================
+
+def test_nested_spans(exporter):
+    """Test child spans inherit the trace and point at their parent"""
+    with span("outer") as outer:
+        with span("inner") as inner:
+            pass
+
+    assert [s.name for s in exporter.spans] == ["inner", "outer"]
+    assert inner.trace_id == outer.trace_id
+    assert inner.parent_id == outer.span_id
+    assert outer.parent_id is None
+    print("✓ Nested spans link to parent")
+
+@pytest.mark.asyncio
+async def test_context_follows_tasks(exporter):
+    """Test spans started in child tasks nest under the creating span"""
+    async def child():
+        with span("child"):
+            await asyncio.sleep(0)
+
+    with span("parent") as parent:
+        await asyncio.gather(child(), child())
+
+    children = [s for s in exporter.spans if s.name == "child"]
+    assert len(children) == 2
+    assert all(c.parent_id == parent.span_id for c in children)
+    print("✓ Context follows asyncio tasks")
+
+def test_exception_marks_error(exporter):
+    """Test an exception inside a span marks it as failed"""
+    with pytest.raises(ValueError):
+        with span("failing"):
+            raise ValueError("boom")
+
+    assert exporter.spans[0].status == "error"
+    assert "boom" in exporter.spans[0].attributes["error"]
+    print("✓ Exceptions recorded on spans")
+
+def test_disabled_is_noop():
+    """Test span() returns the shared no-op when tracing is off"""
+    configure_tracing(None)
+    with span("anything") as s:
+        s.set_attribute("k", "v")
+    assert s is tracing.NOOP_SPAN
+    print("✓ Disabled tracing is a no-op")
+
+# ============================================================================
+# TEST: Propagation
+# ============================================================================
+
+def test_traceparent_round_trip(exporter):
+    """Test W3C traceparent formatting and parsing"""
+    with span("root") as root:
+        header = format_traceparent()
+
+    parsed = parse_traceparent(header)
+    assert (parsed.trace_id, parsed.span_id) == (root.trace_id, root.span_id)
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent("00-xyz-abc-01") is None
+    print("✓ traceparent round trip works")
+
+def test_middleware_continues_trace(exporter):
+    """Test the HTTP root span continues an incoming traceparent"""
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        with span("handler"):
+            return {"id": item_id}
+
+    trace_id, parent_id = "ab" * 16, "cd" * 8
+    TestClient(app).get("/items/1", headers={"traceparent": f"00-{trace_id}-{parent_id}-01"})
+
+    request_span = next(s for s in exporter.spans if s.name.startswith("HTTP"))
+    handler_span = next(s for s in exporter.spans if s.name == "handler")
+    assert request_span.name == "HTTP GET /items/{item_id}"
+    assert request_span.trace_id == trace_id
+    assert request_span.parent_id == parent_id
+    assert handler_span.parent_id == request_span.span_id
+    print("✓ Middleware continues incoming trace")
+
+def test_mongo_command_span(exporter):
+    """Test command spans nest under the span active when the command started"""
+    listener = MongoCommandListener()
+
+    with span("mcp.tool list_expenses") as tool_span:
+        listener.started(SimpleNamespace(
+            command_name="find", request_id=1, command={"find": "expenses"}, database_name="expense_tracker"
+        ))
+    listener.succeeded(SimpleNamespace(command_name="find", request_id=1, duration_micros=800))
+
+    mongo_span = next(s for s in exporter.spans if s.name == "mongo.find")
+    assert mongo_span.parent_id == tool_span.span_id
+    assert mongo_span.attributes["db.collection"] == "expenses"
+    print("✓ Mongo command spans nest under tool span")
+
+@pytest.mark.asyncio
+async def test_http_span_ends_on_success_and_failure(exporter):
+    """Test outgoing requests carry traceparent and always end their span"""
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("traceparent"))
+        if request.url.path == "/down":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200)
+
+    transport = TracingTransport(httpx.MockTransport(handler), span_name="mcp.http")
+    async with httpx.AsyncClient(transport=transport, base_url="http://mcp") as client:
+        with span("process_tool_call") as parent:
+            await client.post("/mcp")
+            with pytest.raises(httpx.ConnectError):
+                await client.post("/down")
+
+    ok, failed = [s for s in exporter.spans if s.name == "mcp.http"]
+    assert parse_traceparent(seen[0]).span_id == ok.span_id
+    assert ok.parent_id == failed.parent_id == parent.span_id
+    assert ok.attributes["http.status"] == 200
+    assert failed.status == "error"
+    assert "ConnectError" in failed.attributes["error"]
+    print("✓ HTTP spans end on success and failure")
+
+# ============================================================================
+# TEST: File exporter
+# ============================================================================
+
+def test_jsonl_file_exporter(tmp_path):
+    """Test spans are written as JSON lines"""
+    path = tmp_path / "traces.jsonl"
+    configure_tracing(JsonlFileSpanExporter(str(path)), "test")
+    try:
+        with span("written", {"tool": "summarize"}):
+            pass
+    finally:
+        configure_tracing(None)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert records[0]["name"] == "written"
+    assert records[0]["attributes"] == {"tool": "summarize"}
+    assert records[0]["service"] == "test"
+    print("✓ JSONL file exporter works")
@@ -0,0 +1,147 @@
+# tests/test_write_batcher.py
+"""
+Write Batcher Tests: Coalesced expense inserts
+
+Tests for:
+1. Concurrent submits share one insert_many and get their own ids
+2. Batch size and delay limits
+3. Per-document errors, non-durable mode and flush on close
+"""
+
+import asyncio
+import pytest
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from server.utils.write_batcher import WriteBatcher, batcher_from_env
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+class RecordingCollection:
+    """Collection double that records insert_many batches"""
+
+    def __init__(self, fail_indexes=()):
+        self.batches = []
+        self.fail_indexes = set(fail_indexes)
+
+    async def insert_many(self, docs, ordered=True):
+        await asyncio.sleep(0)
+        self.batches.append(list(docs))
+        errors = [
+            {"index": i, "code": 11000, "errmsg": "duplicate key"}
+            for i in range(len(docs)) if i in self.fail_indexes
+        ]
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+# ============================================================================
+# TEST: Batching
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_coalesce():
+    """Test concurrent inserts are written with a single insert_many"""
+    collection = RecordingCollection()
+    batcher = WriteBatcher(collection, max_batch_size=100, max_delay_ms=5)
+
+    docs = [{"n": i} for i in range(10)]
+    ids = await asyncio.gather(*[batcher.submit(doc) for doc in docs])
+
+    assert len(collection.batches) == 1
+    assert len(set(ids)) == 10
+    assert [doc["_id"] for doc in collection.batches[0]] == ids
+    print("✓ Concurrent submits coalesce")
+
+@pytest.mark.asyncio
+async def test_max_batch_size_splits_batches():
+    """Test a full buffer flushes immediately in max_batch_size chunks"""
+    collection = RecordingCollection()
+    batcher = WriteBatcher(collection, max_batch_size=4, max_delay_ms=1000)
+
+    await asyncio.wait_for(
+        asyncio.gather(*[batcher.submit({"n": i}) for i in range(8)]),
+        timeout=1
+    )
+
+    assert [len(b) for b in collection.batches] == [4, 4]
+    print("✓ Max batch size respected")
+
+@pytest.mark.asyncio
+async def test_per_document_error():
+    """Test a failing document only fails its own caller"""
+    collection = RecordingCollection(fail_indexes={1})
+    batcher = WriteBatcher(collection)
+
+    results = await asyncio.gather(
+        *[batcher.submit({"n": i}) for i in range(3)],
+        return_exceptions=True
+    )
+
+    assert isinstance(results[1], DuplicateKeyError)
+    assert not isinstance(results[0], Exception)
+    assert not isinstance(results[2], Exception)
+    print("✓ Per-document errors isolated")
+
+# ============================================================================
+# TEST: Durability and shutdown
+# ============================================================================
+
+@pytest.mark.asyncio
+async def test_non_durable_returns_before_write():
+    """Test non-durable submit returns the id before the flush"""
+    collection = RecordingCollection()
+    batcher = WriteBatcher(collection, max_delay_ms=1000, durable=False)
+
+    inserted_id = await batcher.submit({"n": 1})
+
+    assert inserted_id is not None
+    assert collection.batches == []
+    assert len(batcher) == 1
+
+    await batcher.close()
+    assert collection.batches[0][0]["_id"] == inserted_id
+    print("✓ Non-durable mode writes behind")
+
+@pytest.mark.asyncio
+async def test_durable_submit_on_non_durable_batcher():
+    """Test submit(durable=True) waits for its batch even in write-behind mode"""
+    collection = RecordingCollection(fail_indexes=[1])
+    batcher = WriteBatcher(collection, max_delay_ms=5, durable=False)
+
+    behind = await batcher.submit({"n": 0})
+    assert collection.batches == []
+
+    with pytest.raises(DuplicateKeyError):
+        await batcher.submit({"n": 1}, durable=True)
+    assert [doc["_id"] for doc in collection.batches[0]][0] == behind
+    print("✓ Durable submit waits for acknowledgement")
+
+@pytest.mark.asyncio
+async def test_close_flushes_and_rejects():
+    """Test close writes buffered documents and rejects new ones"""
+    collection = RecordingCollection()
+    batcher = WriteBatcher(collection, max_delay_ms=1000, durable=False)
+
+    for i in range(3):
+        await batcher.submit({"n": i})
+    await batcher.close()
+
+    assert sum(len(b) for b in collection.batches) == 3
+    with pytest.raises(RuntimeError):
+        await batcher.submit({"n": 4})
+    print("✓ Close flushes buffer")
+
+def test_batcher_from_env(monkeypatch):
+    """Test coalescing is opt-in and configurable"""
+    monkeypatch.delenv("EXPENSE_WRITE_BATCH", raising=False)
+    assert batcher_from_env(RecordingCollection()) is None
+
+    monkeypatch.setenv("EXPENSE_WRITE_BATCH", "1")
+    monkeypatch.setenv("EXPENSE_WRITE_BATCH_MAX_SIZE", "50")
+    monkeypatch.setenv("EXPENSE_WRITE_BATCH_DURABLE", "0")
+    batcher = batcher_from_env(RecordingCollection())
+
+    assert batcher.max_batch_size == 50
+    assert batcher.durable is False
+    print("✓ Environment configuration works")